@@ -2,17 +2,34 @@
 
 日報モード: 全セクション（トレンドTOP3、アジア市場、業界ニュース等）を生成
 週報モード: 1週間分のデータを集約してウィークリーダイジェストを生成
+
+日報にはマップリデュース方式もある。地域・分野ごとのスライスを並列に分析し
+（map）、トレンド候補から TOP3 とアクション示唆だけを選ぶ軽い呼び出しで
+まとめる（reduce）。1回あたりの入出力が小さいため、JSON の途中切れが起きにくい。
 """
 
+import functools
 import json
 import os
 import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
 from google import genai
 from google.genai import types
 
+import gemini_cache
+import schemas
+from json_stream import IncrementalJSONParser, repair_json
+
 logger = logging.getLogger(__name__)
 
+# 優先順に試行するモデル
+GEMINI_MODELS = ["gemini-2.5-flash", "gemini-2.5-flash-lite"]
+
 # ──────────────────────────────────────────
 # 共通のシステムインストラクション
 # ──────────────────────────────────────────
@@ -294,21 +311,362 @@ WEEKLY_PROMPT = """\
 """
 
 
-def analyze_daily(collected_data: dict, past_trend_names: list[str] | None = None) -> dict | None:
-    """収集データをGeminiで分析し、日報用の構造化データを返す."""
+# 週次ロールアップ用（日報の全文ではなく集計済みデータを渡す）
+WEEKLY_ROLLUP_PROMPT = WEEKLY_PROMPT.replace(
+    "以下は今週1週間分の日報データ（各日の分析結果）です。",
+    "以下は今週1週間分の日報を集計したデータです。\n"
+    "trends はトレンドごとの出現回数・ステージ推移・順位・指標（週初と最新）、"
+    "headlines は地域・分野別の見出し、references は参照元（出現回数順）です。",
+).replace("{weekly_data}", "{weekly_rollup}")
+
+# ──────────────────────────────────────────
+# マップリデュース用プロンプト
+# ──────────────────────────────────────────
+SLICE_PROMPT = """\
+以下は海外のSNS・メディアから収集した食品関連データのうち、{focus}に関する部分です。
+日報レポートの一部として分析し、以下のJSON形式で出力してください。
+
+## 過去に配信済み（trend_candidates に選ばないこと）
+{past_trends}
+
+## 収集データ
+{data}
+
+## 出力JSON形式（厳守）
+
+{output_format}
+
+## 注意
+- trend_candidates はこのデータから見つかった注目トレンド商品を最大2件
+- 各テキストフィールドは100文字以内を目安に簡潔に
+- references は {{"text": "表示テキスト", "url": "https://..."}} 形式。URLが不明なら空文字 ""
+"""
+
+REDUCE_PROMPT = """\
+以下は地域・分野別に分析した今日のトレンド候補と主要ヘッドラインです。
+日報レポートの総括として、以下のJSON形式で出力してください。
+
+## トレンド候補（id付き）
+{candidates}
+
+## 各セクションのヘッドライン
+{headlines}
+
+## 出力JSON形式（厳守）
+
+{{
+  "executive_summary": "今日の最重要ポイントを5-6行で。マルイ物産への影響を必ず含める。",
+  "top_trends": [
+    {{"id": 0, "rank": 1}}
+  ],
+  "action_items": [
+    {{
+      "priority": "高",
+      "action": "具体的なアクション",
+      "reason": "理由を2文で"
+    }}
+  ]
+}}
+
+## 件数の目安
+- top_trends: 候補から3件を選び rank を付ける（可能な限り異なるソース・地域から）
+- action_items: 5件（高2, 中2, 低1）
+"""
+
+# スライス出力の共通部品
+_TREND_CANDIDATE_FORMAT = """\
+{"rank": 0, "name_en": "英語名", "name_ja": "日本語名（カタカナ）", "origin": "発祥国・都市",
+ "detected_on": ["ソース名"], "metrics": "具体的な指標", "lifecycle_stage": "成長期",
+ "lifecycle_bar": "■■■□□", "japan_landing_estimate": "約4-6ヶ月後",
+ "why_trending": "流行理由を2文で", "japan_market_fit": "日本市場との親和性を2文で",
+ "procurement_note": "マルイ物産の調達可能性を2文で",
+ "references": [{"text": "参照元", "url": ""}]}"""
+
+_NEWS_ITEM_FORMAT = """\
+{"headline": "見出し", "detail": "2-3行の詳細", "implication": "マルイ物産への示唆",
+ "references": [{"text": "参照元", "url": ""}]}"""
+
+# スライス名 → 担当範囲・入力コレクター・担当セクション（日報スキーマのキー → サブキー）・出力形式
+MAP_SLICES = {
+    "china": {
+        "focus": "中国市場",
+        "sources": ["xiaohongshu", "douyin", "weibo"],
+        "sections": {"asia_trends": ["china"]},
+        "output_format": (
+            '{"asia_trends": {"china": [' + _NEWS_ITEM_FORMAT + ']},\n'
+            ' "trend_candidates": [' + _TREND_CANDIDATE_FORMAT + ']}\n'
+            "件数: asia_trends.china 2件"
+        ),
+    },
+    "korea": {
+        "focus": "韓国市場",
+        "sources": ["naver"],
+        "sections": {"asia_trends": ["korea"]},
+        "output_format": (
+            '{"asia_trends": {"korea": [' + _NEWS_ITEM_FORMAT + ']},\n'
+            ' "trend_candidates": [' + _TREND_CANDIDATE_FORMAT + ']}\n'
+            "件数: asia_trends.korea 2件"
+        ),
+    },
+    "taiwan": {
+        "focus": "台湾市場",
+        "sources": ["ptt"],
+        "sections": {"asia_trends": ["taiwan"]},
+        "output_format": (
+            '{"asia_trends": {"taiwan": [' + _NEWS_ITEM_FORMAT + ']},\n'
+            ' "trend_candidates": [' + _TREND_CANDIDATE_FORMAT + ']}\n'
+            "件数: asia_trends.taiwan 2件"
+        ),
+    },
+    "southeast_asia": {
+        "focus": "東南アジア市場とアジアの外食産業ニュース",
+        "sources": ["instagram", "asia_media_rss"],
+        "sections": {"asia_trends": ["southeast_asia"], "industry_news": ["asian"]},
+        "output_format": (
+            '{"asia_trends": {"southeast_asia": [' + _NEWS_ITEM_FORMAT + ']},\n'
+            ' "industry_news": {"asian": [' + _NEWS_ITEM_FORMAT + ']},\n'
+            ' "trend_candidates": [' + _TREND_CANDIDATE_FORMAT + ']}\n'
+            "件数: asia_trends.southeast_asia 1件, industry_news.asian 3件"
+        ),
+    },
+    "western": {
+        "focus": "欧米のSNSトレンドと外食産業ニュース",
+        "sources": ["youtube", "reddit", "tiktok", "x_twitter", "google_trends", "rss_feeds"],
+        "sections": {"industry_news": ["western"]},
+        "output_format": (
+            '{"industry_news": {"western": [' + _NEWS_ITEM_FORMAT + ']},\n'
+            ' "trend_candidates": [' + _TREND_CANDIDATE_FORMAT + ']}\n'
+            "件数: industry_news.western 3件"
+        ),
+    },
+    "foodtech_regulation": {
+        "focus": "フードテックと食品規制・政策",
+        "sources": ["rss_feeds", "asia_media_rss"],
+        "sections": {"foodtech": None, "regulation": None},
+        "output_format": (
+            '{"foodtech": [{"headline": "見出し", "detail": "2-3行の詳細", "impact": "外食産業への影響",'
+            ' "references": [{"text": "参照元", "url": ""}]}],\n'
+            ' "regulation": {\n'
+            '   "risks": [{"headline": "見出し", "detail": "2-3行の詳細", "impact": "影響",'
+            ' "references": [{"text": "参照元", "url": ""}]}],\n'
+            '   "opportunities": [{"headline": "見出し", "detail": "2-3行の詳細", "opportunity": "チャンスの説明",'
+            ' "references": [{"text": "参照元", "url": ""}]}]}}\n'
+            "件数: foodtech 3件, regulation リスク2件・チャンス2件"
+        ),
+    },
+}
+
+# スライスごとの出力スキーマとバリデーター（import 時に1度だけ組み立てる）
+_SLICE_SCHEMAS = {name: schemas.slice_schema(spec["sections"]) for name, spec in MAP_SLICES.items()}
+_SLICE_VALIDATORS = {
+    name: schemas.compile_validator(schema) for name, schema in _SLICE_SCHEMAS.items()
+}
+
+# スライスあたりの入力・出力上限（単発モードより小さく抑える）
+SLICE_DATA_LIMIT = 20000
+SLICE_MAX_OUTPUT_TOKENS = 6144
+REDUCE_MAX_OUTPUT_TOKENS = 4096
+
+
+def analyze_daily(
+    collected_data: dict,
+    past_trend_names: list[str] | None = None,
+    mode: str = "single",
+    on_section=None,
+) -> dict | None:
+    """収集データをGeminiで分析し、日報用の構造化データを返す.
+
+    Args:
+        mode: "single"（1回の呼び出しで全セクション生成）
+              or "mapreduce"（スライス並列分析 → TOP3選定）
+        on_section: 単発モードのストリーミング中、セクション完了ごとに
+                    (key, value) で呼ばれるコールバック
+    """
+    if mode == "mapreduce":
+        result = analyze_daily_mapreduce(collected_data, past_trend_names)
+        if result:
+            return result
+        logger.warning("マップリデュース分析失敗。単発モードで再試行します")
+
     data_str = _prepare_data(collected_data)
     past_str = "、".join(past_trend_names) if past_trend_names else "（なし）"
     prompt = DAILY_PROMPT.format(data=data_str, past_trends=past_str)
-    return _call_gemini(prompt, "日報")
+    return _call_gemini(
+        prompt, "日報",
+        required_keys=("top_trends",),
+        schema=schemas.DAILY_SCHEMA,
+        validator=schemas.validate_daily,
+        on_section=on_section,
+    )
+
+
+def analyze_daily_mapreduce(
+    collected_data: dict, past_trend_names: list[str] | None = None,
+) -> dict | None:
+    """スライスごとの並列分析結果を日報スキーマにまとめて返す."""
+    past_str = "、".join(past_trend_names) if past_trend_names else "（なし）"
+
+    slice_results: dict[str, dict] = {}
+    with ThreadPoolExecutor(max_workers=len(MAP_SLICES)) as executor:
+        futures = {
+            executor.submit(_analyze_slice, name, spec, collected_data, past_str): name
+            for name, spec in MAP_SLICES.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning("スライス分析例外 (%s): %s", name, e)
+                continue
+            if result:
+                slice_results[name] = result
 
+    if not slice_results:
+        logger.error("全スライスの分析に失敗")
+        return None
+    logger.info("スライス分析完了: %d/%d", len(slice_results), len(MAP_SLICES))
+
+    # map: 定義順にセクションをマージ（as_completed の順序に依存させない）
+    analysis: dict = {}
+    candidates: list[dict] = []
+    for name in MAP_SLICES:
+        result = slice_results.get(name)
+        if not result:
+            continue
+        candidates.extend(
+            c for c in result.pop("trend_candidates", []) if isinstance(c, dict)
+        )
+        _merge_sections(analysis, result)
+
+    # reduce: 候補から TOP3 とアクション示唆を選定
+    summary = _reduce_slices(analysis, candidates)
+    analysis["executive_summary"] = summary.get("executive_summary", "")
+    analysis["top_trends"] = summary.get("top_trends", [])
+    analysis["action_items"] = summary.get("action_items", [])
+    return analysis
+
+
+def _analyze_slice(name: str, spec: dict, collected_data: dict, past_str: str) -> dict | None:
+    """1スライス分の収集データを分析する."""
+    sliced = {src: collected_data.get(src, []) for src in spec["sources"]}
+    if not any(sliced.values()):
+        logger.info("スライス %s: 入力データなし。スキップ", name)
+        return None
 
-def analyze_weekly(weekly_data: list[dict]) -> dict | None:
-    """週間データを集約してGeminiで週報を生成."""
+    data_str = _prepare_data(sliced, limit=SLICE_DATA_LIMIT)
+    prompt = SLICE_PROMPT.format(
+        focus=spec["focus"],
+        past_trends=past_str,
+        data=data_str,
+        output_format=spec["output_format"],
+    )
+    return _call_gemini(
+        prompt, f"日報[{name}]",
+        max_output_tokens=SLICE_MAX_OUTPUT_TOKENS,
+        required_keys=tuple(spec["sections"]),
+        schema=_SLICE_SCHEMAS[name],
+        validator=_SLICE_VALIDATORS[name],
+    )
+
+
+def _merge_sections(target: dict, source: dict) -> None:
+    """スライスの出力を日報スキーマにマージする（dictは再帰、listは連結）."""
+    for key, value in source.items():
+        if isinstance(value, dict):
+            _merge_sections(target.setdefault(key, {}), value)
+        elif isinstance(value, list):
+            target.setdefault(key, []).extend(value)
+        else:
+            target[key] = value
+
+
+def _reduce_slices(analysis: dict, candidates: list[dict]) -> dict:
+    """トレンド候補から TOP3・サマリー・アクション示唆を選ぶ.
+
+    reduce 呼び出しに失敗した場合は候補の先頭3件をそのまま採用する。
+    """
+    compact = [
+        {
+            "id": i,
+            "name_en": c.get("name_en", ""),
+            "origin": c.get("origin", ""),
+            "detected_on": c.get("detected_on", []),
+            "metrics": c.get("metrics", ""),
+            "lifecycle_stage": c.get("lifecycle_stage", ""),
+        }
+        for i, c in enumerate(candidates)
+    ]
+    prompt = REDUCE_PROMPT.format(
+        candidates=json.dumps(compact, ensure_ascii=False, separators=(",", ":")),
+        headlines=json.dumps(_collect_headlines(analysis), ensure_ascii=False, separators=(",", ":")),
+    )
+    result = _call_gemini(
+        prompt, "日報[reduce]",
+        max_output_tokens=REDUCE_MAX_OUTPUT_TOKENS,
+        required_keys=("top_trends",),
+        schema=schemas.REDUCE_SCHEMA,
+        validator=schemas.validate_reduce,
+    ) or {}
+
+    top_trends = []
+    seen = set()
+    for pick in result.get("top_trends", []):
+        idx = pick.get("id") if isinstance(pick, dict) else None
+        if not isinstance(idx, int) or not 0 <= idx < len(candidates) or idx in seen:
+            continue
+        seen.add(idx)
+        trend = dict(candidates[idx])
+        trend["rank"] = pick.get("rank", len(top_trends) + 1)
+        top_trends.append(trend)
+
+    if not top_trends:
+        logger.warning("reduce で TOP3 を選定できず。候補の先頭を採用")
+        for i, c in enumerate(candidates[:3], 1):
+            top_trends.append({**c, "rank": i})
+
+    top_trends.sort(key=lambda t: t.get("rank", 99) if isinstance(t.get("rank"), int) else 99)
+    # Gemini の順位は重複・欠番がありうるので、並べ替えた順に 1..n を振り直す
+    top_trends = top_trends[:3]
+    for rank, trend in enumerate(top_trends, 1):
+        trend["rank"] = rank
+    result["top_trends"] = top_trends
+    return result
+
+
+def _collect_headlines(analysis: dict) -> dict:
+    """reduce 用に各セクションのヘッドラインだけを抜き出す."""
+    headlines: dict = {}
+    for key, value in analysis.items():
+        if isinstance(value, dict):
+            headlines[key] = _collect_headlines(value)
+        elif isinstance(value, list):
+            headlines[key] = [
+                item.get("headline", "") for item in value if isinstance(item, dict)
+            ]
+    return headlines
+
+
+def analyze_weekly(weekly_data: list[dict] | dict) -> dict | None:
+    """週間データを集約してGeminiで週報を生成.
+
+    Args:
+        weekly_data: 週次ロールアップ（weekly_aggregator.load_weekly_rollup）
+                     または日報7日分のリスト（ロールアップがない週の後方互換）
+    """
     data_str = json.dumps(weekly_data, ensure_ascii=False, separators=(",", ":"))
-    if len(data_str) > 50000:
-        data_str = data_str[:50000] + "..."
-    prompt = WEEKLY_PROMPT.format(weekly_data=data_str)
-    return _call_gemini(prompt, "週報")
+    if isinstance(weekly_data, dict):
+        prompt = WEEKLY_ROLLUP_PROMPT.format(weekly_rollup=data_str)
+    else:
+        if len(data_str) > 50000:
+            data_str = data_str[:50000] + "..."
+        prompt = WEEKLY_PROMPT.format(weekly_data=data_str)
+    return _call_gemini(
+        prompt, "週報",
+        required_keys=("trend_summary",),
+        schema=schemas.WEEKLY_SCHEMA,
+        validator=schemas.validate_weekly,
+    )
 
 
 # 後方互換のためのエイリアス
@@ -317,47 +675,311 @@ def analyze(collected_data: dict, past_trend_names: list[str] | None = None) ->
     return analyze_daily(collected_data, past_trend_names)
 
 
-def _prepare_data(collected_data: dict) -> str:
+def _prepare_data(collected_data: dict, limit: int = 60000) -> str:
     """収集データをJSON文字列化."""
     data_str = json.dumps(collected_data, ensure_ascii=False, separators=(",", ":"))
-    if len(data_str) > 60000:
-        data_str = data_str[:60000] + "..."
+    if len(data_str) > limit:
+        data_str = data_str[:limit] + "..."
     return data_str
 
 
-def _call_gemini(prompt: str, mode_label: str) -> dict | None:
-    """Gemini APIを呼び出して分析結果を返す."""
+def _call_gemini(
+    prompt: str,
+    mode_label: str,
+    max_output_tokens: int = 16384,
+    required_keys: tuple[str, ...] = (),
+    schema: dict | None = None,
+    validator=None,
+    on_section=None,
+) -> dict | None:
+    """Gemini APIを呼び出して分析結果を返す.
+
+    同一条件の応答が gemini_cache にあれば API を呼ばずにそれを使う。
+    GEMINI_HEDGE=on の場合は、プライマリが一定時間内に応答しなければ
+    フォールバックモデルを並行して起動し、先に妥当な応答を返した方を採用する。
+
+    Args:
+        required_keys: 応答に必須のトップレベルキー（スキーマチェック）
+        schema: response_schema として Gemini に渡す出力スキーマ
+        validator: schemas.compile_validator で組み立てた検証・補正関数
+        on_section: ストリーミング中にトップレベルセクションが閉じるたびに
+                    (key, value) で呼ばれるコールバック
+    """
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         logger.error("GEMINI_API_KEY が未設定")
         return None
 
-    client = genai.Client(api_key=api_key)
+    client = _get_client(api_key)
+    gen_config = {
+        "response_mime_type": "application/json",
+        "temperature": 0.5,
+        "max_output_tokens": max_output_tokens,
+    }
+    if schema:
+        gen_config["response_schema"] = schema
+
+    def generate(model_name: str, on_section=None, abandoned=None) -> dict | None:
+        return _generate(
+            client, model_name, prompt, gen_config, mode_label, required_keys, on_section,
+            abandoned,
+        )
+
+    if _hedge_enabled():
+        result = _generate_hedged(generate, mode_label, on_section)
+    else:
+        result = None
+        for model_name in GEMINI_MODELS:
+            result = generate(model_name, on_section)
+            if result:
+                break
 
-    for model_name in ["gemini-2.5-flash", "gemini-2.5-flash-lite"]:
-        try:
-            logger.info("Gemini %s分析開始: %s", mode_label, model_name)
+    if result is None:
+        logger.error("全Geminiモデルで%s分析失敗", mode_label)
+        return None
+    return validator(result) if validator else result
+
+
+def _generate(
+    client: genai.Client,
+    model_name: str,
+    prompt: str,
+    gen_config: dict,
+    mode_label: str,
+    required_keys: tuple[str, ...],
+    on_section=None,
+    abandoned: threading.Event | None = None,
+) -> dict | None:
+    """1モデルで生成し、パース・スキーマチェック済みの結果を返す。失敗時は None.
+
+    ストリーミング時はセクションが閉じるたびに on_section(key, value) を呼ぶ。
+    ストリームが途中で切れた場合も、完了済みのセクションが揃っていれば採用する。
+    abandoned がセットされたら（ヘッジで他のモデルが採用された）ストリームを閉じ、
+    キャッシュにもレイテンシ実績にも残さずに None を返す。
+    """
+    cache_key = gemini_cache.make_key(model_name, SYSTEM_INSTRUCTION, prompt, gen_config)
+    cached = gemini_cache.get(cache_key)
+    if cached is not None:
+        result = _parse_response(cached)
+        if _is_valid_result(result, required_keys):
+            logger.info("Gemini %s分析完了 (%s, キャッシュ)", mode_label, model_name)
+            return result
+
+    config = types.GenerateContentConfig(system_instruction=SYSTEM_INSTRUCTION, **gen_config)
+    parser = IncrementalJSONParser(on_section) if _stream_enabled() else None
+    try:
+        logger.info("Gemini %s分析開始: %s", mode_label, model_name)
+        started = time.monotonic()
+        if parser:
+            stream = client.models.generate_content_stream(
+                model=model_name, contents=prompt, config=config,
+            )
+            for chunk in stream:
+                if abandoned is not None and abandoned.is_set():
+                    stream.close()
+                    break
+                parser.feed(chunk.text or "")
+            text = parser.text
+        else:
             response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction=SYSTEM_INSTRUCTION,
-                    response_mime_type="application/json",
-                    temperature=0.5,
-                    max_output_tokens=16384,
-                ),
+                model=model_name, contents=prompt, config=config,
             )
+            text = response.text
+        if abandoned is not None and abandoned.is_set():
+            logger.info("Gemini %s: %s の応答は不採用のため破棄", mode_label, model_name)
+            return None
+        _record_latency(model_name, time.monotonic() - started)
+
+        result = _parse_response(text)
+        if _is_valid_result(result, required_keys):
+            gemini_cache.put(cache_key, model_name, text)
+            logger.info("Gemini %s分析完了 (%s)", mode_label, model_name)
+            return result
+        if result:
+            logger.warning("Gemini応答に必須キーが不足 (%s): %s", model_name, required_keys)
+
+    except Exception as e:
+        logger.warning("Gemini API失敗 (%s): %s", model_name, e)
+
+    # ストリームが途中で切れた場合: 完了済みセクションで足りていれば採用
+    if abandoned is not None and abandoned.is_set():
+        return None
+    if parser and _is_valid_result(parser.sections, required_keys):
+        logger.info(
+            "Gemini %s: 途中切れの応答から完了済みセクション %d 件を採用 (%s)",
+            mode_label, len(parser.sections), model_name,
+        )
+        return dict(parser.sections)
+    return None
 
-            result = _parse_response(response.text)
-            if result:
-                logger.info("Gemini %s分析完了 (%s)", mode_label, model_name)
-                return result
 
+def _stream_enabled() -> bool:
+    return os.environ.get("GEMINI_STREAM", "on").lower() not in ("off", "0", "false")
+
+
+def _is_valid_result(result: dict | None, required_keys: tuple[str, ...]) -> bool:
+    """パース結果が dict で、必須キーをすべて含むか."""
+    return isinstance(result, dict) and bool(result) and all(k in result for k in required_keys)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client(api_key: str) -> genai.Client:
+    """Gemini クライアントを取得する（実行中は使い回す）.
+
+    GEMINI_BASE_URL を設定するとローカルのスタブサーバー等に接続する。
+    """
+    base_url = os.environ.get("GEMINI_BASE_URL")
+    if base_url:
+        return genai.Client(api_key=api_key, http_options=types.HttpOptions(base_url=base_url))
+    return genai.Client(api_key=api_key)
+
+
+# ──────────────────────────────────────────
+# ヘッジリクエスト
+# ──────────────────────────────────────────
+
+# ヘッジ開始までの待ち時間（レイテンシ実績が少ないうちの既定値。GEMINI_HEDGE_DEFAULT で変更可）
+HEDGE_DEFAULT_DELAY = 45.0
+# 実績からヘッジ開始を決めるパーセンタイル（GEMINI_HEDGE_PERCENTILE で変更可）と必要サンプル数
+HEDGE_PERCENTILE = 90
+HEDGE_MIN_SAMPLES = 3
+# レイテンシ実績は実行をまたいで保存する（モデルごとに新しい順に LATENCY_HISTORY 件）
+LATENCY_FILE = Path(__file__).resolve().parent.parent / "data" / "gemini_latency.json"
+LATENCY_HISTORY = 50
+
+_latencies: dict[str, list[float]] | None = None
+_latency_lock = threading.Lock()
+
+
+def _hedge_enabled() -> bool:
+    return os.environ.get("GEMINI_HEDGE", "off").lower() in ("on", "1", "true")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning("%s が不正: %s", name, value)
+        return default
+
+
+def _load_latencies() -> dict[str, list[float]]:
+    """保存済みのレイテンシ実績を読む（_latency_lock の内側で呼ぶ）."""
+    global _latencies
+    if _latencies is None:
+        _latencies = {}
+        if LATENCY_FILE.exists():
+            try:
+                _latencies = json.loads(LATENCY_FILE.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning("レイテンシ実績の読み込み失敗: %s", e)
+    return _latencies
+
+
+def _record_latency(model_name: str, seconds: float) -> None:
+    with _latency_lock:
+        latencies = _load_latencies()
+        samples = latencies.setdefault(model_name, [])
+        samples.append(round(seconds, 2))
+        del samples[:-LATENCY_HISTORY]
+        try:
+            LATENCY_FILE.parent.mkdir(parents=True, exist_ok=True)
+            LATENCY_FILE.write_text(json.dumps(latencies, indent=1), encoding="utf-8")
+        except OSError as e:
+            logger.warning("レイテンシ実績の保存失敗: %s", e)
+
+
+def _hedge_delay(model_name: str) -> float:
+    """プライマリの応答をフォールバック起動前に待つ秒数.
+
+    GEMINI_HEDGE_AFTER（秒）が設定されていればそれを使い、なければ
+    過去の実行も含めたレイテンシ実績のパーセンタイルを使う。
+    """
+    fixed = os.environ.get("GEMINI_HEDGE_AFTER")
+    if fixed:
+        try:
+            return float(fixed)
+        except ValueError:
+            logger.warning("GEMINI_HEDGE_AFTER が不正: %s", fixed)
+
+    with _latency_lock:
+        samples = sorted(_load_latencies().get(model_name, []))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return _env_float("GEMINI_HEDGE_DEFAULT", HEDGE_DEFAULT_DELAY)
+    percentile = _env_float("GEMINI_HEDGE_PERCENTILE", HEDGE_PERCENTILE)
+    idx = min(len(samples) - 1, int(len(samples) * percentile / 100))
+    return samples[idx]
+
+
+def _generate_hedged(generate, mode_label: str, on_section=None) -> dict | None:
+    """プライマリを起動し、遅延・失敗時にフォールバックを並行起動して先着を採用する.
+
+    各モデルのセクション通知はモデルごとに溜めておき、採用したモデルの分だけを
+    呼び出し元のスレッドで on_section に渡す。各モデルはデーモンスレッドで動かし、
+    負けたモデルは abandoned を見てストリームを閉じる（終了も待たない）。
+    """
+    primary, *fallbacks = GEMINI_MODELS
+    results: queue.Queue = queue.Queue()
+    abandoned = threading.Event()
+    sections: dict[str, list[tuple]] = {}
+
+    def run(model_name: str) -> None:
+        collected = sections.setdefault(model_name, [])
+        try:
+            result = generate(
+                model_name,
+                (lambda key, value: collected.append((key, value))) if on_section else None,
+                abandoned,
+            )
         except Exception as e:
             logger.warning("Gemini API失敗 (%s): %s", model_name, e)
+            result = None
+        results.put((model_name, result))
 
-    logger.error("全Geminiモデルで%s分析失敗", mode_label)
-    return None
+    def start(model_name: str) -> None:
+        threading.Thread(
+            target=run, args=(model_name,), name=f"gemini-{model_name}", daemon=True,
+        ).start()
+
+    start(primary)
+    running = 1
+    delay = _hedge_delay(primary)
+    try:
+        done = [results.get(timeout=delay)]
+    except queue.Empty:
+        logger.info("Gemini %s: %s が %.1f 秒以内に応答せず。ヘッジ開始", mode_label, primary, delay)
+        done = []
+
+    remaining = list(fallbacks)
+    try:
+        while True:
+            for model_name, result in done:
+                running -= 1
+                if result:
+                    _forward_sections(on_section, sections[model_name])
+                    return result
+            # プライマリが遅い・失敗した場合は次のフォールバックを並行起動する
+            if remaining:
+                start(remaining.pop(0))
+                running += 1
+            if not running:
+                return None
+            done = [results.get()]
+    finally:
+        abandoned.set()
+
+
+def _forward_sections(on_section, sections: list[tuple]) -> None:
+    if not on_section:
+        return
+    for key, value in sections:
+        try:
+            on_section(key, value)
+        except Exception as e:
+            logger.warning("セクション通知の処理に失敗 (%s): %s", key, e)
 
 
 def _parse_response(text: str) -> dict | None:
@@ -367,22 +989,14 @@ def _parse_response(text: str) -> dict | None:
     except json.JSONDecodeError:
         pass
 
-    try:
-        fixed = text.rstrip()
-        open_braces = fixed.count("{") - fixed.count("}")
-        open_brackets = fixed.count("[") - fixed.count("]")
-
-        last_complete = fixed.rfind("},")
-        if last_complete > 0 and (open_braces > 0 or open_brackets > 0):
-            fixed = fixed[: last_complete + 1]
-            fixed += "]" * max(0, fixed.count("[") - fixed.count("]"))
-            fixed += "}" * max(0, fixed.count("{") - fixed.count("}"))
-
-        result = json.loads(fixed)
-        logger.info("JSON修復成功")
-        return result
-    except (json.JSONDecodeError, ValueError):
-        pass
+    repaired = repair_json(text)
+    if repaired:
+        try:
+            result = json.loads(repaired)
+            logger.info("JSON修復成功（%d/%d 文字を使用）", len(repaired), len(text))
+            return result
+        except json.JSONDecodeError:
+            pass
 
     logger.error("JSON修復失敗。応答末尾: %s", text[-200:])
     return None
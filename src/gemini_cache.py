@@ -0,0 +1,134 @@
+"""Gemini 応答のコンテンツアドレス型キャッシュ.
+
+(モデル, システムインストラクション, プロンプト, 生成設定) の SHA-256 を
+キーとして応答テキストを data/gemini_cache/ に保存する。
+同日の再実行・週報のリトライ・リプレイでは API を呼ばずに結果を返す。
+
+- TTL を過ぎたエントリーは読み込み時に無視し、保存時に削除する
+- 合計サイズが上限を超えたら古いものから削除する
+- GEMINI_CACHE=off で無効化できる
+- リポジトリにはコミットしない（.gitignore）。CI では actions/cache で実行間に引き継ぐ
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "gemini_cache"
+TTL_SECONDS = 7 * 24 * 3600
+MAX_CACHE_BYTES = 20 * 1024 * 1024
+
+# 実行中のヒット/ミス数（main の実行メトリクスに出力）。マップリデュースでは複数スレッドから更新する
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(kind: str) -> None:
+    with _stats_lock:
+        _stats[kind] += 1
+
+
+def is_enabled() -> bool:
+    """キャッシュが有効か."""
+    return os.environ.get("GEMINI_CACHE", "on").lower() not in ("off", "0", "false")
+
+
+def make_key(model: str, system_instruction: str, prompt: str, config: dict) -> str:
+    """キャッシュキー（SHA-256 の16進表記）を生成する."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "system_instruction": system_instruction,
+            "prompt": prompt,
+            "config": config,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key: str) -> str | None:
+    """キャッシュ済みの応答テキストを返す。なければ None."""
+    if not is_enabled():
+        return None
+    path = CACHE_DIR / f"{key}.json"
+    try:
+        entry = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        _count("misses")
+        return None
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning("Geminiキャッシュ読み込み失敗 (%s): %s", key[:12], e)
+        _count("misses")
+        return None
+
+    if time.time() - entry.get("created_at", 0) > TTL_SECONDS:
+        _count("misses")
+        return None
+
+    _count("hits")
+    logger.info("Geminiキャッシュヒット: %s (%s)", key[:12], entry.get("model", ""))
+    return entry.get("text")
+
+
+def put(key: str, model: str, text: str) -> None:
+    """応答テキストをキャッシュに保存し、必要なら古いエントリーを削除する."""
+    if not is_enabled():
+        return
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / f"{key}.json"
+    try:
+        path.write_text(
+            json.dumps(
+                {"model": model, "created_at": time.time(), "text": text},
+                ensure_ascii=False,
+            ),
+            encoding="utf-8",
+        )
+    except OSError as e:
+        logger.warning("Geminiキャッシュ保存失敗: %s", e)
+        return
+    _evict()
+
+
+def stats() -> dict:
+    """実行中のヒット/ミス数を返す."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _evict() -> None:
+    """期限切れエントリーを削除し、サイズ上限まで古い順に削除する."""
+    now = time.time()
+    entries = []
+    for path in CACHE_DIR.glob("*.json"):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        if now - st.st_mtime > TTL_SECONDS:
+            path.unlink(missing_ok=True)
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    if total <= MAX_CACHE_BYTES:
+        return
+
+    entries.sort()
+    removed = 0
+    for _, size, path in entries:
+        if total <= MAX_CACHE_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    logger.info("Geminiキャッシュ: サイズ上限超過のため %d 件削除", removed)
@@ -1,87 +1,159 @@
 """過去に配信済みのトレンドを管理し、重複配信を防ぐ.
 
 新しいアナライザーのtop_trends形式（name_en/name_ja）にも対応。
+
+履歴は SQLite（WAL モード）の data/history.db に保存する。
+name_norm（trend_index.normalize で正規化した名前）と sent_at に索引を張り、
+保持期間の削除は DELETE 1文、過去名の読み出しは sent_at の範囲引きで行う。
+既出判定は読み出した過去名から作る trend_index.PastTrendIndex が受け持つ。
+旧形式の data/history.json があれば、DB 作成時に1度だけ取り込む。
 """
 
 import json
 import logging
+import sqlite3
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
+from trend_index import normalize
+
 logger = logging.getLogger(__name__)
 
 JST = timezone(timedelta(hours=9))
-HISTORY_FILE = Path(__file__).resolve().parent.parent / "data" / "history.json"
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+HISTORY_DB = DATA_DIR / "history.db"
+HISTORY_FILE = DATA_DIR / "history.json"
 RETENTION_DAYS = 90
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id        INTEGER PRIMARY KEY,
+    name      TEXT NOT NULL,
+    name_norm TEXT NOT NULL,
+    lang      TEXT NOT NULL,
+    sent_at   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_name_norm ON history (name_norm);
+CREATE INDEX IF NOT EXISTS idx_history_sent_at ON history (sent_at);
+"""
 
-def load() -> list[dict]:
-    """履歴ファイルを読み込む。存在しなければ空リストを返す."""
-    if not HISTORY_FILE.exists():
-        return []
-    try:
-        data = json.loads(HISTORY_FILE.read_text(encoding="utf-8"))
-        return data if isinstance(data, list) else []
-    except (json.JSONDecodeError, OSError) as e:
-        logger.warning("履歴ファイル読み込み失敗: %s", e)
-        return []
 
+class HistoryStore:
+    """SQLite に保存された配信履歴.
 
-def get_past_names(history: list[dict]) -> list[str]:
-    """保持期間内の過去トレンド名（英語・日本語両方）のリストを返す."""
-    cutoff = datetime.now(JST) - timedelta(days=RETENTION_DAYS)
-    names = []
-    for entry in history:
-        sent_at = entry.get("sent_at", "")
-        if sent_at:
-            try:
-                entry_date = datetime.fromisoformat(sent_at)
-                if entry_date < cutoff:
-                    continue
-            except ValueError:
-                pass
-        if entry.get("name_en"):
-            names.append(entry["name_en"])
-        if entry.get("name_ja"):
-            names.append(entry["name_ja"])
-    return names
-
-
-def save(history: list[dict], new_trends: list[dict]) -> None:
-    """新しいトレンドを履歴に追加して保存する.
-
-    新旧両方の形式に対応:
-    - 旧: product_name_en / product_name_ja
-    - 新: name_en / name_ja
+    sent_at は JST の ISO 形式で統一して保存するため、文字列比較で期間を絞れる。
     """
-    now = datetime.now(JST).isoformat()
-    for t in new_trends:
-        name_en = t.get("name_en") or t.get("product_name_en", "")
-        name_ja = t.get("name_ja") or t.get("product_name_ja", "")
-        history.append({
-            "name_en": name_en,
-            "name_ja": name_ja,
-            "sent_at": now,
-        })
-
-    # 保持期間を過ぎたエントリーを削除
-    cutoff = datetime.now(JST) - timedelta(days=RETENTION_DAYS)
-    history = [
-        e for e in history
-        if not e.get("sent_at") or _parse_date(e["sent_at"]) >= cutoff
-    ]
-
-    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
-    HISTORY_FILE.write_text(
-        json.dumps(history, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
-    logger.info("履歴を更新: %d 件（新規 %d 件追加）", len(history), len(new_trends))
-
-
-def _parse_date(s: str) -> datetime:
-    """ISO形式の日時文字列をパース。失敗時は遠い過去を返す."""
+
+    def __init__(self, path: Path = HISTORY_DB):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not path.exists()
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        if is_new and HISTORY_FILE.exists():
+            self.migrate_from_json(HISTORY_FILE)
+
+    def close(self) -> None:
+        """WAL をチェックポイントして接続を閉じる（コミット対象を .db 1ファイルにする）."""
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def migrate_from_json(self, json_path: Path) -> int:
+        """旧形式の履歴 JSON を取り込む。取り込んだエントリー数を返す."""
+        try:
+            entries = json.loads(json_path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning("履歴JSONの移行失敗: %s", e)
+            return 0
+        if not isinstance(entries, list):
+            return 0
+
+        rows = []
+        for e in entries:
+            sent_at = _to_jst_iso(e.get("sent_at", ""))
+            rows.extend(_rows_for(e.get("name_en", ""), e.get("name_ja", ""), sent_at))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO history (name, name_norm, lang, sent_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        logger.info("履歴JSONを SQLite に移行: %d 件", len(entries))
+        return len(entries)
+
+    def past_names(self, days: int = RETENTION_DAYS) -> list[str]:
+        """保持期間内の過去トレンド名（英語・日本語両方）を返す."""
+        cutoff = (datetime.now(JST) - timedelta(days=days)).isoformat()
+        cur = self._conn.execute(
+            "SELECT name FROM history WHERE sent_at >= ? ORDER BY id", (cutoff,)
+        )
+        return [row[0] for row in cur]
+
+    def add(self, new_trends: list[dict]) -> None:
+        """新しいトレンドを追加し、保持期間を過ぎたエントリーを削除する.
+
+        新旧両方の形式に対応:
+        - 旧: product_name_en / product_name_ja
+        - 新: name_en / name_ja
+        """
+        now = datetime.now(JST).isoformat()
+        rows = []
+        for t in new_trends:
+            name_en = t.get("name_en") or t.get("product_name_en", "")
+            name_ja = t.get("name_ja") or t.get("product_name_ja", "")
+            rows.extend(_rows_for(name_en, name_ja, now))
+
+        cutoff = (datetime.now(JST) - timedelta(days=RETENTION_DAYS)).isoformat()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO history (name, name_norm, lang, sent_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            deleted = self._conn.execute(
+                "DELETE FROM history WHERE sent_at < ?", (cutoff,)
+            ).rowcount
+        logger.info("履歴を更新: 新規 %d 件追加、期限切れ %d 件削除", len(new_trends), deleted)
+
+
+def _rows_for(name_en: str, name_ja: str, sent_at: str) -> list[tuple]:
+    rows = []
+    if name_en:
+        rows.append((name_en, normalize(name_en), "en", sent_at))
+    if name_ja:
+        rows.append((name_ja, normalize(name_ja), "ja", sent_at))
+    return rows
+
+
+def _to_jst_iso(s: str) -> str:
+    """ISO形式の日時文字列を JST に揃える。失敗時は現在時刻（移行直後に消さないため）."""
     try:
-        return datetime.fromisoformat(s)
-    except ValueError:
-        return datetime.min.replace(tzinfo=JST)
+        dt = datetime.fromisoformat(s)
+    except (TypeError, ValueError):
+        return datetime.now(JST).isoformat()
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=JST)
+    return dt.astimezone(JST).isoformat()
+
+
+# ────────────────────────────────────────────
+# 既存の呼び出し側向けの関数
+# ────────────────────────────────────────────
+
+def load() -> HistoryStore:
+    """履歴ストアを開く（初回は history.json から移行）."""
+    return HistoryStore()
+
+
+def get_past_names(history: HistoryStore) -> list[str]:
+    """保持期間内の過去トレンド名（英語・日本語両方）のリストを返す."""
+    return history.past_names()
+
+
+def save(history: HistoryStore, new_trends: list[dict]) -> None:
+    """新しいトレンドを履歴に追加して保存する."""
+    history.add(new_trends)
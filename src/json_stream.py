@@ -0,0 +1,194 @@
+"""ストリーミング応答用のインクリメンタル JSON パーサー.
+
+Gemini のストリーム出力をチャンク単位で受け取り、ルートオブジェクトの
+トップレベルセクション（"top_trends", "asia_trends" 等）が閉じた時点で
+そのセクションだけをパースして通知する。
+ストリームが途中で切れても、完了済みのセクションはすべて残る。
+"""
+
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONParser:
+    """トップレベルのセクション単位で JSON を組み立てるパーサー.
+
+    文字列リテラル（エスケープ含む）の内外を追跡するため、
+    見出し等に含まれる括弧やカンマで誤動作しない。
+
+    Args:
+        on_section: セクション完了時に (key, value) で呼ばれるコールバック
+    """
+
+    def __init__(self, on_section=None):
+        self.sections: dict = {}
+        self.complete = False
+        self._on_section = on_section
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start: int | None = None
+
+    @property
+    def text(self) -> str:
+        """これまでに受け取った全テキスト."""
+        return self._text
+
+    def feed(self, chunk: str) -> None:
+        """チャンクを追加し、新たに閉じたセクションを確定する."""
+        if not chunk:
+            return
+        self._text += chunk
+        text = self._text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 1 and ch == "{":
+                    self._member_start = i + 1
+            elif ch in "}]":
+                if self._depth == 1 and self._member_start is not None:
+                    self._emit(text[self._member_start:i])
+                    self._member_start = None
+                    self.complete = True
+                self._depth -= 1
+            elif ch == "," and self._depth == 1 and self._member_start is not None:
+                self._emit(text[self._member_start:i])
+                self._member_start = i + 1
+        self._pos = len(text)
+
+    def _emit(self, member: str) -> None:
+        """`"key": value` 形式のメンバー文字列をパースして登録する."""
+        member = member.strip()
+        if not member:
+            return
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            logger.debug("セクションのパース失敗: %s", member[:80])
+            return
+
+        for key, value in parsed.items():
+            self.sections[key] = value
+            if self._on_section:
+                try:
+                    self._on_section(key, value)
+                except Exception as e:
+                    logger.warning("セクション通知の処理に失敗 (%s): %s", key, e)
+
+
+# ────────────────────────────────────────────
+# 途中切れ JSON の修復
+# ────────────────────────────────────────────
+
+_CLOSERS = {"{": "}", "[": "]"}
+_PRIMITIVE_START = set("-0123456789tfn")
+_WHITESPACE = set(" \t\r\n")
+
+
+def repair_json(text: str) -> str | None:
+    """途中で切れた JSON を、最も深い妥当な位置で閉じた文字列にして返す.
+
+    字句状態（文字列内か・エスケープ中か・開いているコンテナのスタック）を
+    1パスで追跡し、最後に値が完結した位置で切って残りのコンテナを閉じる。
+    書きかけの文字列・数値・キーは捨てる。修復できなければ None。
+    """
+    start = next((i for i, ch in enumerate(text) if ch in "{["), None)
+    if start is None:
+        return None
+
+    # 各要素は [開き括弧, 状態]。状態は object: key/colon/value/after, array: value/after
+    stack: list[list[str]] = []
+    in_string = False
+    escape = False
+    string_is_key = False
+    prim_start: int | None = None
+    safe_end: int | None = None
+    safe_closers = ""
+
+    def mark_safe(end: int) -> None:
+        nonlocal safe_end, safe_closers
+        safe_end = end
+        safe_closers = "".join(_CLOSERS[c] for c, _ in reversed(stack))
+
+    def value_done(end: int) -> None:
+        stack[-1][1] = "after"
+        mark_safe(end)
+
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if string_is_key:
+                    stack[-1][1] = "colon"
+                else:
+                    value_done(i + 1)
+            continue
+
+        if prim_start is not None:
+            if ch not in _WHITESPACE and ch not in ",]}":
+                continue
+            prim_start = None
+            value_done(i)
+
+        if ch in _WHITESPACE:
+            continue
+
+        state = stack[-1][1] if stack else "value"
+        if ch == '"':
+            if state not in ("key", "value"):
+                break
+            in_string = True
+            string_is_key = state == "key"
+        elif ch in "{[":
+            if state != "value":
+                break
+            stack.append([ch, "key" if ch == "{" else "value"])
+            if len(stack) == 1:
+                # 空のコンテナは中身が1つ完結するまで採用しない（ルートのみ例外）
+                mark_safe(i + 1)
+        elif ch in "}]":
+            if not stack or _CLOSERS[stack[-1][0]] != ch:
+                break
+            if state not in ("after", "key" if ch == "}" else "value"):
+                break
+            stack.pop()
+            if not stack:
+                return text[start:i + 1]
+            value_done(i + 1)
+        elif ch == ":":
+            if state != "colon":
+                break
+            stack[-1][1] = "value"
+        elif ch == ",":
+            if state != "after":
+                break
+            stack[-1][1] = "key" if stack[-1][0] == "{" else "value"
+        elif ch in _PRIMITIVE_START and state == "value" and stack:
+            prim_start = i
+        else:
+            break
+
+    if safe_end is None:
+        return None
+    return text[start:safe_end] + safe_closers
@@ -33,6 +33,35 @@ PLATFORM_SEARCH_URLS = {
 # ハッシュタグや引用符で囲まれたキーワードを抽出するパターン
 HASHTAG_PATTERN = re.compile(r"#(\S+)")
 KEYWORD_PATTERN = re.compile(r"[「『](.+?)[」』]")
+URL_PATTERN = re.compile(r'https?://[^\s<>"]+')
+
+
+def _platform_alternative(name: str) -> str:
+    """プラットフォーム名の正規表現。英字名は前後が英字でないときだけ一致させる（"x" 対策）."""
+    escaped = re.escape(name)
+    if name.isascii():
+        return rf"(?<![a-z]){escaped}(?![a-z])"
+    return escaped
+
+
+# 全プラットフォーム名を1つの選択肢パターンにまとめる（長い名前を優先）
+PLATFORM_PATTERN = re.compile(
+    "|".join(
+        _platform_alternative(name)
+        for name in sorted(PLATFORM_SEARCH_URLS, key=len, reverse=True)
+    ),
+    re.IGNORECASE,
+)
+# 複数のプラットフォーム名を含む場合は PLATFORM_SEARCH_URLS の定義順で優先する
+_PLATFORM_PRIORITY = {name: i for i, name in enumerate(PLATFORM_SEARCH_URLS)}
+
+
+def _detect_platform(text: str) -> str | None:
+    """参照テキストからプラットフォーム名を検出する."""
+    found = {m.group(0).lower() for m in PLATFORM_PATTERN.finditer(text)}
+    if not found:
+        return None
+    return min(found, key=lambda name: _PLATFORM_PRIORITY.get(name, len(_PLATFORM_PRIORITY)))
 
 
 def _extract_keyword(text: str) -> str:
@@ -47,28 +76,18 @@ def _extract_keyword(text: str) -> str:
     if match:
         return match.group(1)
 
-    # プラットフォーム名を除去した残りをキーワードにする
-    keyword = text
-    for platform in PLATFORM_SEARCH_URLS:
-        keyword = keyword.replace(platform, "").strip()
-
-    # 先頭の記号や空白を除去
-    keyword = keyword.strip(" 　・:：-—")
+    # プラットフォーム名を除去し、先頭の記号や空白を除去した残りをキーワードにする
+    keyword = PLATFORM_PATTERN.sub("", text).strip(" 　・:：-—")
 
     return keyword if keyword else text
 
 
-def _detect_platform(text: str) -> str | None:
-    """参照テキストからプラットフォーム名を検出する."""
-    text_lower = text.lower()
-    for platform in PLATFORM_SEARCH_URLS:
-        if platform.lower() in text_lower:
-            return platform
-    return None
-
-
 def _generate_search_url(text: str) -> str:
-    """参照テキストからプラットフォーム検索URLを生成する."""
+    """参照テキストからプラットフォーム検索URLを生成する（テキストにURLがあればそれを使う）."""
+    match = URL_PATTERN.search(text)
+    if match:
+        return match.group(0)
+
     platform = _detect_platform(text)
     if not platform:
         return ""
@@ -77,8 +96,7 @@ def _generate_search_url(text: str) -> str:
     if not keyword:
         return ""
 
-    template = PLATFORM_SEARCH_URLS[platform.lower() if platform.lower() in PLATFORM_SEARCH_URLS else platform]
-    return template.format(keyword=quote(keyword, safe=""))
+    return PLATFORM_SEARCH_URLS[platform].format(keyword=quote(keyword, safe=""))
 
 
 def _enrich_ref(ref) -> dict:
@@ -102,54 +120,52 @@ def _enrich_ref(ref) -> dict:
     return {"text": str(ref), "url": ""}
 
 
-def _enrich_refs_in_list(refs: list) -> list[dict]:
-    """参照リスト内の各参照を正規化・URL補完する."""
-    return [_enrich_ref(ref) for ref in refs]
-
-
-def enrich_references(analysis: dict) -> dict:
-    """分析結果全体の references を URL 補完する.
+def normalize_references(analysis) -> list[dict]:
+    """分析結果を1回だけ走査し、全 references を正規化・URL補完する.
 
     日報・週報どちらの形式にも対応。
-    references フィールドを再帰的に探索して補完する。
+    走査中に集計も済ませ、references / reference_urls を持つ辞書のリストを返す
+    （url_validator.validate_references に渡せば再走査が不要）。
     """
-    if not analysis:
-        return analysis
-
-    _walk_and_enrich(analysis)
-
-    enriched = sum(
-        1 for ref in _collect_all_refs(analysis)
-        if ref.get("url")
+    holders: list[dict] = []
+    stats = {"total": 0, "with_url": 0, "generated": 0}
+    _walk_and_enrich(analysis, holders, stats)
+    logger.info(
+        "参照リンク補完完了: %d/%d 件にURLあり（検索URL生成 %d 件）",
+        stats["with_url"], stats["total"], stats["generated"],
     )
-    total = len(_collect_all_refs(analysis))
-    logger.info("参照リンク補完完了: %d/%d 件にURLあり", enriched, total)
-
-    return analysis
+    return holders
 
 
-def _walk_and_enrich(obj):
-    """辞書・リストを再帰的に走査し、references フィールドを補完する."""
-    if isinstance(obj, dict):
-        if "references" in obj and isinstance(obj["references"], list):
-            obj["references"] = _enrich_refs_in_list(obj["references"])
-        for value in obj.values():
-            _walk_and_enrich(value)
-    elif isinstance(obj, list):
-        for item in obj:
-            _walk_and_enrich(item)
+def enrich_references(analysis: dict) -> dict:
+    """分析結果全体の references を URL 補完する."""
+    if not analysis:
+        return analysis
+    normalize_references(analysis)
+    return analysis
 
 
-def _collect_all_refs(obj, collected=None) -> list[dict]:
-    """全 references を収集する（統計用）."""
-    if collected is None:
-        collected = []
+def _walk_and_enrich(obj, holders: list[dict], stats: dict) -> None:
+    """辞書・リストを再帰的に走査し、references フィールドを補完・集計する."""
     if isinstance(obj, dict):
-        if "references" in obj and isinstance(obj["references"], list):
-            collected.extend(obj["references"])
-        for value in obj.values():
-            _collect_all_refs(value, collected)
+        refs = obj.get("references")
+        if isinstance(refs, list):
+            enriched = []
+            for ref in refs:
+                had_url = isinstance(ref, dict) and bool(ref.get("url"))
+                ref = _enrich_ref(ref)
+                if ref["url"]:
+                    stats["with_url"] += 1
+                    if not had_url:
+                        stats["generated"] += 1
+                enriched.append(ref)
+            obj["references"] = enriched
+            stats["total"] += len(enriched)
+        if isinstance(refs, list) or isinstance(obj.get("reference_urls"), list):
+            holders.append(obj)
+        for key, value in obj.items():
+            if key != "references":
+                _walk_and_enrich(value, holders, stats)
     elif isinstance(obj, list):
         for item in obj:
-            _collect_all_refs(item, collected)
-    return collected
+            _walk_and_enrich(item, holders, stats)
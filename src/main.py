@@ -3,10 +3,15 @@
 モード:
   daily  — 日報（毎朝8時配信）: 全ソースからデータ収集→Gemini分析→レポート生成→配信
   weekly — 週報（毎週日曜20時配信）: 1週間分のデータ集約→Gemini分析→ダイジェスト生成→配信
+
+配信は outbox に記録してから行い、失敗した配信先だけを次回の実行か
+--flush-outbox で送り直す（収集・分析はやり直さない）。
 """
 
 import argparse
+import copy
 import logging
+import os
 import sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone, timedelta
@@ -21,17 +26,24 @@ from collectors import (
     x_twitter, xiaohongshu, douyin, weibo, naver, ptt, asia_media_rss,
 )
 from analyzer import analyze_daily, analyze_weekly
+from report_document import build_daily, build_weekly
+from schemas import validate_top_trends
 from report_generator import format_daily_report, format_weekly_report
 from notifier import send
 from history import load as load_history, get_past_names, save as save_history
+from trend_index import PastTrendIndex
+from trend_store import TrendStore
 from weekly_aggregator import (
-    save_daily_analysis, load_weekly_data, get_week_info, cleanup_old_reports,
+    save_daily_analysis, load_weekly_data, load_weekly_rollup, get_week_info,
+    cleanup_old_reports,
 )
-from url_validator import validate_trends
-from link_generator import enrich_references
+from url_validator import validate_references, validate_trends
+from link_generator import enrich_references, normalize_references
 from notion_writer import save_to_notion
+from outbox import deliver, enqueue, flush, outbox_status, pending_runs
 from podcast_prep import generate_podcast_text, save_podcast_source
-from podcast_page import run as run_podcast_page
+from podcast_page import run_from_analysis as run_podcast_page
+import gemini_cache
 
 logging.basicConfig(
     level=logging.INFO,
@@ -86,9 +98,10 @@ def collect_all() -> dict:
     return collected
 
 
-def run_daily():
+def run_daily(analysis_mode: str = "single"):
     """日報モード: データ収集→分析→レポート生成→配信."""
     logger.info("=== 日報モード 開始 ===")
+    _flush_previous_outbox()
 
     # Step 1: データ収集
     collected = collect_all()
@@ -97,85 +110,126 @@ def run_daily():
         logger.error("データ収集結果が0件。全コレクターが失敗しました。")
         sys.exit(1)
 
-    # Step 2: 過去の配信履歴を読み込み
+    # Step 2: 過去の配信履歴を読み込み、今日の収集データに出てくる既出トレンドだけを抽出
     history = load_history()
-    past_names = get_past_names(history)
+    past_index = PastTrendIndex(get_past_names(history))
+    past_names = past_index.tag_collected(collected)
     if past_names:
         logger.info("過去の配信済みトレンド: %d 件を除外対象に設定", len(past_names))
 
     # Step 3: Gemini分析（構造化レポート）
+    # ストリーミング中に top_trends が確定したら、リンク補完とURL検証を先行して始める
     logger.info("Gemini日報分析を開始...")
-    analysis = analyze_daily(collected, past_trend_names=past_names)
+    early_pool = ThreadPoolExecutor(max_workers=1)
+    early_futures = {}
+
+    def on_section(key, value):
+        if key == "top_trends" and isinstance(value, list) and key not in early_futures:
+            # 最終結果と同じスキーマ補正（rank の数値化等）を通してから先行検証する
+            trends = validate_top_trends(copy.deepcopy(value))
+            early_futures[key] = early_pool.submit(_prevalidate_trends, trends)
+
+    analysis = analyze_daily(
+        collected, past_trend_names=past_names, mode=analysis_mode, on_section=on_section,
+    )
     if not analysis:
+        early_pool.shutdown(wait=False, cancel_futures=True)
         logger.error("Gemini分析が結果を返しませんでした。")
         sys.exit(1)
     logger.info("日報分析完了")
 
-    # Step 4: 参照リンクの補完（URLが空の参照に検索URLを自動生成）
-    logger.info("参照リンクを補完中...")
-    analysis = enrich_references(analysis)
+    # 表記ゆれで再選出された既出トレンドを除外
+    if analysis.get("top_trends"):
+        analysis["top_trends"] = past_index.drop_repeats(analysis["top_trends"])
 
-    # Step 5: 参照URLの検証（トレンドTOP3のみ）
+    # Step 4: 先行検証の結果があれば top_trends を差し替える
     top_trends = analysis.get("top_trends", [])
-    if top_trends:
-        logger.info("参照URLを検証中...")
-        analysis["top_trends"] = validate_trends(top_trends)
+    if top_trends and "top_trends" in early_futures:
+        validated = None
+        try:
+            validated = early_futures["top_trends"].result()
+        except Exception as e:
+            logger.warning("先行URL検証に失敗: %s", e)
+        if validated is not None and _trend_names(validated) == _trend_names(top_trends):
+            logger.info("参照URL検証: ストリーミング中の先行検証結果を使用")
+            analysis["top_trends"] = validated
+
+    # Step 5: 参照リンクの補完（URLが空の参照に検索URLを自動生成）と全セクションのURL検証
+    # 補完時の1回の走査で集めた参照リストを検証にそのまま渡す。
+    # 先行検証済みのURLはキャッシュに載っているため、ここでは残りのURLだけを確認する
+    logger.info("参照リンクを補完中...")
+    ref_holders = normalize_references(analysis)
+    logger.info("参照URLを検証中...")
+    analysis = validate_references(analysis, ref_holders)
+    top_trends = analysis.get("top_trends", [])
+    early_pool.shutdown()
 
-    # Step 6: 日報データを保存（週報用）
+    # Step 6: 日報データを保存（週報用）・トレンド時系列を更新
+    # 同日の再実行で top_trends が空になった場合も前回分を消すため常に記録する
     save_daily_analysis(analysis)
+    with TrendStore() as trend_store:
+        trend_store.record_day(datetime.now(timezone(timedelta(hours=9))).strftime("%Y-%m-%d"), top_trends)
 
-    # Step 7: レポートテキストを生成
-    report_text = format_daily_report(analysis)
+    # Step 7: レポートテキストを生成（LINE・Notion・ポッドキャストで同じドキュメントを描画）
+    document = build_daily(analysis)
+    report_text = format_daily_report(analysis, document)
     logger.info("日報レポート生成完了（%d 文字）", len(report_text))
 
-    # Step 8: LINE配信
-    logger.info("LINE配信を開始...")
-    success = send(report_text)
-    if not success:
-        logger.error("配信に失敗しました。")
-        sys.exit(1)
-
-    # Step 9: Notion データベースに保存
-    logger.info("Notion に保存中...")
-    notion_url = save_to_notion(analysis, "daily")
-    if notion_url:
-        logger.info("Notion 保存完了: %s", notion_url)
-
-    # Step 10: NotebookLM 用テキスト生成
+    # Step 8: 配信先ごとの送信内容をアウトボックスに記録して配信（LINE・Notion・画像ページ）
+    # 失敗した配信先は記録に残り、次回の実行か --flush-outbox で送り直す
     now = datetime.now(timezone(timedelta(hours=9)))
-    podcast_text = generate_podcast_text(analysis, "daily")
-    save_podcast_source(podcast_text, now.strftime("%Y-%m-%d"))
+    date_str = now.strftime("%Y-%m-%d")
+    run_id = f"daily-{date_str}"
+    payloads = {"line": {"text": report_text}}
+    if _notion_configured():
+        payloads["notion"] = {
+            "analysis": analysis, "report_type": "daily", "document": document,
+            "reported_at": now.isoformat(),
+        }
+    payloads["podcast_page"] = {"analysis": analysis, "date": date_str, "document": document}
+    enqueue(run_id, payloads)
+    logger.info("配信を開始...")
+    deliver(run_id, _delivery_handlers())
+
+    # Step 9: NotebookLM 用テキスト生成
+    podcast_text = generate_podcast_text(analysis, "daily", document)
+    save_podcast_source(podcast_text, date_str)
 
-    # Step 11: 配信履歴を更新
+    # Step 10: 配信履歴を更新
     if top_trends:
         save_history(history, top_trends)
+    history.close()
 
-    # Step 12: ポッドキャスト画像ページ生成
-    logger.info("ポッドキャスト画像ページを生成中...")
-    try:
-        page_path = run_podcast_page(now.strftime("%Y-%m-%d"))
-        if page_path:
-            logger.info("ポッドキャスト画像ページ生成完了: %s", page_path)
-    except Exception as e:
-        logger.warning("ポッドキャスト画像ページ生成失敗（続行）: %s", e)
-
-    # Step 13: 古いデータのクリーンアップ
+    # Step 11: 古いデータのクリーンアップ
     cleanup_old_reports()
 
+    _log_run_metrics()
+    _exit_if_undelivered(run_id)
     logger.info("=== 日報モード 完了 ===")
 
 
+def _prevalidate_trends(trends: list[dict]) -> list[dict]:
+    """ストリーミング中に確定した top_trends のリンク補完・URL検証を行う."""
+    return validate_trends(trends, normalize_references(trends))
+
+
+def _trend_names(trends: list[dict]) -> list[str]:
+    return [t.get("name_en", "") for t in trends]
+
+
 def run_weekly():
     """週報モード: 週間データ集約→分析→ダイジェスト生成→配信."""
     logger.info("=== 週報モード 開始 ===")
+    _flush_previous_outbox()
 
-    # Step 1: 1週間分のデータを読み込み
-    weekly_data = load_weekly_data()
+    # Step 1: 1週間分のデータを読み込み（週次ロールアップがなければ日報7日分）
+    weekly_data = load_weekly_rollup() or load_weekly_data()
     if not weekly_data:
         logger.error("週報用のデータがありません。日報が正常に動作しているか確認してください。")
         sys.exit(1)
 
-    logger.info("週報分析開始: %d 日分のデータ", len(weekly_data))
+    days = len(weekly_data["days"]) if isinstance(weekly_data, dict) else len(weekly_data)
+    logger.info("週報分析開始: %d 日分のデータ", days)
 
     # Step 2: Gemini週報分析
     analysis = analyze_weekly(weekly_data)
@@ -192,28 +246,95 @@ def run_weekly():
     week_number, date_range = get_week_info()
 
     # Step 5: レポートテキストを生成
-    report_text = format_weekly_report(analysis, week_number, date_range)
+    document = build_weekly(analysis)
+    report_text = format_weekly_report(analysis, week_number, date_range, document)
     logger.info("週報レポート生成完了（%d 文字）", len(report_text))
 
-    # Step 6: LINE配信
-    logger.info("LINE配信を開始...")
-    success = send(report_text)
-    if not success:
-        logger.error("週報配信に失敗しました。")
-        sys.exit(1)
+    # Step 6: 配信先ごとの送信内容をアウトボックスに記録して配信（LINE・Notion）
+    now = datetime.now(timezone(timedelta(hours=9)))
+    run_id = f"weekly-{now.strftime('%Y-%m-%d')}"
+    payloads = {"line": {"text": report_text}}
+    if _notion_configured():
+        payloads["notion"] = {
+            "analysis": analysis, "report_type": "weekly", "document": document,
+            "reported_at": now.isoformat(),
+        }
+    enqueue(run_id, payloads)
+    logger.info("配信を開始...")
+    deliver(run_id, _delivery_handlers())
+
+    # Step 7: NotebookLM 用テキスト生成
+    podcast_text = generate_podcast_text(analysis, "weekly", document)
+    save_podcast_source(podcast_text, f"{now.strftime('%Y-%m-%d')}_weekly")
+
+    _log_run_metrics()
+    _exit_if_undelivered(run_id)
+    logger.info("=== 週報モード 完了 ===")
+
+
+# ────────────────────────────────────────────
+# 配信（アウトボックス）
+# ────────────────────────────────────────────
+
+def _notion_configured() -> bool:
+    return bool(os.environ.get("NOTION_TOKEN") and os.environ.get("NOTION_DATABASE_ID"))
+
 
-    # Step 7: Notion データベースに保存
-    logger.info("Notion に保存中...")
-    notion_url = save_to_notion(analysis, "weekly")
+def _delivery_handlers() -> dict:
+    """アウトボックスの配信先ごとの送信処理（成功なら True）."""
+    return {
+        "line": lambda payload: send(payload["text"]),
+        "notion": _deliver_notion,
+        "podcast_page": _deliver_podcast_page,
+    }
+
+
+def _deliver_notion(payload: dict) -> bool:
+    notion_url = save_to_notion(
+        payload["analysis"], payload["report_type"], payload["document"],
+        datetime.fromisoformat(payload["reported_at"]),
+    )
     if notion_url:
         logger.info("Notion 保存完了: %s", notion_url)
+    return notion_url is not None
 
-    # Step 8: NotebookLM 用テキスト生成
-    now = datetime.now(timezone(timedelta(hours=9)))
-    podcast_text = generate_podcast_text(analysis, "weekly")
-    save_podcast_source(podcast_text, f"{now.strftime('%Y-%m-%d')}_weekly")
 
-    logger.info("=== 週報モード 完了 ===")
+def _deliver_podcast_page(payload: dict) -> bool:
+    # キーワードがなくページを作らなかった日も、送り直す必要はないので成功扱い
+    page_path = run_podcast_page(payload["analysis"], payload["date"], payload["document"])
+    if page_path:
+        logger.info("ポッドキャスト画像ページ生成完了: %s", page_path)
+    return True
+
+
+def _flush_previous_outbox() -> None:
+    """前回までの実行で送り残した配信先があれば先に送り直す."""
+    runs = pending_runs()
+    if runs:
+        logger.info("前回までの送り残しを再送: %s", ", ".join(runs))
+        flush(_delivery_handlers())
+
+
+def _log_run_metrics():
+    """実行メトリクスをログに出力."""
+    cache_stats = gemini_cache.stats()
+    logger.info(
+        "実行メトリクス — Geminiキャッシュ: ヒット %d / ミス %d",
+        cache_stats["hits"], cache_stats["misses"],
+    )
+
+
+def _exit_if_undelivered(run_id: str) -> None:
+    """LINE 配信が完了していなければ異常終了する（他の配信先の失敗はログのみ）."""
+    status = outbox_status(run_id)
+    if any(state != "done" for state in status.values()):
+        logger.error(
+            "送り残しがあります（%s）。python src/main.py --flush-outbox で再送できます",
+            ", ".join(f"{sink}: {state}" for sink, state in status.items() if state != "done"),
+        )
+    if status.get("line") != "done":
+        logger.error("LINE 配信に失敗しました。")
+        sys.exit(1)
 
 
 def main():
@@ -224,12 +345,28 @@ def main():
         default="daily",
         help="実行モード: daily（日報）or weekly（週報）",
     )
+    parser.add_argument(
+        "--analysis",
+        choices=["single", "mapreduce"],
+        default="single",
+        help="日報の分析方式: single（一括生成）or mapreduce（スライス並列分析）",
+    )
+    parser.add_argument(
+        "--flush-outbox",
+        action="store_true",
+        help="収集・分析は行わず、アウトボックスの送り残しだけを再送する",
+    )
     args = parser.parse_args()
 
+    if args.flush_outbox:
+        logger.info("=== アウトボックス再送 開始 ===")
+        ok = flush(_delivery_handlers())
+        logger.info("=== アウトボックス再送 %s ===", "完了" if ok else "送り残しあり")
+        sys.exit(0 if ok else 1)
     if args.mode == "weekly":
         run_weekly()
     else:
-        run_daily()
+        run_daily(analysis_mode=args.analysis)
 
 
 if __name__ == "__main__":
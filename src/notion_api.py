@@ -0,0 +1,256 @@
+"""Notion API の共通 HTTP トランスポート.
+
+notion_writer（ページ作成）と podcast_page（ページ取得）が同じクライアントを使う。
+
+- httpx.Client を1つ使い回し、接続をキープアライブで再利用する
+- Notion のレート制限（平均 3 リクエスト/秒）に合わせたトークンバケットで送信間隔を揃える
+- 429 は指数バックオフで再試行し、Retry-After があればその秒数を待つ。
+  429 の待機はバケット全体に反映するため、他スレッドの送信も一緒に止まる
+- 5xx・送信後の通信エラーは冪等なリクエスト（GET / DELETE と、データベース検索・
+  プロパティ更新のように呼び出し側が idempotent=True を付けたもの）だけ再試行する。
+  作成・追記は重複しうるため呼び出し側に失敗を返す（接続自体に失敗した場合は
+  どのリクエストも再試行する）
+
+接続先は base_url（環境変数 NOTION_API_BASE）で差し替えられるので、
+ローカルのスタブサーバーに向けて動作を確認できる。
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+NOTION_API_BASE = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+TIMEOUT = 30
+
+# トークンバケット（1秒あたりの補充数・最大バースト）
+RATE_PER_SECOND = 3.0
+BURST = 3
+# 再試行（回数・バックオフの初期値と上限（秒））
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+# 5xx や送信後の通信エラーでも再試行してよいメソッド（request の idempotent 省略時）。
+# POST（ページ作成）と PATCH（ブロック追加）は Notion 側で処理済みの場合に
+# 重複するため、429（未処理が保証される）と接続前の失敗だけを再試行する
+_IDEMPOTENT_METHODS = {"GET", "DELETE"}
+
+
+class NotionAPIError(Exception):
+    """Notion API がエラーを返した（再試行しても解消しなかった）."""
+
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(f"{status} {code}: {message}")
+        self.status = status
+        self.code = code
+
+
+class TokenBucket:
+    """スレッド間で共有するトークンバケット."""
+
+    def __init__(self, rate: float, capacity: int):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """トークンを1つ取る。足りなければ補充されるまで待つ."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self._rate)
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """seconds 秒間、全員の送信を止める（Retry-After 用）."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class NotionClient:
+    """Notion API クライアント（キープアライブ + レート制限 + 再試行）."""
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = NOTION_API_BASE,
+        bucket: TokenBucket | None = None,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self._http = httpx.Client(
+            base_url=base_url.rstrip("/") + "/",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Notion-Version": NOTION_VERSION,
+                "Content-Type": "application/json",
+            },
+            timeout=TIMEOUT,
+        )
+        self._bucket = bucket or TokenBucket(RATE_PER_SECOND, BURST)
+        self._max_retries = max_retries
+        # 送信したリクエスト数（再試行を含む）
+        self.calls = 0
+
+    def close(self) -> None:
+        self._http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: dict | None = None,
+        params: dict | None = None,
+        idempotent: bool | None = None,
+    ) -> dict:
+        """1リクエストを送り、JSON を返す。再試行しても失敗すれば NotionAPIError.
+
+        idempotent: 5xx・送信後の通信エラーでも再試行してよいか（省略時はメソッドで判断）
+        """
+        if idempotent is None:
+            idempotent = method in _IDEMPOTENT_METHODS
+        for attempt in range(self._max_retries + 1):
+            self._bucket.acquire()
+            self.calls += 1
+            try:
+                resp = self._http.request(method, path.lstrip("/"), json=body, params=params)
+            except httpx.TransportError as e:
+                # 送信後の失敗（読み込みタイムアウト等）は書き込みが通っている可能性があるため、
+                # 冪等でないメソッドは接続前の失敗だけを再試行する
+                sent = not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                if attempt >= self._max_retries or (sent and not idempotent):
+                    raise NotionAPIError(0, "transport_error", str(e)) from e
+                wait = _backoff(attempt)
+                logger.warning("Notion API 通信エラー、%.1f 秒後に再試行: %s", wait, e)
+                time.sleep(wait)
+                continue
+
+            if resp.status_code < 400:
+                return resp.json()
+
+            retryable = resp.status_code == 429 or (
+                resp.status_code in _RETRY_STATUSES and idempotent
+            )
+            if retryable and attempt < self._max_retries:
+                wait = _retry_after(resp) or _backoff(attempt)
+                if resp.status_code == 429:
+                    self._bucket.pause(wait)
+                else:
+                    time.sleep(wait)
+                logger.warning(
+                    "Notion API %d (%s %s)、%.1f 秒後に再試行",
+                    resp.status_code, method, path, wait,
+                )
+                continue
+
+            try:
+                error = resp.json()
+            except ValueError:
+                error = {}
+            raise NotionAPIError(
+                resp.status_code, error.get("code", ""), error.get("message", resp.text[:200])
+            )
+        raise AssertionError("unreachable")
+
+    # ── エンドポイント ──
+
+    def create_page(self, parent: dict, properties: dict, children: list[dict]) -> dict:
+        return self.request("POST", "pages", {
+            "parent": parent, "properties": properties, "children": children,
+        })
+
+    def update_page(self, page_id: str, **fields) -> dict:
+        """ページのプロパティ等を更新する（properties=... / archived=True 等）.
+
+        同じ値での上書きなので、何度送っても結果は変わらない。
+        """
+        return self.request("PATCH", f"pages/{page_id}", fields, idempotent=True)
+
+    def append_children(
+        self, block_id: str, children: list[dict], after: str | None = None,
+    ) -> dict:
+        """子ブロックを追加する。after を指定するとそのブロックの直後に挿入する."""
+        body = {"children": children}
+        if after:
+            body["after"] = after
+        return self.request("PATCH", f"blocks/{block_id}/children", body)
+
+    def delete_block(self, block_id: str) -> dict:
+        return self.request("DELETE", f"blocks/{block_id}")
+
+    def query_database(self, database_id: str, body: dict) -> dict:
+        # 読み取りのみ（POST なのは検索条件を本文で渡すため）
+        return self.request(
+            "POST", f"databases/{format_database_id(database_id)}/query", body, idempotent=True,
+        )
+
+    def list_children(self, block_id: str) -> list[dict]:
+        """ブロックの子をページネーションしながら全件取得する."""
+        blocks = []
+        params = {"page_size": 100}
+        while True:
+            resp = self.request("GET", f"blocks/{block_id}/children", params=params, idempotent=True)
+            blocks.extend(resp.get("results", []))
+            if not resp.get("has_more"):
+                return blocks
+            params["start_cursor"] = resp.get("next_cursor")
+
+
+def _retry_after(resp: httpx.Response) -> float | None:
+    value = resp.headers.get("Retry-After")
+    try:
+        return min(float(value), BACKOFF_MAX) if value else None
+    except ValueError:
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def format_database_id(db_id: str) -> str:
+    """ハイフンなし32文字ならUUID形式に変換."""
+    if len(db_id) == 32 and "-" not in db_id:
+        return f"{db_id[:8]}-{db_id[8:12]}-{db_id[12:16]}-{db_id[16:20]}-{db_id[20:]}"
+    return db_id
+
+
+_client: NotionClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> NotionClient | None:
+    """プロセス内で共有するクライアントを返す。NOTION_TOKEN が未設定なら None."""
+    global _client
+    token = os.environ.get("NOTION_TOKEN")
+    if not token:
+        logger.warning("NOTION_TOKEN が未設定")
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = NotionClient(token, os.environ.get("NOTION_API_BASE", NOTION_API_BASE))
+        return _client
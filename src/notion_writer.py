@@ -1,14 +1,26 @@
 """Notion データベースへのレポート蓄積モジュール.
 
 日報/週報の分析結果を Notion データベースにページとして保存する。
-セクションごとに Heading + Paragraph ブロック構造で蓄積し、
+report_document のドキュメントを描画し、セクションごとに Heading + Paragraph ブロック構造で蓄積し、
 参照リンクは Notion のリッチテキストリンクとして表示する。
+ブロックは子ブロックと複数セグメントのリッチテキストでまとめ、
+API の上限（配列 100 要素・1000 ブロック・500KB）内で最少のリクエストに詰めて送る。
+API 呼び出しは notion_api の共有クライアント（レート制限・再試行付き）を使う。
+
+ページは (種別, 日付) ごとに1つで、再実行時は既存ページを更新する。ページIDと
+セクションごとのブロックID・ハッシュは data/notion_pages.json に記録し、
+変わったセクションだけを削除・挿入する。
 """
 
+import hashlib
 import json
 import logging
 import os
 from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+from notion_api import NotionAPIError, get_client
+from report_document import build_document
 
 logger = logging.getLogger(__name__)
 
@@ -18,33 +30,26 @@ JST = timezone(timedelta(hours=9))
 NOTION_TEXT_LIMIT = 2000
 
 
-def _get_client():
-    """Notion クライアントを取得する."""
-    token = os.environ.get("NOTION_TOKEN")
-    if not token:
-        logger.warning("NOTION_TOKEN が未設定のため Notion 保存をスキップ")
-        return None
-
-    try:
-        from notion_client import Client
-        return Client(auth=token)
-    except ImportError:
-        logger.warning("notion-client がインストールされていません")
-        return None
-
-
-def save_to_notion(analysis: dict, report_type: str) -> str | None:
+def save_to_notion(
+    analysis: dict, report_type: str, document: dict | None = None, now: datetime | None = None,
+) -> str | None:
     """分析結果を Notion データベースにページとして保存する.
 
+    同じ日付・種別のページがあれば作り直さずに更新する（再実行しても重複しない）。
+    セクションごとのブロックのハッシュを前回と比べ、変わったセクションだけを書き換える。
+
     Args:
         analysis: Gemini分析結果のdict
         report_type: "daily" or "weekly"
+        document: 組み立て済みのドキュメント（省略時はここで組み立てる）
+        now: レポートの日時（省略時は現在。アウトボックスから後日送り直すときに使う）
 
     Returns:
-        作成したページのURL。失敗時はNone。
+        作成（更新）したページのURL。失敗時はNone。
     """
-    client = _get_client()
+    client = get_client()
     if not client:
+        logger.warning("Notion 保存をスキップ")
         return None
 
     database_id = os.environ.get("NOTION_DATABASE_ID")
@@ -53,37 +58,224 @@ def save_to_notion(analysis: dict, report_type: str) -> str | None:
         return None
 
     try:
-        now = datetime.now(JST)
+        now = now or datetime.now(JST)
+        date_str = now.strftime("%Y-%m-%d")
         title = _build_title(report_type, now)
         properties = _build_properties(title, report_type, analysis, now)
-        children = _build_blocks(analysis, report_type)
+        sections = render_sections(document or build_document(analysis, report_type))
+
+        calls_before = client.calls
+        page_map = _load_page_map()
+        key = _page_key(report_type, date_str)
+        entry = page_map.get(key)
+        try:
+            entry = _upsert_page(client, database_id, report_type, date_str, entry, properties, sections)
+        except NotionAPIError as e:
+            if not entry or e.status not in (400, 404):
+                raise
+            # キャッシュしたページが削除・アーカイブされていた
+            logger.warning("キャッシュした Notion ページが使えないため検索し直します: %s", e)
+            entry = _upsert_page(client, database_id, report_type, date_str, None, properties, sections)
+        entry["title"] = title
+        page_map[key] = entry
+        _save_page_map(page_map)
+
+        logger.info(
+            "Notion ページ保存成功: %s（ブロック %d 件、API 呼び出し %d 回）",
+            entry["url"], sum(_count_blocks(blocks) for _, blocks in sections),
+            client.calls - calls_before,
+        )
+        return entry["url"]
 
-        # Notion API は 1 リクエストあたり最大 100 ブロック
-        # 最初の 100 ブロックはページ作成時に追加
-        first_batch = children[:100]
-        remaining = children[100:]
+    except Exception as e:
+        logger.error("Notion 保存失敗: %s", e)
+        return None
 
-        page = client.pages.create(
-            parent={"database_id": database_id},
-            properties=properties,
-            children=first_batch,
-        )
 
-        page_id = page["id"]
+# ────────────────────────────────────────────
+# ページの作成・更新
+# ────────────────────────────────────────────
 
-        # 残りのブロックを追加
-        while remaining:
-            batch = remaining[:100]
-            remaining = remaining[100:]
-            client.blocks.children.append(block_id=page_id, children=batch)
+# (種別, 日付) → ページID・セクションごとのブロックID とハッシュ
+PAGE_MAP_FILE = Path(__file__).resolve().parent.parent / "data" / "notion_pages.json"
 
-        page_url = page.get("url", "")
-        logger.info("Notion ページ作成成功: %s", page_url)
-        return page_url
 
-    except Exception as e:
-        logger.error("Notion 保存失敗: %s", e)
-        return None
+def _page_key(report_type: str, date_str: str) -> str:
+    return f"{report_type}:{date_str}"
+
+
+def _load_page_map() -> dict:
+    if not PAGE_MAP_FILE.exists():
+        return {}
+    try:
+        return json.loads(PAGE_MAP_FILE.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning("Notion ページ対応表の読み込み失敗: %s", e)
+        return {}
+
+
+def _save_page_map(page_map: dict) -> None:
+    PAGE_MAP_FILE.parent.mkdir(parents=True, exist_ok=True)
+    PAGE_MAP_FILE.write_text(
+        json.dumps(page_map, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8"
+    )
+
+
+def lookup_page(report_type: str, date_str: str) -> dict | None:
+    """対応表にある (種別, 日付) のページ（page_id・url・title 等）を返す."""
+    return _load_page_map().get(_page_key(report_type, date_str))
+
+
+def query_report_pages(client, database_id: str, report_type: str, date_str: str) -> list[dict]:
+    """日付・種別が一致するページを作成順（古い順）に返す."""
+    response = client.query_database(database_id, {
+        "filter": {
+            "and": [
+                {"property": "日付", "date": {"equals": date_str}},
+                {"property": "種別", "select": {"equals": "日報" if report_type == "daily" else "週報"}},
+            ]
+        },
+        "sorts": [{"timestamp": "created_time", "direction": "ascending"}],
+    })
+    return response.get("results", [])
+
+
+def _hash(obj) -> str:
+    return hashlib.sha256(
+        json.dumps(obj, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+def _upsert_page(
+    client, database_id: str, report_type: str, date_str: str,
+    entry: dict | None, properties: dict, sections: list[tuple[str, list[dict]]],
+) -> dict:
+    """ページを作成または更新し、対応表のエントリを返す."""
+    props_hash = _hash(properties)
+    if entry is None:
+        pages = query_report_pages(client, database_id, report_type, date_str)
+        if not pages:
+            return _create_page(client, database_id, properties, props_hash, sections)
+        # 最も古いページを残し、過去の実行で重複したページはアーカイブする
+        page = pages[0]
+        for duplicate in pages[1:]:
+            client.update_page(duplicate["id"], archived=True)
+            logger.info("重複した Notion ページをアーカイブ: %s", duplicate.get("url", duplicate["id"]))
+        entry = {"page_id": page["id"], "url": page.get("url", ""), "properties": ""}
+
+    page_id = entry["page_id"]
+    if entry.get("properties") != props_hash:
+        client.update_page(page_id, properties=properties)
+        entry["properties"] = props_hash
+
+    old_sections = entry.get("sections")
+    if old_sections is None:
+        # 対応表にないページは中身の区切りが分からないので全体を書き直す
+        for block in client.list_children(page_id):
+            client.delete_block(block["id"])
+        entry["sections"] = _write_sections(client, page_id, sections, None)
+    else:
+        entry["sections"] = _update_sections(client, page_id, sections, old_sections)
+    return entry
+
+
+def _create_page(
+    client, database_id: str, properties: dict, props_hash: str,
+    sections: list[tuple[str, list[dict]]],
+) -> dict:
+    """新規ページを作成する.
+
+    最初のバッチはページ作成リクエストに含め、そのブロックIDは1回の一覧取得で得る
+    （作成のレスポンスには子ブロックが含まれない）。残りのバッチは追記で送る。
+    """
+    parent = {"database_id": database_id}
+    blocks = [block for _, section_blocks in sections for block in section_blocks]
+    batches = plan_requests(
+        blocks, reserved_bytes=_payload_bytes({"parent": parent, "properties": properties}),
+    )
+    page = client.create_page(parent, properties, batches[0])
+    block_ids = [b["id"] for b in client.list_children(page["id"])] if batches[0] else []
+    for batch in batches[1:]:
+        response = client.append_children(page["id"], batch)
+        block_ids.extend(b["id"] for b in response.get("results", []))
+    return {
+        "page_id": page["id"], "url": page.get("url", ""), "properties": props_hash,
+        "sections": _section_records(sections, block_ids),
+    }
+
+
+def _write_sections(
+    client, page_id: str, sections: list[tuple[str, list[dict]]], after: str | None,
+) -> list[dict]:
+    """セクションを after の直後（None なら末尾）に書き込み、対応表の記録を返す."""
+    blocks = [block for _, section_blocks in sections for block in section_blocks]
+    block_ids = []
+    for batch in plan_requests(blocks):
+        if not batch:
+            continue
+        response = client.append_children(page_id, batch, after)
+        ids = [b["id"] for b in response.get("results", [])]
+        block_ids.extend(ids)
+        if after and ids:
+            after = ids[-1]
+    return _section_records(sections, block_ids)
+
+
+def _section_records(sections: list[tuple[str, list[dict]]], block_ids: list[str]) -> list[dict]:
+    """書き込んだ順のブロックIDをセクションごとに分け、ハッシュと一緒に記録する."""
+    records = []
+    for key, section_blocks in sections:
+        records.append({
+            "key": key,
+            "hash": _hash(section_blocks),
+            "block_ids": block_ids[:len(section_blocks)],
+        })
+        block_ids = block_ids[len(section_blocks):]
+    return records
+
+
+def _update_sections(
+    client, page_id: str, sections: list[tuple[str, list[dict]]], old_sections: list[dict],
+) -> list[dict]:
+    """変わったセクションだけを書き換える.
+
+    新しいブロックは旧セクションの末尾（旧セクションがなければ直前のセクションの末尾）の
+    直後に挿入してから旧ブロックを削除するため、先頭のセクションも位置を保って差し替えられる。
+    """
+    old_by_key = {s["key"]: s for s in old_sections}
+    new_keys = [key for key, _ in sections]
+    kept_order = [s["key"] for s in old_sections if s["key"] in new_keys]
+    if kept_order != [k for k in new_keys if k in old_by_key] or (
+        new_keys and new_keys[0] not in old_by_key and old_sections
+    ):
+        # 並び替えや先頭への挿入は位置を決められないので全体を書き直す
+        for old in old_sections:
+            for block_id in old["block_ids"]:
+                client.delete_block(block_id)
+        return _write_sections(client, page_id, sections, None)
+
+    records = []
+    changed = 0
+    last_id = None
+    for key, blocks in sections:
+        old = old_by_key.get(key)
+        if old and old["hash"] == _hash(blocks):
+            records.append(old)
+        else:
+            changed += 1
+            anchor = (old["block_ids"][-1] if old and old["block_ids"] else None) or last_id
+            records.extend(_write_sections(client, page_id, [(key, blocks)], anchor))
+            for block_id in old["block_ids"] if old else []:
+                client.delete_block(block_id)
+        if records[-1]["block_ids"]:
+            last_id = records[-1]["block_ids"][-1]
+    for old in old_sections:
+        if old["key"] not in new_keys:
+            changed += 1
+            for block_id in old["block_ids"]:
+                client.delete_block(block_id)
+    logger.info("Notion ページを差分更新: %d / %d セクション", changed, len(sections))
+    return records
 
 
 def _build_title(report_type: str, now: datetime) -> str:
@@ -114,251 +306,122 @@ def _build_properties(title: str, report_type: str, analysis: dict, now: datetim
     }
 
 
-def _build_blocks(analysis: dict, report_type: str) -> list[dict]:
-    """分析結果を Notion ブロックに変換する."""
-    if report_type == "weekly":
-        return _build_weekly_blocks(analysis)
-    return _build_daily_blocks(analysis)
-
-
 # ────────────────────────────────────────────
-# 日報ブロック
+# ドキュメント → Notion ブロック
 # ────────────────────────────────────────────
 
-def _build_daily_blocks(analysis: dict) -> list[dict]:
-    """日報の分析結果を Notion ブロックに変換する."""
-    blocks = []
-
-    # エグゼクティブサマリー
-    summary = analysis.get("executive_summary", "")
-    if summary:
-        blocks.append(_heading2("エグゼクティブサマリー"))
-        blocks.extend(_paragraphs(summary))
-
-    # 注目トレンド商品 TOP3
-    top_trends = analysis.get("top_trends", [])
-    if top_trends:
-        blocks.append(_heading2("注目トレンド商品 TOP3"))
-        for t in top_trends:
-            rank = t.get("rank", "?")
-            name_en = t.get("name_en", "Unknown")
-            name_ja = t.get("name_ja", "")
-            name = f"【{rank}位】{name_en}（{name_ja}）" if name_ja else f"【{rank}位】{name_en}"
-            blocks.append(_heading3(name))
-
-            details = []
-            details.append(f"発祥: {t.get('origin', '不明')}")
-            details.append(f"検出: {', '.join(t.get('detected_on', []))}")
-            details.append(f"指標: {t.get('metrics', 'N/A')}")
-            bar = t.get("lifecycle_bar", "□□□□□")
-            stage = t.get("lifecycle_stage", "不明")
-            details.append(f"ステージ: {bar} {stage}")
-            details.append(f"日本上陸予測: {t.get('japan_landing_estimate', '不明')}")
-            blocks.extend(_paragraphs("\n".join(details)))
-
-            why = t.get("why_trending", "")
-            if why:
-                blocks.extend(_paragraphs(f"流行理由: {why}"))
-            fit = t.get("japan_market_fit", "")
-            if fit:
-                blocks.extend(_paragraphs(f"日本市場: {fit}"))
-            proc = t.get("procurement_note", "")
-            if proc:
-                blocks.extend(_paragraphs(f"調達可能性: {proc}"))
-
-            refs = t.get("references", [])
-            if refs:
-                blocks.extend(_ref_blocks(refs))
-            blocks.append(_divider())
-
-    # アジア市場トレンド
-    asia = analysis.get("asia_trends", {})
-    if asia:
-        blocks.append(_heading2("アジア市場トレンド"))
-        for key, label in [("china", "中国"), ("korea", "韓国"), ("taiwan", "台湾"), ("southeast_asia", "東南アジア")]:
-            items = asia.get(key, [])
-            if items:
-                blocks.append(_heading3(label))
-                for item in items:
-                    blocks.extend(_paragraphs(f"▸ {item.get('headline', '')}"))
-                    detail = item.get("detail", "")
-                    if detail:
-                        blocks.extend(_paragraphs(detail))
-                    impl = item.get("implication", "")
-                    if impl:
-                        blocks.extend(_paragraphs(f"→ {impl}"))
-                    refs = item.get("references", [])
-                    if refs:
-                        blocks.extend(_ref_blocks(refs))
-
-    # 外食産業ニュース
-    news = analysis.get("industry_news", {})
-    if news:
-        blocks.append(_heading2("外食産業ニュース"))
-        for rkey, rlabel in [("western", "米国・欧州"), ("asian", "アジア")]:
-            items = news.get(rkey, [])
-            if items:
-                blocks.append(_heading3(rlabel))
-                for item in items:
-                    blocks.extend(_paragraphs(f"▸ {item.get('headline', '')}"))
-                    detail = item.get("detail", "")
-                    if detail:
-                        blocks.extend(_paragraphs(detail))
-                    impl = item.get("implication", "")
-                    if impl:
-                        blocks.extend(_paragraphs(f"→ マルイ物産への示唆: {impl}"))
-                    refs = item.get("references", [])
-                    if refs:
-                        blocks.extend(_ref_blocks(refs))
-
-    # フードテック
-    foodtech = analysis.get("foodtech", [])
-    if foodtech:
-        blocks.append(_heading2("フードテック・イノベーション"))
-        for item in foodtech:
-            blocks.extend(_paragraphs(f"▸ {item.get('headline', '')}"))
-            detail = item.get("detail", "")
-            if detail:
-                blocks.extend(_paragraphs(detail))
-            impact = item.get("impact", "")
-            if impact:
-                blocks.extend(_paragraphs(f"影響: {impact}"))
-            refs = item.get("references", [])
-            if refs:
-                blocks.extend(_ref_blocks(refs))
-
-    # 規制・政策
-    reg = analysis.get("regulation", {})
-    if reg:
-        blocks.append(_heading2("規制・政策ウォッチ"))
-        for item in reg.get("risks", []):
-            blocks.extend(_paragraphs(f"⚠ リスク: {item.get('headline', '')}"))
-            detail = item.get("detail", "")
-            if detail:
-                blocks.extend(_paragraphs(detail))
-            refs = item.get("references", [])
-            if refs:
-                blocks.extend(_ref_blocks(refs))
-        for item in reg.get("opportunities", []):
-            blocks.extend(_paragraphs(f"チャンス: {item.get('headline', '')}"))
-            detail = item.get("detail", "")
-            if detail:
-                blocks.extend(_paragraphs(detail))
-            refs = item.get("references", [])
-            if refs:
-                blocks.extend(_ref_blocks(refs))
-
-    # アクション示唆
-    actions = analysis.get("action_items", [])
-    if actions:
-        blocks.append(_heading2("マルイ物産へのアクション示唆"))
-        for item in actions:
-            priority = item.get("priority", "中")
-            action = item.get("action", "")
-            reason = item.get("reason", "")
-            text = f"[{priority}] {action}"
-            if reason:
-                text += f"\n理由: {reason}"
-            blocks.extend(_paragraphs(text))
-
-    return blocks
+def render_blocks(document: dict) -> list[dict]:
+    """ドキュメントを Notion ブロックに描画する."""
+    return [block for _, blocks in render_sections(document) for block in blocks]
+
+
+def render_sections(document: dict) -> list[tuple[str, list[dict]]]:
+    """ドキュメントをセクションごとの Notion ブロックに描画する.
+
+    トレンド TOP3 は開閉できる見出しの子ブロックに、ヘッドライン等は1項目1段落
+    （複数セグメントのリッチテキスト）にまとめ、トップレベルのブロック数を抑える。
+
+    Returns:
+        [(セクションキー, ブロックのリスト), ...]
+    """
+    sections = []
+    for section in document["sections"]:
+        blocks = [_heading2(section["title"])]
+        sections.append((section["key"], blocks))
+        blocks.extend(_paragraphs(section["text"]))
+        for group in section["groups"]:
+            if not group["items"]:
+                continue
+            if group["label"]:
+                blocks.append(_heading3(group["label"]))
+            for item in group["items"]:
+                if item["style"] == "card":
+                    blocks.extend(_card_blocks(item))
+                else:
+                    blocks.extend(_entry_blocks(item))
+    return sections
+
+
+def _card_blocks(item: dict) -> list[dict]:
+    """トレンド TOP3 の1件: 開閉できる見出しの下に基本情報・分析段落・参照 + 区切り線."""
+    meta = [f"{f['label']}: {f['text']}" for f in item["fields"] if f["kind"] == "meta"]
+    children = _paragraphs("\n".join(meta))
+    for f in item["fields"]:
+        if f["kind"] != "meta":
+            children.extend(_paragraphs(f"{f['label']}: {f['text']}"))
+    if item["references"]:
+        children.extend(_rich_paragraphs(_ref_segments(item["references"])))
+    return _toggle_heading3(item["title"], children) + [_divider()]
+
+
+def _entry_blocks(item: dict) -> list[dict]:
+    """ヘッドライン等の1件: 見出し行・本文・示唆・参照を改行区切りの1段落にまとめる."""
+    head = []
+    if item["badge"]:
+        head.append(f"{item['badge']}: {item['title']}")
+    elif item["title"]:
+        head.append(f"{item['bullet']}{item['title']}")
+    lines = []
+    for f in item["fields"]:
+        label = f"{f['label']}: " if f["label"] else ""
+        if f["kind"] == "meta":
+            head.append(f"{label}{f['text']}")
+        elif f["kind"] == "note":
+            lines.append(f"→ {label}{f['text']}")
+        else:
+            lines.append(f"{label}{f['text']}")
+    segments = _text_segments("\n".join(head + lines))
+    if item["references"]:
+        segments += _text_segments("\n") + _ref_segments(item["references"])
+    return _rich_paragraphs(segments)
 
 
 # ────────────────────────────────────────────
-# 週報ブロック
+# リクエスト分割
 # ────────────────────────────────────────────
 
-def _build_weekly_blocks(analysis: dict) -> list[dict]:
-    """週報の分析結果を Notion ブロックに変換する."""
-    blocks = []
-
-    # ハイライト
-    highlight = analysis.get("highlight", "")
-    if highlight:
-        blocks.append(_heading2("今週のハイライト"))
-        blocks.extend(_paragraphs(highlight))
-
-    # トレンド商品まとめ
-    ts = analysis.get("trend_summary", {})
-    if ts:
-        blocks.append(_heading2("今週のトレンド商品まとめ"))
-
-        accel = ts.get("accelerating", [])
-        if accel:
-            blocks.append(_heading3("トレンド加速"))
-            for item in accel:
-                text = f"・{item.get('name', '')}\n"
-                text += f"先週: {item.get('last_week', '')} → 今週: {item.get('this_week', '')}\n"
-                text += f"ステージ: {item.get('stage_change', '')}"
-                blocks.extend(_paragraphs(text))
-                refs = item.get("references", [])
-                if refs:
-                    blocks.extend(_ref_blocks(refs))
-
-        new_items = ts.get("new_detected", [])
-        if new_items:
-            blocks.append(_heading3("新規検出"))
-            for item in new_items:
-                text = f"・{item.get('name', '')}\n{item.get('description', '')}"
-                blocks.extend(_paragraphs(text))
-                refs = item.get("references", [])
-                if refs:
-                    blocks.extend(_ref_blocks(refs))
-
-        decel = ts.get("decelerating", [])
-        if decel:
-            blocks.append(_heading3("トレンド減速"))
-            for item in decel:
-                text = f"・{item.get('name', '')}\n{item.get('change', '')}"
-                blocks.extend(_paragraphs(text))
-                refs = item.get("references", [])
-                if refs:
-                    blocks.extend(_ref_blocks(refs))
-
-    # アジア市場サマリー
-    asia = analysis.get("asia_weekly", {})
-    if asia:
-        blocks.append(_heading2("今週のアジア市場サマリー"))
-        for key, label in [("china", "中国"), ("taiwan", "台湾"), ("korea", "韓国"), ("southeast_asia", "東南アジア")]:
-            region = asia.get(key, {})
-            if region:
-                rating = region.get("rating", 0)
-                stars = "★" * rating + "☆" * (5 - rating)
-                blocks.append(_heading3(f"{label}（注目度: {stars}）"))
-                summary_text = region.get("summary", "")
-                if summary_text:
-                    blocks.extend(_paragraphs(summary_text))
-                refs = region.get("references", [])
-                if refs:
-                    blocks.extend(_ref_blocks(refs))
-
-    # 業界動向
-    industry = analysis.get("industry_weekly", {})
-    if industry:
-        blocks.append(_heading2("今週の業界動向まとめ"))
-        for ckey, clabel in [("important", "重要度高"), ("technology", "テクノロジー"), ("regulation", "規制・政策")]:
-            items = industry.get(ckey, [])
-            if items:
-                blocks.append(_heading3(clabel))
-                for item in items:
-                    headline = item.get("headline", "")
-                    blocks.extend(_paragraphs(f"・{headline}"))
-                    refs = item.get("references", [])
-                    if refs:
-                        blocks.extend(_ref_blocks(refs))
-
-    # 来週の注目ポイント
-    outlook = analysis.get("next_week_outlook", [])
-    if outlook:
-        blocks.append(_heading2("来週の注目ポイント"))
-        for item in outlook:
-            text = f"▸ {item.get('point', '')}"
-            detail = item.get("detail", "")
-            if detail:
-                text += f"\n{detail}"
-            blocks.extend(_paragraphs(text))
-
-    return blocks
+# Notion API の1リクエストあたりの上限（配列の要素数・ブロック総数・ペイロードサイズ）
+MAX_ARRAY_ELEMENTS = 100
+MAX_BLOCKS_PER_REQUEST = 1000
+MAX_PAYLOAD_BYTES = 500_000
+# JSON エンコードの差やヘッダー分の余裕
+PAYLOAD_MARGIN = 0.9
+
+
+def _count_blocks(blocks: list[dict]) -> int:
+    """子ブロックも含めたブロック数."""
+    return sum(1 + _count_blocks(b.get(b["type"], {}).get("children", [])) for b in blocks)
+
+
+def _payload_bytes(obj) -> int:
+    return len(json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+
+def plan_requests(blocks: list[dict], reserved_bytes: int = 0) -> list[list[dict]]:
+    """トップレベルのブロックを、上限を超えない最少のリクエストに詰める.
+
+    各バッチはトップレベル MAX_ARRAY_ELEMENTS 件以下、子を含めて
+    MAX_BLOCKS_PER_REQUEST 件以下、ペイロードが MAX_PAYLOAD_BYTES の PAYLOAD_MARGIN 倍以下。
+    先頭のバッチ（ページ作成）は reserved_bytes（プロパティ等）を差し引く。
+    子ブロックは親と同じリクエストに入るので分割しない。
+    """
+    budget = int(MAX_PAYLOAD_BYTES * PAYLOAD_MARGIN)
+    batches: list[list[dict]] = [[]]
+    count, size = 0, reserved_bytes
+    for block in blocks:
+        block_count = _count_blocks([block])
+        block_size = _payload_bytes(block) + 1
+        if batches[-1] and (
+            len(batches[-1]) >= MAX_ARRAY_ELEMENTS
+            or count + block_count > MAX_BLOCKS_PER_REQUEST
+            or size + block_size > budget
+        ):
+            batches.append([])
+            count = size = 0
+        batches[-1].append(block)
+        count += block_count
+        size += block_size
+    return batches
 
 
 # ────────────────────────────────────────────
@@ -385,6 +448,14 @@ def _heading3(text: str) -> dict:
     }
 
 
+def _toggle_heading3(text: str, children: list[dict]) -> list[dict]:
+    """子ブロック付きの開閉できる見出し（子が配列の上限を超えた分は見出しの後に並べる）."""
+    heading = _heading3(text)
+    heading["heading_3"]["is_toggleable"] = True
+    heading["heading_3"]["children"] = children[:MAX_ARRAY_ELEMENTS]
+    return [heading] + children[MAX_ARRAY_ELEMENTS:]
+
+
 def _paragraph(rich_text: list[dict]) -> dict:
     return {
         "object": "block",
@@ -393,54 +464,46 @@ def _paragraph(rich_text: list[dict]) -> dict:
     }
 
 
-def _paragraphs(text: str) -> list[dict]:
-    """テキストを Notion の文字数制限に合わせて段落ブロックに分割する."""
-    if not text:
-        return []
-    blocks = []
+def _text_segments(text: str, url: str = "") -> list[dict]:
+    """テキストを Notion の文字数制限ごとのリッチテキストセグメントに分ける."""
+    segments = []
     while text:
-        chunk = text[:NOTION_TEXT_LIMIT]
+        content = {"content": text[:NOTION_TEXT_LIMIT]}
+        if url:
+            content["link"] = {"url": url}
+        segments.append({"type": "text", "text": content})
         text = text[NOTION_TEXT_LIMIT:]
-        blocks.append(_paragraph([{"type": "text", "text": {"content": chunk}}]))
-    return blocks
+    return segments
+
+
+def _rich_paragraphs(segments: list[dict]) -> list[dict]:
+    """セグメントを段落にする（1段落のセグメント数上限を超えたら段落を分ける）."""
+    return [
+        _paragraph(segments[i:i + MAX_ARRAY_ELEMENTS])
+        for i in range(0, len(segments), MAX_ARRAY_ELEMENTS)
+    ]
+
+
+def _paragraphs(text: str) -> list[dict]:
+    """テキストを1段落（長ければ複数セグメント）にする."""
+    return _rich_paragraphs(_text_segments(text))
 
 
 def _divider() -> dict:
     return {"object": "block", "type": "divider", "divider": {}}
 
 
-def _ref_blocks(refs: list) -> list[dict]:
-    """参照リストを Notion のリッチテキストブロックに変換する.
+def _ref_segments(refs: list) -> list[dict]:
+    """参照リストをリッチテキストセグメントに変換する.
 
-    URLがある参照はリンク付きリッチテキストにする。
+    URLがある参照はリンク付きセグメントにする。
     """
-    rich_text_parts = [{"type": "text", "text": {"content": "参照: "}}]
-
+    segments = _text_segments("参照: ")
     for i, ref in enumerate(refs):
         if i > 0:
-            rich_text_parts.append({"type": "text", "text": {"content": " / "}})
-
+            segments += _text_segments(" / ")
         if isinstance(ref, dict):
-            text = ref.get("text", "")
-            url = ref.get("url", "")
-            if url:
-                rich_text_parts.append({
-                    "type": "text",
-                    "text": {"content": text, "link": {"url": url}},
-                })
-            else:
-                rich_text_parts.append({"type": "text", "text": {"content": text}})
+            segments += _text_segments(ref.get("text", ""), ref.get("url", ""))
         else:
-            rich_text_parts.append({"type": "text", "text": {"content": str(ref)}})
-
-    # リッチテキスト全体の合計文字数をチェック
-    total_len = sum(len(p["text"]["content"]) for p in rich_text_parts)
-    if total_len > NOTION_TEXT_LIMIT:
-        # 超える場合は簡素化
-        simple_text = "参照: " + ", ".join(
-            ref.get("text", str(ref)) if isinstance(ref, dict) else str(ref)
-            for ref in refs
-        )
-        return _paragraphs(simple_text)
-
-    return [_paragraph(rich_text_parts)]
+            segments += _text_segments(str(ref))
+    return segments
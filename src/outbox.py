@@ -0,0 +1,169 @@
+"""配信先ごとの送信待ちキュー（アウトボックス）.
+
+レポートを描画したら、配信先（LINE・Notion・ポッドキャスト画像ページ）ごとの
+送信内容を data/outbox/<実行ID>.json に書き出してから送信する。
+送信に失敗した配信先は pending のまま残り、次回の実行（または --flush-outbox）で
+その配信先だけを送り直す。収集や Gemini 分析をやり直す必要はない。
+
+記録の形式:
+    {"run_id", "created_at", "sinks": {配信先: {"status", "attempts", "last_error",
+                                               "updated_at", "payload"}}}
+
+- status: "pending"（未送信・再試行待ち）/ "done"（送信済み）/ "failed"（MAX_ATTEMPTS 回失敗して断念）
+- 1回の送信処理では失敗した配信先を指数バックオフで RETRIES 回まで再試行する
+- 全配信先が done になった記録は RETENTION_DAYS 日後に削除する
+"""
+
+import json
+import logging
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+JST = timezone(timedelta(hours=9))
+OUTBOX_DIR = Path(__file__).resolve().parent.parent / "data" / "outbox"
+
+# 1回の送信処理での再試行回数と、バックオフの初期値（秒）
+RETRIES = 3
+BACKOFF_BASE = 2.0
+# 実行をまたいだ累計の試行回数の上限
+MAX_ATTEMPTS = 10
+# 送信済みの記録を残す日数
+RETENTION_DAYS = 7
+
+
+def _path(run_id: str) -> Path:
+    return OUTBOX_DIR / f"{run_id}.json"
+
+
+def _load(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning("アウトボックス読み込み失敗 (%s): %s", path.name, e)
+        return None
+
+
+def _save(record: dict) -> None:
+    """一時ファイルに書いてから置き換える（途中で落ちても記録が壊れない）."""
+    OUTBOX_DIR.mkdir(parents=True, exist_ok=True)
+    path = _path(record["run_id"])
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(record, ensure_ascii=False, indent=1), encoding="utf-8")
+    tmp.replace(path)
+
+
+def enqueue(run_id: str, payloads: dict[str, dict]) -> None:
+    """配信先ごとの送信内容を記録する（同じ実行IDの記録は置き換える）."""
+    now = datetime.now(JST).isoformat(timespec="seconds")
+    _save({
+        "run_id": run_id,
+        "created_at": now,
+        "sinks": {
+            sink: {
+                "status": "pending", "attempts": 0, "last_error": "",
+                "updated_at": now, "payload": payload,
+            }
+            for sink, payload in payloads.items()
+        },
+    })
+    logger.info("アウトボックスに記録: %s（%s）", run_id, ", ".join(payloads))
+
+
+def deliver(run_id: str, handlers: dict[str, Callable[[dict], bool]]) -> bool:
+    """1回分の記録の pending な配信先を送信する。全配信先が done なら True."""
+    path = _path(run_id)
+    record = _load(path) if path.exists() else None
+    if record is None:
+        logger.warning("アウトボックスに記録がありません: %s", run_id)
+        return False
+    return _deliver_record(record, handlers)
+
+
+def flush(handlers: dict[str, Callable[[dict], bool]]) -> bool:
+    """全記録の pending な配信先を送り直す。送り残しがなければ True."""
+    if not OUTBOX_DIR.exists():
+        return True
+    all_done = True
+    for path in sorted(OUTBOX_DIR.glob("*.json")):
+        record = _load(path)
+        if record is None:
+            continue
+        if _pending(record):
+            all_done = _deliver_record(record, handlers) and all_done
+        elif _expired(record):
+            path.unlink()
+            logger.info("送信済みのアウトボックス記録を削除: %s", path.name)
+    return all_done
+
+
+def pending_runs() -> list[str]:
+    """送り残しのある実行IDを返す."""
+    if not OUTBOX_DIR.exists():
+        return []
+    return [
+        record["run_id"]
+        for record in (_load(p) for p in sorted(OUTBOX_DIR.glob("*.json")))
+        if record and _pending(record)
+    ]
+
+
+def outbox_status(run_id: str) -> dict[str, str]:
+    """1回分の記録の配信先ごとの status を返す."""
+    path = _path(run_id)
+    record = _load(path) if path.exists() else None
+    return {sink: state["status"] for sink, state in record["sinks"].items()} if record else {}
+
+
+def _pending(record: dict) -> list[str]:
+    return [sink for sink, s in record["sinks"].items() if s["status"] == "pending"]
+
+
+def _expired(record: dict) -> bool:
+    if any(s["status"] != "done" for s in record["sinks"].values()):
+        return False
+    created = datetime.fromisoformat(record["created_at"])
+    return datetime.now(JST) - created > timedelta(days=RETENTION_DAYS)
+
+
+def _deliver_record(record: dict, handlers: dict[str, Callable[[dict], bool]]) -> bool:
+    for sink in _pending(record):
+        handler = handlers.get(sink)
+        if handler is None:
+            logger.warning("配信先 %s の送信処理がありません（%s）", sink, record["run_id"])
+            continue
+        state = record["sinks"][sink]
+        for retry in range(RETRIES):
+            state["attempts"] += 1
+            try:
+                ok = handler(state["payload"])
+                error = "" if ok else "送信処理が失敗を返しました"
+            except Exception as e:
+                ok, error = False, str(e)
+            state["updated_at"] = datetime.now(JST).isoformat(timespec="seconds")
+            state["last_error"] = error
+            if ok:
+                state["status"] = "done"
+                logger.info("配信完了: %s / %s（%d 回目）", record["run_id"], sink, state["attempts"])
+                break
+            if state["attempts"] >= MAX_ATTEMPTS:
+                state["status"] = "failed"
+                logger.error(
+                    "配信を断念: %s / %s（%d 回失敗）: %s",
+                    record["run_id"], sink, state["attempts"], error,
+                )
+                break
+            if retry < RETRIES - 1:
+                wait = BACKOFF_BASE * 2 ** retry
+                logger.warning(
+                    "配信失敗: %s / %s、%.0f 秒後に再試行: %s", record["run_id"], sink, wait, error,
+                )
+                time.sleep(wait)
+            else:
+                logger.error("配信失敗（次回の送信処理で再試行）: %s / %s: %s", record["run_id"], sink, error)
+        # 配信先ごとに記録を更新し、途中で落ちても送信済みの配信先を繰り返さない
+        _save(record)
+    return all(s["status"] == "done" for s in record["sinks"].values())
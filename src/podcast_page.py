@@ -1,19 +1,43 @@
 """ポッドキャスト用画像付きまとめページ生成モジュール.
 
-Notion DBから日報ページを取得 → トレンドキーワード抽出 →
+日報の分析結果からトレンドキーワード抽出 →
 Pexels APIで画像検索 → 日付別HTMLページを生成。
+日次実行では main から分析結果を直接受け取る（run_from_analysis）。
+Notion DBから日報ページを取得する経路は、単体実行で保存済みの日報がない日の作り直し用。
 GitHub Pagesで配信し、ポッドキャスト聴取中に画像確認する用途。
+
+ページ一覧は docs/podcast/manifest.json に持ち、インデックス・月別アーカイブは
+マニフェストから生成する（既存ページの読み直しはしない）。CSS は内容ハッシュ付きの
+共有スタイルシート（style.<hash>.css）に置き、内容が変わらないページは書き込まない。
+出力は最小化したHTMLに .gz と .br を添え、画像は srcset 付きで遅延読み込みする。
 """
 
+import gzip
+import hashlib
 import json
 import logging
 import os
 import re
+import threading
+import time
 import urllib.parse
 import urllib.request
+from html import unescape
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
+try:
+    import brotli
+except ImportError:  # requirements.txt に含む。入っていない手元の環境では .gz だけ出力する
+    brotli = None
+
+from notion_api import get_client
+from notion_writer import lookup_page, query_report_pages
+from report_document import build_daily, iter_items
+from site_search import SEARCH_SCRIPT, indexed_pages, update_search_index
+from weekly_aggregator import load_daily_report
+
 logger = logging.getLogger(__name__)
 
 JST = timezone(timedelta(hours=9))
@@ -23,43 +47,14 @@ DOCS_DIR = Path(__file__).resolve().parent.parent / "docs" / "podcast"
 # 1. Notion からページ取得
 # ────────────────────────────────────────────
 
-NOTION_API_BASE = "https://api.notion.com/v1"
-NOTION_VERSION = "2022-06-28"
-
-
-def _notion_request(method: str, path: str, body: dict | None = None) -> dict:
-    """Notion API に直接HTTPリクエストを送信."""
-    token = os.environ.get("NOTION_TOKEN", "")
-    url = f"{NOTION_API_BASE}/{path}"
-
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": NOTION_VERSION,
-        "Content-Type": "application/json",
-    }
-
-    data = json.dumps(body).encode() if body else None
-    req = urllib.request.Request(url, method=method, headers=headers, data=data)
-    with urllib.request.urlopen(req, timeout=15) as resp:
-        return json.loads(resp.read().decode("utf-8"))
-
-
-def _format_database_id(db_id: str) -> str:
-    """ハイフンなし32文字ならUUID形式に変換."""
-    if len(db_id) == 32 and "-" not in db_id:
-        return f"{db_id[:8]}-{db_id[8:12]}-{db_id[12:16]}-{db_id[16:20]}-{db_id[20:]}"
-    return db_id
-
-
 def fetch_latest_daily_page(target_date: str | None = None) -> dict | None:
     """Notion DBから指定日（デフォルト: 今日）の日報ページを取得.
 
     Returns:
         {"title": str, "date": str, "page_id": str, "blocks": list} or None
     """
-    token = os.environ.get("NOTION_TOKEN")
-    if not token:
-        logger.warning("NOTION_TOKEN が未設定")
+    client = get_client()
+    if not client:
         return None
 
     database_id = os.environ.get("NOTION_DATABASE_ID", "")
@@ -67,38 +62,35 @@ def fetch_latest_daily_page(target_date: str | None = None) -> dict | None:
         logger.warning("NOTION_DATABASE_ID が未設定")
         return None
 
-    database_id = _format_database_id(database_id)
-
     if not target_date:
         target_date = datetime.now(JST).strftime("%Y-%m-%d")
 
     try:
-        # 日付フィルタで日報ページを検索
-        response = _notion_request("POST", f"databases/{database_id}/query", {
-            "filter": {
-                "and": [
-                    {"property": "日付", "date": {"equals": target_date}},
-                    {"property": "種別", "select": {"equals": "日報"}},
-                ]
-            },
-            "page_size": 1,
-        })
-
-        results = response.get("results", [])
-        if not results:
-            logger.warning("日報ページが見つかりません: %s", target_date)
-            return None
-
-        page = results[0]
-        page_id = page["id"]
-
-        # タイトル取得
-        title_prop = page.get("properties", {}).get("タイトル", {})
-        title_arr = title_prop.get("title", [])
-        title = title_arr[0]["plain_text"] if title_arr else f"日報 {target_date}"
-
-        # ページのブロック（本文）を全取得
-        blocks = _fetch_all_blocks(page_id)
+        # 保存時の対応表を優先し、なければ日付フィルタで検索（重複があれば最も古いページ）
+        cached = lookup_page("daily", target_date)
+        if cached and cached.get("page_id"):
+            page_id = cached["page_id"]
+            title = cached.get("title") or f"日報 {target_date}"
+        else:
+            results = query_report_pages(client, database_id, "daily", target_date)
+            if not results:
+                logger.warning("日報ページが見つかりません: %s", target_date)
+                return None
+
+            page = results[0]
+            page_id = page["id"]
+
+            # タイトル取得
+            title_prop = page.get("properties", {}).get("タイトル", {})
+            title_arr = title_prop.get("title", [])
+            title = title_arr[0]["plain_text"] if title_arr else f"日報 {target_date}"
+
+        # ページのブロック（本文）を全取得（開閉できる見出しの子は見出しの直後に展開）
+        blocks = []
+        for block in client.list_children(page_id):
+            blocks.append(block)
+            if block.get("type") == "heading_3" and block.get("has_children"):
+                blocks.extend(client.list_children(block["id"]))
 
         return {
             "title": title,
@@ -112,22 +104,6 @@ def fetch_latest_daily_page(target_date: str | None = None) -> dict | None:
         return None
 
 
-def _fetch_all_blocks(block_id: str) -> list[dict]:
-    """ページの全ブロックをページネーション対応で取得."""
-    blocks = []
-    cursor = None
-    while True:
-        params = f"page_size=100"
-        if cursor:
-            params += f"&start_cursor={cursor}"
-        resp = _notion_request("GET", f"blocks/{block_id}/children?{params}")
-        blocks.extend(resp.get("results", []))
-        if not resp.get("has_more"):
-            break
-        cursor = resp.get("next_cursor")
-    return blocks
-
-
 # ────────────────────────────────────────────
 # 2. キーワード抽出
 # ────────────────────────────────────────────
@@ -178,29 +154,68 @@ def extract_keywords(blocks: list[dict]) -> list[dict]:
             "context": "\n".join(context_lines),
         })
 
-    # アジア市場のヘッドラインも抽出（heading_3 配下の ▸ で始まる段落）
+    # アジア市場のヘッドラインも抽出（heading_3 配下の ▸ で始まる段落。heading_3 は地域名）
     asia_section = False
+    region = ""
     for block in blocks:
         block_type = block.get("type", "")
         if block_type == "heading_2":
             text = _extract_plain_text(block.get("heading_2", {}))
             asia_section = "アジア" in text
+            region = ""
+            continue
+        if asia_section and block_type == "heading_3":
+            region = _extract_plain_text(block.get("heading_3", {})).strip()
             continue
         if asia_section and block_type == "paragraph":
             text = _extract_plain_text(block.get("paragraph", {}))
             if text.startswith("▸ "):
-                headline = text[2:].strip()
+                # 見出し行の後に本文・示唆が続く段落もある
+                headline = text[2:].split("\n", 1)[0].strip()
                 if headline:
                     keywords.append({
                         "rank": 0,
                         "name_en": headline,
                         "name_ja": "",
                         "context": "",
+                        "region": region,
                     })
 
     return keywords
 
 
+def keywords_from_document(document: dict) -> list[dict]:
+    """ドキュメント（report_document）からトレンドキーワードを抽出.
+
+    extract_keywords と同じ形式で、トレンド TOP3 は基本情報と分析を context に、
+    アジア市場のヘッドラインは rank 0 の項目（region に地域名）として返す。
+    """
+    keywords = []
+    asia_keywords = []
+    for section, group, item in iter_items(document):
+        if item["style"] == "card":
+            context = [
+                f"{f['label']}: {f['text']}" for f in item["fields"] if f["kind"] == "meta"
+            ] + [
+                f"{f['label']}: {f['text']}" for f in item["fields"] if f["kind"] != "meta"
+            ]
+            keywords.append({
+                "rank": item["rank"] if isinstance(item["rank"], int) else 0,
+                "name_en": item["name_en"],
+                "name_ja": item["name_ja"],
+                "context": "\n".join(context),
+            })
+        elif section["key"] == "asia_trends" and item["title"]:
+            asia_keywords.append({
+                "rank": 0,
+                "name_en": item["title"],
+                "name_ja": "",
+                "context": "",
+                "region": group["label"],
+            })
+    return keywords + asia_keywords
+
+
 def _extract_plain_text(block_content: dict) -> str:
     """リッチテキストブロックからプレーンテキストを抽出."""
     parts = block_content.get("rich_text", [])
@@ -223,11 +238,83 @@ def _is_searchable_keyword(kw: dict) -> bool:
     return has_english
 
 
+IMAGE_CACHE_FILE = Path(__file__).resolve().parent.parent / "data" / "image_cache.json"
+IMAGE_CACHE_TTL = 30 * 24 * 3600
+# srcset に使う Pexels の画像サイズと、そのおおよその横幅（px）
+IMAGE_VARIANT_WIDTHS = {"small": 200, "medium": 525, "large": 940}
+IMAGE_SIZES = "(max-width: 600px) 100vw, 280px"
+# Pexels への同時リクエスト数と、リクエスト間の最小間隔（秒）
+PEXELS_WORKERS = 4
+PEXELS_MIN_INTERVAL = 0.5
+
+
+class _RateLimiter:
+    """スレッド間で共有する最小間隔のレートリミッター."""
+
+    def __init__(self, min_interval: float):
+        self._min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self._min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _load_image_cache() -> dict:
+    if not IMAGE_CACHE_FILE.exists():
+        return {}
+    try:
+        return json.loads(IMAGE_CACHE_FILE.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning("画像キャッシュ読み込み失敗: %s", e)
+        return {}
+
+
+def _save_image_cache(cache: dict) -> None:
+    """期限切れの検索結果を捨てて保存する（選んだ写真の ID は期限なしで残す）."""
+    now = time.time()
+    cache = {
+        q: e if now - e.get("fetched_at", 0) <= IMAGE_CACHE_TTL else {"chosen_ids": _chosen_ids(e)}
+        for q, e in cache.items()
+    }
+    try:
+        IMAGE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        IMAGE_CACHE_FILE.write_text(
+            json.dumps(cache, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+        )
+    except OSError as e:
+        logger.warning("画像キャッシュ保存失敗: %s", e)
+
+
+def _chosen_ids(entry: dict) -> list:
+    """キャッシュのエントリーから前回選んだ写真の ID を返す（旧形式は photos から）."""
+    if "chosen_ids" in entry:
+        return entry["chosen_ids"]
+    return [p["id"] for p in entry.get("photos", []) if p.get("id") is not None]
+
+
+def _stable_choice(photos: list[dict], previous_ids: list, num: int) -> list[dict]:
+    """前回選んだ写真（ID）が検索結果に残っていれば優先し、並びを保つ."""
+    by_id = {p["id"]: p for p in photos}
+    chosen = [by_id[i] for i in previous_ids if i in by_id]
+    chosen_ids = {p["id"] for p in chosen}
+    chosen.extend(p for p in photos if p["id"] not in chosen_ids)
+    return chosen[:num]
+
+
 def search_images(keywords: list[dict], max_per_keyword: int = 3) -> list[dict]:
     """キーワードごとにPexelsで画像を検索.
 
     具体的な食品名（英語名あり）のみ画像検索し、
     抽象的なキーワードはGoogle画像検索リンクにフォールバック。
+    検索結果はクエリごとに data/image_cache.json へ IMAGE_CACHE_TTL の間保存し、
+    キャッシュにないクエリだけをレートリミッター付きで並行して検索する。
+    選んだ写真の ID は期限なしで保存し、期限切れで検索し直しても同じ写真を使い続ける。
 
     Returns:
         [{"name_en": str, "name_ja": str, "rank": int, "images": [{"url": str, "title": str, "source": str}]}]
@@ -237,17 +324,46 @@ def search_images(keywords: list[dict], max_per_keyword: int = 3) -> list[dict]:
         logger.warning("PEXELS_API_KEY が未設定。フォールバック画像を使用します")
         return _fallback_image_results(keywords)
 
+    cache = _load_image_cache()
+    now = time.time()
+    queries = {
+        f"{kw['name_en']} food" for kw in keywords if _is_searchable_keyword(kw)
+    }
+    pending = [
+        q for q in sorted(queries)
+        if now - cache.get(q, {}).get("fetched_at", 0) > IMAGE_CACHE_TTL
+    ]
+    logger.info("画像検索: %d クエリ中 %d 件はキャッシュ済み", len(queries), len(queries) - len(pending))
+
+    if pending:
+        limiter = _RateLimiter(PEXELS_MIN_INTERVAL)
+        with ThreadPoolExecutor(max_workers=PEXELS_WORKERS) as executor:
+            futures = {
+                executor.submit(_pexels_search, api_key, q, 15, limiter): q for q in pending
+            }
+            for future in as_completed(futures):
+                query = futures[future]
+                photos = future.result()
+                if photos is None:
+                    continue
+                chosen = _stable_choice(photos, _chosen_ids(cache.get(query, {})), max_per_keyword)
+                cache[query] = {
+                    "fetched_at": now,
+                    "photos": chosen,
+                    "chosen_ids": [p["id"] for p in chosen],
+                }
+        _save_image_cache(cache)
+
     results = []
     for kw in keywords:
         if _is_searchable_keyword(kw):
             query = f"{kw['name_en']} food"
-            images = _pexels_search(api_key, query, max_per_keyword)
             results.append({
                 "name_en": kw["name_en"],
                 "name_ja": kw.get("name_ja", ""),
                 "rank": kw.get("rank", 0),
                 "context": kw.get("context", ""),
-                "images": images,
+                "images": cache.get(query, {}).get("photos", [])[:max_per_keyword],
             })
         else:
             # 抽象的なキーワードはGoogle画像検索リンクのみ
@@ -265,8 +381,10 @@ def search_images(keywords: list[dict], max_per_keyword: int = 3) -> list[dict]:
     return results
 
 
-def _pexels_search(api_key: str, query: str, num: int = 3) -> list[dict]:
-    """Pexels API で画像検索を実行."""
+def _pexels_search(
+    api_key: str, query: str, num: int = 3, limiter: _RateLimiter | None = None,
+) -> list[dict] | None:
+    """Pexels API で画像検索を実行。失敗時は None（キャッシュしない）."""
     try:
         params = urllib.parse.urlencode({
             "query": query,
@@ -279,13 +397,20 @@ def _pexels_search(api_key: str, query: str, num: int = 3) -> list[dict]:
             "Authorization": api_key,
             "User-Agent": "FoodTrendBot/1.0",
         })
+        if limiter:
+            limiter.wait()
         with urllib.request.urlopen(req, timeout=10) as resp:
             data = json.loads(resp.read().decode("utf-8"))
 
         photos = data.get("photos", [])
         return [
             {
+                "id": photo.get("id"),
                 "url": photo.get("src", {}).get("large", ""),
+                "sizes": {
+                    size: photo.get("src", {}).get(size, "")
+                    for size in ("small", "medium", "large")
+                },
                 "title": photo.get("alt", "") or photo.get("photographer", ""),
                 "source": f"Pexels / {photo.get('photographer', '')}",
                 "page_url": photo.get("url", ""),
@@ -295,7 +420,7 @@ def _pexels_search(api_key: str, query: str, num: int = 3) -> list[dict]:
 
     except Exception as e:
         logger.warning("画像検索失敗 (%s): %s", query, e)
-        return []
+        return None
 
 
 def _fallback_image_results(keywords: list[dict]) -> list[dict]:
@@ -319,7 +444,170 @@ def _fallback_image_results(keywords: list[dict]) -> list[dict]:
 # 4. HTML ページ生成
 # ────────────────────────────────────────────
 
-def generate_html(date_str: str, title: str, image_results: list[dict]) -> str:
+STYLESHEET = """
+* { margin: 0; padding: 0; box-sizing: border-box; }
+body {
+  font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Hiragino Kaku Gothic ProN', sans-serif;
+  background: #0a0a0a;
+  color: #e0e0e0;
+  line-height: 1.6;
+  padding: 20px;
+  max-width: 900px;
+  margin: 0 auto;
+}
+header {
+  text-align: center;
+  padding: 30px 0;
+  border-bottom: 1px solid #333;
+  margin-bottom: 30px;
+}
+header h1 {
+  font-size: 1.5rem;
+  color: #fff;
+  margin-bottom: 8px;
+}
+header .date, header p {
+  color: #888;
+  font-size: 0.95rem;
+}
+h2 {
+  font-size: 1.3rem;
+  color: #4fc3f7;
+  margin: 30px 0 15px;
+  padding-bottom: 8px;
+  border-bottom: 1px solid #333;
+}
+.trend-card {
+  background: #1a1a2e;
+  border-radius: 12px;
+  padding: 20px;
+  margin-bottom: 25px;
+  border: 1px solid #2a2a4a;
+}
+.trend-card h3 {
+  font-size: 1.15rem;
+  color: #fff;
+  margin-bottom: 10px;
+}
+.trend-card .rank {
+  display: inline-block;
+  background: #ff6b35;
+  color: #fff;
+  padding: 2px 10px;
+  border-radius: 20px;
+  font-size: 0.85rem;
+  font-weight: bold;
+  margin-right: 8px;
+}
+.trend-card .context {
+  color: #aaa;
+  font-size: 0.9rem;
+  margin: 10px 0;
+  white-space: pre-line;
+}
+.image-grid {
+  display: grid;
+  grid-template-columns: repeat(auto-fill, minmax(250px, 1fr));
+  gap: 12px;
+  margin-top: 15px;
+}
+.image-grid figure {
+  background: #111;
+  border-radius: 8px;
+  overflow: hidden;
+}
+.image-grid img {
+  width: 100%;
+  height: 200px;
+  object-fit: cover;
+  display: block;
+  cursor: pointer;
+  transition: opacity 0.2s;
+}
+.image-grid img:hover { opacity: 0.8; }
+.image-grid img.error { display: none; }
+.image-grid figcaption {
+  padding: 8px 10px;
+  font-size: 0.8rem;
+  color: #888;
+  white-space: nowrap;
+  overflow: hidden;
+  text-overflow: ellipsis;
+}
+.fallback-link {
+  display: inline-block;
+  margin-top: 10px;
+  color: #4fc3f7;
+  text-decoration: none;
+  font-size: 0.9rem;
+}
+.fallback-link:hover { text-decoration: underline; }
+.other-item {
+  background: #1a1a2e;
+  border-radius: 8px;
+  padding: 15px;
+  margin-bottom: 15px;
+  border: 1px solid #2a2a4a;
+}
+.other-item h3 {
+  font-size: 1rem;
+  color: #e0e0e0;
+  margin-bottom: 8px;
+}
+.nav {
+  text-align: center;
+  padding: 30px 0;
+  border-top: 1px solid #333;
+  margin-top: 30px;
+}
+.nav a {
+  color: #4fc3f7;
+  text-decoration: none;
+  margin: 0 15px;
+  font-size: 0.95rem;
+}
+.nav a:hover { text-decoration: underline; }
+body.index { line-height: 1.8; max-width: 700px; }
+.index header { padding: 40px 0 30px; }
+.index header h1 { font-size: 1.4rem; }
+.index header p { font-size: 0.9rem; }
+.index ul { list-style: none; }
+.index li { padding: 12px 0; border-bottom: 1px solid #1a1a1a; }
+.index a { color: #4fc3f7; text-decoration: none; font-size: 1rem; }
+.index a:hover { text-decoration: underline; }
+.index .empty { text-align: center; color: #666; padding: 40px 0; }
+.index .months li { display: inline-block; border: none; padding: 4px 12px 4px 0; }
+.index #search { width: 100%; padding: 10px 12px; margin-bottom: 8px; font-size: 1rem; color: #e0e0e0; background: #1a1a1a; border: 1px solid #333; border-radius: 6px; }
+.index #search-results:empty { display: none; }
+@media (max-width: 600px) {
+  body { padding: 12px; }
+  .image-grid { grid-template-columns: 1fr; }
+  .image-grid img { height: 180px; }
+}
+"""
+
+
+def write_stylesheet() -> str:
+    """共有スタイルシートを内容ハッシュ付きのファイル名で書き出し、そのファイル名を返す.
+
+    内容が変わらなければファイル名も変わらないため、ブラウザキャッシュが効き続ける。
+    古いスタイルシートは既存ページが参照しているため削除しない。
+    """
+    digest = hashlib.sha256(STYLESHEET.encode("utf-8")).hexdigest()[:10]
+    filename = f"style.{digest}.css"
+    path = DOCS_DIR / filename
+    if not path.exists():
+        DOCS_DIR.mkdir(parents=True, exist_ok=True)
+        data = STYLESHEET.lstrip().encode("utf-8")
+        path.write_bytes(data)
+        _write_compressed(path, data)
+        logger.info("スタイルシート保存: %s", path)
+    return filename
+
+
+def generate_html(
+    date_str: str, title: str, image_results: list[dict], stylesheet: str = "style.css",
+) -> str:
     """日付別の画像付きまとめHTMLを生成."""
     # トレンドTOP（rank > 0）とその他に分類
     top_trends = sorted([r for r in image_results if r["rank"] > 0], key=lambda x: x["rank"])
@@ -340,141 +628,17 @@ def generate_html(date_str: str, title: str, image_results: list[dict]) -> str:
     {"".join(other_sections)}
 """
 
+    title = _escape_html(title)
+    preconnect = ""
+    if any(r.get("images") for r in image_results):
+        preconnect = '<link rel="preconnect" href="https://images.pexels.com">\n  '
     html = f"""<!DOCTYPE html>
 <html lang="ja">
 <head>
   <meta charset="UTF-8">
   <meta name="viewport" content="width=device-width, initial-scale=1.0">
   <title>{title}</title>
-  <style>
-    * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-    body {{
-      font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Hiragino Kaku Gothic ProN', sans-serif;
-      background: #0a0a0a;
-      color: #e0e0e0;
-      line-height: 1.6;
-      padding: 20px;
-      max-width: 900px;
-      margin: 0 auto;
-    }}
-    header {{
-      text-align: center;
-      padding: 30px 0;
-      border-bottom: 1px solid #333;
-      margin-bottom: 30px;
-    }}
-    header h1 {{
-      font-size: 1.5rem;
-      color: #fff;
-      margin-bottom: 8px;
-    }}
-    header .date {{
-      color: #888;
-      font-size: 0.95rem;
-    }}
-    h2 {{
-      font-size: 1.3rem;
-      color: #4fc3f7;
-      margin: 30px 0 15px;
-      padding-bottom: 8px;
-      border-bottom: 1px solid #333;
-    }}
-    .trend-card {{
-      background: #1a1a2e;
-      border-radius: 12px;
-      padding: 20px;
-      margin-bottom: 25px;
-      border: 1px solid #2a2a4a;
-    }}
-    .trend-card h3 {{
-      font-size: 1.15rem;
-      color: #fff;
-      margin-bottom: 10px;
-    }}
-    .trend-card .rank {{
-      display: inline-block;
-      background: #ff6b35;
-      color: #fff;
-      padding: 2px 10px;
-      border-radius: 20px;
-      font-size: 0.85rem;
-      font-weight: bold;
-      margin-right: 8px;
-    }}
-    .trend-card .context {{
-      color: #aaa;
-      font-size: 0.9rem;
-      margin: 10px 0;
-      white-space: pre-line;
-    }}
-    .image-grid {{
-      display: grid;
-      grid-template-columns: repeat(auto-fill, minmax(250px, 1fr));
-      gap: 12px;
-      margin-top: 15px;
-    }}
-    .image-grid figure {{
-      background: #111;
-      border-radius: 8px;
-      overflow: hidden;
-    }}
-    .image-grid img {{
-      width: 100%;
-      height: 200px;
-      object-fit: cover;
-      display: block;
-      cursor: pointer;
-      transition: opacity 0.2s;
-    }}
-    .image-grid img:hover {{ opacity: 0.8; }}
-    .image-grid img.error {{ display: none; }}
-    .image-grid figcaption {{
-      padding: 8px 10px;
-      font-size: 0.8rem;
-      color: #888;
-      white-space: nowrap;
-      overflow: hidden;
-      text-overflow: ellipsis;
-    }}
-    .fallback-link {{
-      display: inline-block;
-      margin-top: 10px;
-      color: #4fc3f7;
-      text-decoration: none;
-      font-size: 0.9rem;
-    }}
-    .fallback-link:hover {{ text-decoration: underline; }}
-    .other-item {{
-      background: #1a1a2e;
-      border-radius: 8px;
-      padding: 15px;
-      margin-bottom: 15px;
-      border: 1px solid #2a2a4a;
-    }}
-    .other-item h3 {{
-      font-size: 1rem;
-      color: #e0e0e0;
-      margin-bottom: 8px;
-    }}
-    .nav {{
-      text-align: center;
-      padding: 30px 0;
-      border-top: 1px solid #333;
-      margin-top: 30px;
-    }}
-    .nav a {{
-      color: #4fc3f7;
-      text-decoration: none;
-      margin: 0 15px;
-      font-size: 0.95rem;
-    }}
-    .nav a:hover {{ text-decoration: underline; }}
-    @media (max-width: 600px) {{
-      body {{ padding: 12px; }}
-      .image-grid {{ grid-template-columns: 1fr; }}
-      .image-grid img {{ height: 180px; }}
-    }}
-  </style>
+  {preconnect}<link rel="stylesheet" href="{stylesheet}">
 </head>
 <body>
   <header>
@@ -515,15 +679,7 @@ def _render_trend_section(item: dict) -> str:
     if item.get("images"):
         figures = []
         for img in item["images"]:
-            img_url = _escape_html(img["url"])
-            img_title = _escape_html(img.get("title", ""))
-            source = _escape_html(img.get("source", ""))
-            figures.append(f"""      <figure>
-        <a href="{img_url}" target="_blank" rel="noopener">
-          <img src="{img_url}" alt="{img_title}" loading="lazy">
-        </a>
-        <figcaption>{source}</figcaption>
-      </figure>""")
+            figures.append(_render_figure(img, img.get("title", "")))
         images_html = f"""    <div class="image-grid">
 {chr(10).join(figures)}
     </div>"""
@@ -550,14 +706,7 @@ def _render_other_section(item: dict) -> str:
     if item.get("images"):
         figures = []
         for img in item["images"][:2]:
-            img_url = _escape_html(img["url"])
-            source = _escape_html(img.get("source", ""))
-            figures.append(f"""      <figure>
-        <a href="{img_url}" target="_blank" rel="noopener">
-          <img src="{img_url}" alt="{name}" loading="lazy">
-        </a>
-        <figcaption>{source}</figcaption>
-      </figure>""")
+            figures.append(_render_figure(img, item["name_en"]))
         images_html = f"""    <div class="image-grid">
 {chr(10).join(figures)}
     </div>"""
@@ -572,6 +721,25 @@ def _render_other_section(item: dict) -> str:
 """
 
 
+def _render_figure(img: dict, alt: str) -> str:
+    """画像1枚のHTML。Pexels の small/medium/large から srcset を組み、遅延読み込みする."""
+    img_url = _escape_html(img["url"])
+    source = _escape_html(img.get("source", ""))
+    sizes = img.get("sizes") or {}
+    srcset = ", ".join(
+        f"{_escape_html(sizes[size])} {width}w"
+        for size, width in IMAGE_VARIANT_WIDTHS.items() if sizes.get(size)
+    )
+    src = _escape_html(sizes.get("medium") or img["url"])
+    srcset_attr = f' srcset="{srcset}" sizes="{IMAGE_SIZES}"' if srcset else ""
+    return f"""      <figure>
+        <a href="{img_url}" target="_blank" rel="noopener">
+          <img src="{src}"{srcset_attr} alt="{_escape_html(alt)}" width="400" height="200" loading="lazy" decoding="async">
+        </a>
+        <figcaption>{source}</figcaption>
+      </figure>"""
+
+
 def _escape_html(text: str) -> str:
     """HTML特殊文字をエスケープ."""
     return (
@@ -587,11 +755,20 @@ def _escape_html(text: str) -> str:
 # 5. インデックスページ生成
 # ────────────────────────────────────────────
 
-def generate_index_html(pages: list[dict]) -> str:
+def generate_index_html(
+    pages: list[dict],
+    stylesheet: str = "style.css",
+    months: list[str] | None = None,
+    heading: str = "ポッドキャスト画像まとめ",
+    search: bool = False,
+) -> str:
     """日付別ページ一覧のインデックスHTML.
 
     Args:
         pages: [{"date": str, "title": str, "filename": str}, ...]
+        months: 月別アーカイブへのリンク（"YYYY-MM" のリスト）
+        heading: ヘッダーの副題
+        search: True なら検索ボックスを置く（索引は search/ のシャードを必要な分だけ取得）
     """
     # 日付降順でソート
     pages_sorted = sorted(pages, key=lambda x: x["date"], reverse=True)
@@ -603,142 +780,332 @@ def generate_index_html(pages: list[dict]) -> str:
         fname = _escape_html(p["filename"])
         rows.append(f'      <li><a href="{fname}">{date} - {title}</a></li>')
 
+    months_html = ""
+    if months:
+        links = "".join(
+            f'<li><a href="{_archive_filename(m)}">{m}</a></li>'
+            for m in sorted(months, reverse=True)
+        )
+        months_html = f"""
+  <h2>月別アーカイブ</h2>
+  <ul class="months">{links}</ul>"""
+
+    search_html = ""
+    if search:
+        search_html = f"""
+  <input id="search" type="search" placeholder="トレンド名・ヘッドライン・地域で検索" autocomplete="off">
+  <ul id="search-results"></ul>
+  <script>{SEARCH_SCRIPT}</script>"""
+
     return f"""<!DOCTYPE html>
 <html lang="ja">
 <head>
   <meta charset="UTF-8">
   <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>海外フードトレンド - ポッドキャスト画像まとめ</title>
-  <style>
-    * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-    body {{
-      font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Hiragino Kaku Gothic ProN', sans-serif;
-      background: #0a0a0a;
-      color: #e0e0e0;
-      line-height: 1.8;
-      padding: 20px;
-      max-width: 700px;
-      margin: 0 auto;
-    }}
-    header {{
-      text-align: center;
-      padding: 40px 0 30px;
-      border-bottom: 1px solid #333;
-      margin-bottom: 30px;
-    }}
-    header h1 {{
-      font-size: 1.4rem;
-      color: #fff;
-      margin-bottom: 8px;
-    }}
-    header p {{
-      color: #888;
-      font-size: 0.9rem;
-    }}
-    ul {{
-      list-style: none;
-    }}
-    li {{
-      padding: 12px 0;
-      border-bottom: 1px solid #1a1a1a;
-    }}
-    a {{
-      color: #4fc3f7;
-      text-decoration: none;
-      font-size: 1rem;
-    }}
-    a:hover {{ text-decoration: underline; }}
-    .empty {{
-      text-align: center;
-      color: #666;
-      padding: 40px 0;
-    }}
-  </style>
+  <title>海外フードトレンド - {_escape_html(heading)}</title>
+  <link rel="stylesheet" href="{stylesheet}">
 </head>
-<body>
+<body class="index">
   <header>
     <h1>海外フードトレンド</h1>
-    <p>ポッドキャスト画像まとめ</p>
+    <p>{_escape_html(heading)}</p>
   </header>
+{search_html}
 
   {"<p class='empty'>まだページがありません</p>" if not rows else f"<ul>{chr(10).join(rows)}{chr(10)}    </ul>"}
+{months_html}
 </body>
 </html>"""
 
 
+def _archive_filename(month: str) -> str:
+    return f"archive-{month}.html"
+
+
 # ────────────────────────────────────────────
 # 6. メイン実行
 # ────────────────────────────────────────────
 
+MANIFEST_FILE = DOCS_DIR / "manifest.json"
+SEARCH_DIR = DOCS_DIR / "search"
+# ページごとの検索語（索引の差分更新にだけ使うので公開ディレクトリの外に置く）
+SEARCH_TERMS_FILE = Path(__file__).resolve().parent.parent / "data" / "search_terms.json"
+# インデックスに直接並べる最新ページ数（それより前は月別アーカイブから辿る）
+INDEX_RECENT_PAGES = 30
+# 転送サイズの増加をエラーとして報告する割合（%。基準は同じページの前回の記録）
+SIZE_REGRESSION_PCT = 25
+
+
+def minify_html(html: str) -> str:
+    """行頭のインデントとタグ間の空白を除く（テキスト中の改行は残す）."""
+    html = re.sub(r"^[ \t]+", "", html, flags=re.M)
+    html = re.sub(r">\s+<", "><", html)
+    return html.strip()
+
+
+def _write_compressed(path: Path, data: bytes) -> dict:
+    """.gz（と brotli があれば .br）の圧縮版を隣に書き出し、各サイズを返す."""
+    sizes = {"raw": len(data)}
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    path.with_name(path.name + ".gz").write_bytes(gz)
+    sizes["gzip"] = len(gz)
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        path.with_name(path.name + ".br").write_bytes(br)
+        sizes["br"] = len(br)
+    return sizes
+
+
 def save_page(html: str, filename: str) -> Path:
-    """HTMLファイルを保存."""
+    """HTMLを最小化して保存し、圧縮版も書き出す."""
     DOCS_DIR.mkdir(parents=True, exist_ok=True)
     path = DOCS_DIR / filename
-    path.write_text(html, encoding="utf-8")
-    logger.info("ページ保存: %s", path)
+    data = minify_html(html).encode("utf-8")
+    path.write_bytes(data)
+    sizes = _write_compressed(path, data)
+    logger.info(
+        "ページ保存: %s（%s）", path,
+        " / ".join(f"{k} {v:,}B" for k, v in {"source": len(html.encode("utf-8")), **sizes}.items()),
+    )
     return path
 
 
-def update_index():
-    """既存のHTMLページを走査してインデックスを更新."""
-    DOCS_DIR.mkdir(parents=True, exist_ok=True)
-    pages = []
+def _output_sizes(path: Path, source_bytes: int) -> dict:
+    """保存したページのバイト数（元・最小化・各圧縮版）を返す（マニフェストに記録してサイズの推移を追う）."""
+    sizes = {"source": source_bytes, "raw": path.stat().st_size}
+    for ext, key in ((".gz", "gzip"), (".br", "br")):
+        sibling = path.with_name(path.name + ext)
+        if sibling.exists():
+            sizes[key] = sibling.stat().st_size
+    return sizes
+
+
+def check_size_regression(manifest: dict, target_date: str, sizes: dict) -> list[str]:
+    """同じページの前回の記録より SIZE_REGRESSION_PCT を超えて大きくなったサイズを報告する.
+
+    新しいページ（前回の記録がない）は比べない。増えたサイズの種類を返す。
+    """
+    before_sizes = manifest["pages"].get(target_date, {}).get("bytes") or {}
+    grown = []
+    for key in ("raw", "gzip", "br"):
+        before, after = before_sizes.get(key), sizes.get(key)
+        if not before or not after:
+            continue
+        growth = 100 * (after - before) / before
+        if growth > SIZE_REGRESSION_PCT:
+            grown.append(key)
+            logger.error(
+                "ページサイズが増加: %s の %s が %s B → %s B（+%.0f%%、許容 %d%%）",
+                target_date, key, f"{before:,}", f"{after:,}", growth, SIZE_REGRESSION_PCT,
+            )
+    return grown
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _load_manifest() -> dict:
+    """ページ一覧のマニフェストを読み込む。なければ既存ページから1度だけ作る.
+
+    形式: {"pages": {日付: {"title", "filename", "hash", "bytes", "keywords"}}}
+    """
+    if MANIFEST_FILE.exists():
+        try:
+            return json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning("マニフェスト読み込み失敗、既存ページから作り直します: %s", e)
+
+    pages = {}
     for html_file in sorted(DOCS_DIR.glob("????-??-??.html")):
-        date_str = html_file.stem
-        # タイトルをHTMLから抽出
         content = html_file.read_text(encoding="utf-8")
         title_match = re.search(r"<title>(.+?)</title>", content)
-        title = title_match.group(1) if title_match else date_str
-        pages.append({
-            "date": date_str,
-            "title": title,
+        pages[html_file.stem] = {
+            "title": unescape(title_match.group(1)) if title_match else html_file.stem,
             "filename": html_file.name,
-        })
+            "hash": _content_hash(content),
+            "keywords": [],
+        }
+    logger.info("マニフェストを既存ページから作成: %d ページ", len(pages))
+    return {"pages": pages}
+
 
-    index_html = generate_index_html(pages)
-    save_page(index_html, "index.html")
-    logger.info("インデックス更新: %d ページ", len(pages))
+def _save_manifest(manifest: dict) -> None:
+    DOCS_DIR.mkdir(parents=True, exist_ok=True)
+    MANIFEST_FILE.write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8"
+    )
 
 
-def run(target_date: str | None = None):
-    """ポッドキャスト画像ページの生成を実行.
+def _texts_from_html(content: str) -> list[str]:
+    """生成済みページの見出し（トレンド名・ヘッドライン）を取り出す."""
+    texts = []
+    for heading in re.findall(r"<h3>(.*?)</h3>", content, flags=re.S):
+        heading = re.sub(r'<span class="rank">.*?</span>|<[^>]+>', "", heading)
+        texts.extend(t.strip() for t in re.split(r"[（）]", unescape(heading)) if t.strip())
+    return texts
 
-    Args:
-        target_date: 対象日付（YYYY-MM-DD）。Noneなら今日。
+
+def _backfill_search_index(manifest: dict) -> bool:
+    """検索索引にないページを既存のHTMLから登録する（マニフェストのキーワードも補う）.
+
+    マニフェストを既存ページから作った回はキーワードが空なので、そのままだと
+    検索に出てこない。登録したページがあれば True.
     """
-    logger.info("=== ポッドキャスト画像ページ生成 開始 ===")
+    indexed = indexed_pages(SEARCH_DIR, SEARCH_TERMS_FILE)
+    added = 0
+    for page_id, entry in sorted(manifest["pages"].items()):
+        path = DOCS_DIR / entry["filename"]
+        if page_id in indexed or not path.exists():
+            continue
+        texts = _texts_from_html(path.read_text(encoding="utf-8"))
+        if not entry.get("keywords"):
+            entry["keywords"] = texts
+        update_search_index(SEARCH_DIR, SEARCH_TERMS_FILE, page_id, entry["title"], texts)
+        added += 1
+    if added:
+        logger.info("既存ページを検索索引に登録: %d ページ", added)
+    return bool(added)
+
+
+def _write_if_changed(filename: str, html: str) -> bool:
+    """内容が変わったときだけ書き込む。書き込んだら True."""
+    path = DOCS_DIR / filename
+    if path.exists() and path.read_text(encoding="utf-8") == minify_html(html):
+        return False
+    save_page(html, filename)
+    return True
 
-    if not target_date:
-        target_date = datetime.now(JST).strftime("%Y-%m-%d")
 
-    # Step 1: Notion からページ取得
-    page_data = fetch_latest_daily_page(target_date)
-    if not page_data:
-        logger.error("Notionからデータを取得できませんでした")
-        return None
+def update_index(manifest: dict | None = None, changed_dates: list[str] | None = None) -> None:
+    """マニフェストからインデックスと月別アーカイブを生成する.
+
+    インデックスは最新 INDEX_RECENT_PAGES 件だけを並べ、月別アーカイブは
+    changed_dates の月だけを作り直す（省略時は全月）。
+    どちらも内容が変わらなければ書き込まない。
+    """
+    DOCS_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = manifest or _load_manifest()
+    stylesheet = write_stylesheet()
+    pages = [{"date": d, **entry} for d, entry in manifest["pages"].items()]
+    pages.sort(key=lambda p: p["date"], reverse=True)
+    months = sorted({p["date"][:7] for p in pages})
 
-    # Step 2: キーワード抽出
-    keywords = extract_keywords(page_data["blocks"])
+    index_html = generate_index_html(pages[:INDEX_RECENT_PAGES], stylesheet, months, search=True)
+    _write_if_changed("index.html", index_html)
+
+    target_months = months if changed_dates is None else sorted({d[:7] for d in changed_dates})
+    for month in target_months:
+        month_pages = [p for p in pages if p["date"].startswith(month)]
+        archive_html = generate_index_html(month_pages, stylesheet, heading=f"{month} のページ")
+        _write_if_changed(_archive_filename(month), archive_html)
+    logger.info("インデックス更新: %d ページ（アーカイブ %d か月分を確認）", len(pages), len(target_months))
+
+
+def _build_page(target_date: str, title: str, keywords: list[dict]) -> Path | None:
+    """キーワードから画像検索・HTML生成・保存・インデックス更新を行う.
+
+    生成したHTMLがマニフェストのハッシュと同じなら書き込みもインデックス更新もしない。
+    """
     if not keywords:
         logger.warning("キーワードが抽出できませんでした")
         return None
     logger.info("抽出キーワード: %d 件", len(keywords))
 
-    # Step 3: 画像検索
+    # 画像検索
     image_results = search_images(keywords)
 
-    # Step 4: HTML生成
-    html = generate_html(target_date, page_data["title"], image_results)
-
-    # Step 5: 保存
+    # HTML生成
+    bootstrapped = not MANIFEST_FILE.exists()
+    manifest = _load_manifest()
+    if _backfill_search_index(manifest):
+        _save_manifest(manifest)
+    stylesheet = write_stylesheet()
+    html = generate_html(target_date, title, image_results, stylesheet)
     filename = f"{target_date}.html"
+    path = DOCS_DIR / filename
+    digest = _content_hash(html)
+    previous = manifest["pages"].get(target_date)
+    if previous and previous.get("hash") == digest and path.exists():
+        logger.info("ページに変更なし: %s", filename)
+        return path
+
+    # 保存・マニフェストとインデックスの更新
     save_page(html, filename)
+    sizes = _output_sizes(path, len(html.encode("utf-8")))
+    check_size_regression(manifest, target_date, sizes)
+    manifest["pages"][target_date] = {
+        "title": title,
+        "filename": filename,
+        "hash": digest,
+        "bytes": sizes,
+        "keywords": [
+            name for kw in keywords for name in (kw.get("name_en"), kw.get("name_ja")) if name
+        ],
+    }
+    _save_manifest(manifest)
+    update_search_index(SEARCH_DIR, SEARCH_TERMS_FILE, target_date, title, [
+        text for kw in keywords
+        for text in (kw.get("name_en"), kw.get("name_ja"), kw.get("region")) if text
+    ])
+    # マニフェストを作ったばかりの回は全月のアーカイブを作る
+    update_index(manifest, None if bootstrapped else [target_date])
+    return path
 
-    # Step 6: インデックス更新
-    update_index()
 
-    logger.info("=== ポッドキャスト画像ページ生成 完了 ===")
-    return DOCS_DIR / filename
+def run_from_analysis(
+    analysis: dict, target_date: str | None = None, document: dict | None = None,
+) -> Path | None:
+    """手元の日報分析データからポッドキャスト画像ページを生成する.
+
+    Notion に保存した内容を取得し直さず、分析結果（またはドキュメント）から
+    直接キーワードを取り出す。
+
+    Args:
+        analysis: 日報の分析結果
+        target_date: 対象日付（YYYY-MM-DD）。Noneなら今日。
+        document: build_daily で組み立て済みのドキュメント（省略時はここで組み立てる）
+    """
+    logger.info("=== ポッドキャスト画像ページ生成 開始 ===")
+    if not target_date:
+        target_date = datetime.now(JST).strftime("%Y-%m-%d")
+
+    keywords = keywords_from_document(document or build_daily(analysis))
+    path = _build_page(target_date, f"日報 {target_date}", keywords)
+    if path:
+        logger.info("=== ポッドキャスト画像ページ生成 完了 ===")
+    return path
+
+
+def run(target_date: str | None = None, use_notion: bool = False) -> Path | None:
+    """保存済みの日報からポッドキャスト画像ページを生成する（単体実行・過去分の作り直し用）.
+
+    data/daily_reports（または月別アーカイブ）にその日の日報があればそれを使い、
+    なければ Notion から日報ページを取得してキーワードを抽出する。
+
+    Args:
+        target_date: 対象日付（YYYY-MM-DD）。Noneなら今日。
+        use_notion: True なら保存済みの日報を見ずに Notion から取得する
+    """
+    if not target_date:
+        target_date = datetime.now(JST).strftime("%Y-%m-%d")
+
+    if not use_notion:
+        analysis = load_daily_report(target_date)
+        if analysis:
+            return run_from_analysis(analysis, target_date)
+        logger.info("保存済みの日報がないため Notion から取得します: %s", target_date)
+
+    logger.info("=== ポッドキャスト画像ページ生成 開始（Notion） ===")
+    page_data = fetch_latest_daily_page(target_date)
+    if not page_data:
+        logger.error("Notionからデータを取得できませんでした")
+        return None
+
+    path = _build_page(target_date, page_data["title"], extract_keywords(page_data["blocks"]))
+    if path:
+        logger.info("=== ポッドキャスト画像ページ生成 完了 ===")
+    return path
 
 
 if __name__ == "__main__":
@@ -753,6 +1120,7 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="ポッドキャスト画像ページ生成")
     parser.add_argument("--date", help="対象日付 (YYYY-MM-DD)", default=None)
+    parser.add_argument("--notion", action="store_true", help="保存済みの日報ではなく Notion から取得する")
     args = parser.parse_args()
 
-    run(args.date)
+    run(args.date, use_notion=args.notion)
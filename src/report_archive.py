@@ -0,0 +1,75 @@
+"""古い日報データの月別圧縮アーカイブ.
+
+保持期間を過ぎた日報 JSON を削除せず、月ごとの gzip JSONL
+（data/archive/YYYY-MM.jsonl.gz）に追記する。各日は独立した gzip メンバーとして
+書き込み、バイトオフセットと長さを索引（YYYY-MM.idx.json）に記録するため、
+任意の日をその日のメンバーだけ読んで復元できる（月全体の展開は不要）。
+ファイル全体は通常の複数メンバー gzip なので zcat でも読める。
+"""
+
+import gzip
+import json
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = Path(__file__).resolve().parent.parent / "data" / "archive"
+
+
+def _paths(date_str: str) -> tuple[Path, Path]:
+    month = date_str[:7]
+    return ARCHIVE_DIR / f"{month}.jsonl.gz", ARCHIVE_DIR / f"{month}.idx.json"
+
+
+def _load_index(idx_path: Path) -> dict:
+    if not idx_path.exists():
+        return {}
+    try:
+        return json.loads(idx_path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning("アーカイブ索引の読み込み失敗 (%s): %s", idx_path.name, e)
+        return {}
+
+
+def archive_report(date_str: str, analysis: dict) -> None:
+    """1日分の日報を月別アーカイブに追記する（同日の再アーカイブは索引を差し替え）."""
+    data_path, idx_path = _paths(date_str)
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+
+    line = json.dumps(
+        {"date": date_str, "analysis": analysis},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ) + "\n"
+    member = gzip.compress(line.encode("utf-8"), compresslevel=9, mtime=0)
+
+    with data_path.open("ab") as f:
+        offset = f.tell()
+        f.write(member)
+
+    index = _load_index(idx_path)
+    index[date_str] = [offset, len(member)]
+    idx_path.write_text(
+        json.dumps(dict(sorted(index.items())), separators=(",", ":")),
+        encoding="utf-8",
+    )
+
+
+def load_archived_report(date_str: str) -> dict | None:
+    """アーカイブから1日分の日報を読み込む。なければ None."""
+    data_path, idx_path = _paths(date_str)
+    entry = _load_index(idx_path).get(date_str)
+    if not entry or not data_path.exists():
+        return None
+
+    offset, length = entry
+    try:
+        with data_path.open("rb") as f:
+            f.seek(offset)
+            member = f.read(length)
+        return json.loads(gzip.decompress(member).decode("utf-8"))["analysis"]
+    except (OSError, EOFError, json.JSONDecodeError, KeyError) as e:
+        logger.warning("アーカイブ読み込み失敗 (%s): %s", date_str, e)
+        return None
+
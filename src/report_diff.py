@@ -0,0 +1,177 @@
+"""日報ドキュメントの複数日差分.
+
+今日のドキュメント（report_document）を直近 N 日分の日報と比べ、
+各項目を次のどれかに分類する。
+
+- new: 期間内のどの日報にもない
+- updated: 直前の日報にあり、内容が変わった
+- continuing: 直前の日報にあり、内容もほぼ同じ
+- resurfaced: 直前の日報にはないが、期間内のそれより前の日報にある
+
+比較はセクション単位（グループをまたいだ移動は同じ項目とみなす）。
+過去の項目は正規化した ID のハッシュ索引と、文字 n-gram の転置索引に
+1度だけ載せるため、期間を延ばしても1項目あたりの照合コストはほぼ一定。
+
+- トレンド TOP3: trend_index と同じ基準（is_name_match）で
+  英語名・日本語名のどちらかが一致すれば同じトレンド
+- ヘッドライン等: 正規化後の完全一致、または n-gram の Dice 係数が
+  HEADLINE_DICE 以上なら同じ項目（1語だけ書き換えた見出しを拾う）
+"""
+
+import logging
+from collections import Counter, defaultdict
+
+from report_document import iter_items
+from trend_index import is_name_match, name_key, ngrams, normalize
+
+logger = logging.getLogger(__name__)
+
+# 比較する過去日報の日数
+DIFF_WINDOW_DAYS = 7
+# ヘッドラインのあいまい一致の閾値
+HEADLINE_DICE = 0.7
+# 本文の n-gram Dice 係数がこれ未満なら「更新あり」
+ENTRY_CHANGE_DICE = 0.6
+
+
+def _is_headline_match(shared: int, size_a: int, size_b: int) -> bool:
+    return 2 * shared / (size_a + size_b) >= HEADLINE_DICE
+
+
+class _FuzzyKeyIndex:
+    """正規化キーのハッシュ索引 + n-gram 転置索引.
+
+    値には登録順の連番を入れる（ReportHistory は新しい日から登録する）。
+    is_match(共有 n-gram 数, 検索側の n-gram 数, 登録側の n-gram 数) で一致を判定する。
+    """
+
+    def __init__(self, is_match):
+        self._is_match = is_match
+        self._exact: dict[str, int] = {}
+        self._grams: list[tuple[set[str], int]] = []
+        self._postings: dict[str, set[int]] = defaultdict(set)
+
+    def add(self, key: str, value: int) -> None:
+        norm = normalize(key)
+        if not norm or name_key(key) in self._exact:
+            return
+        self._exact[name_key(key)] = value
+        idx = len(self._grams)
+        grams = ngrams(norm)
+        self._grams.append((grams, value))
+        for g in grams:
+            self._postings[g].add(idx)
+
+    def find(self, key: str) -> int | None:
+        """一致する値のうち最小のもの（登録順が新しい日から＝直近の出現）を返す."""
+        norm = normalize(key)
+        if not norm:
+            return None
+        matches = []
+        if name_key(key) in self._exact:
+            matches.append(self._exact[name_key(key)])
+        grams = ngrams(norm)
+        counts: Counter = Counter()
+        for g in grams:
+            for idx in self._postings.get(g, ()):
+                counts[idx] += 1
+        for idx, shared in counts.items():
+            past, value = self._grams[idx]
+            if self._is_match(shared, len(grams), len(past)):
+                matches.append(value)
+        return min(matches) if matches else None
+
+
+def _text_similarity(a: str, b: str) -> float:
+    ga, gb = ngrams(normalize(a)), ngrams(normalize(b))
+    if not ga and not gb:
+        return 1.0
+    if not ga or not gb:
+        return 0.0
+    return 2 * len(ga & gb) / (len(ga) + len(gb))
+
+
+def _field_texts(item: dict) -> dict[str, str]:
+    return {f["key"]: f["text"] for f in item["fields"]}
+
+
+def _is_changed(item: dict, prev_item: dict) -> bool:
+    if item["style"] == "card":
+        return item["rank"] != prev_item["rank"] or _field_texts(item) != _field_texts(prev_item)
+    current, previous = _field_texts(item), _field_texts(prev_item)
+    return any(
+        _text_similarity(text, previous.get(key, "")) < ENTRY_CHANGE_DICE
+        for key, text in current.items()
+    )
+
+
+class ReportHistory:
+    """直近 N 日分の日報ドキュメントの索引.
+
+    documents は新しい順（先頭が直前の日報）。
+    """
+
+    def __init__(self, documents: list[dict]):
+        self._entries: list[tuple[int, dict]] = []
+        self._indexes: dict[str, _FuzzyKeyIndex] = {}
+        for day, document in enumerate(documents):
+            for section, _group, item in iter_items(document):
+                index = self._indexes.get(section["key"])
+                if index is None:
+                    if item["style"] == "card":
+                        index = _FuzzyKeyIndex(is_name_match)
+                    else:
+                        index = _FuzzyKeyIndex(_is_headline_match)
+                    self._indexes[section["key"]] = index
+                entry_id = len(self._entries)
+                self._entries.append((day, item))
+                # 新しい日から登録するため、同じキーは直近の出現が優先される
+                for key in _match_keys(item):
+                    index.add(key, entry_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find(self, section_key: str, item: dict) -> tuple[int, dict] | None:
+        """(何日前の日報か（0 が直前）, 過去の項目) を返す。なければ None."""
+        index = self._indexes.get(section_key)
+        if index is None:
+            return None
+        for key in _match_keys(item):
+            entry_id = index.find(key)
+            if entry_id is not None:
+                return self._entries[entry_id]
+        return None
+
+    def classify(self, document: dict) -> dict[tuple, str]:
+        """今日のドキュメントの各項目を分類する.
+
+        Returns:
+            (セクションキー, グループキー, 項目ID) → "new" | "updated" | "continuing" | "resurfaced"
+        """
+        statuses = {}
+        for section, group, item in iter_items(document):
+            found = self.find(section["key"], item)
+            if found is None:
+                status = "new"
+            elif found[0] > 0:
+                status = "resurfaced"
+            elif _is_changed(item, found[1]):
+                status = "updated"
+            else:
+                status = "continuing"
+            statuses[(section["key"], group["key"], item["id"])] = status
+
+        counts = Counter(statuses.values())
+        logger.info(
+            "前回比較（過去 %d 項目）: 新規 %d / 更新 %d / 継続 %d / 再浮上 %d",
+            len(self), counts["new"], counts["updated"], counts["continuing"], counts["resurfaced"],
+        )
+        return statuses
+
+
+def _match_keys(item: dict) -> list[str]:
+    """照合に使うキー。トレンドは英語名・日本語名の両方."""
+    if item["style"] == "card":
+        return [k for k in (item["name_en"], item["name_ja"]) if k]
+    return [item["id"]] if item["id"] else []
@@ -0,0 +1,399 @@
+"""日報・週報の中間表現（ドキュメントモデル）.
+
+分析結果の dict を1度だけ走査して「セクション → グループ → 項目」の木に変換する。
+LINE テキスト（report_generator）、Notion ブロック（notion_writer）、
+ポッドキャスト原稿（podcast_prep）、画像まとめページ（podcast_page）は
+どれもこの木を描画するだけで、セクションごとの取り出し処理は持たない。
+セクションを増やすときは build_daily / build_weekly に1か所足せばよい。
+
+構造（すべて dict）:
+    document = {"kind": "daily" | "weekly", "sections": [section, ...]}
+    section  = {"key", "title", "text", "spoken", "footnote", "groups": [group, ...]}
+    group    = {"key", "label", "spoken", "items": [item, ...]}
+    item     = {"id", "style", "bullet", "badge", "title", "fields": [field, ...],
+                "references", "spoken": [str, ...]}
+    field    = {"key", "label", "text", "kind"}
+
+- section.text: 見出し直下の本文（サマリー等）。spoken は原稿での導入文
+- item.bullet: 見出しの前に付ける記号（区切りの空白込み）
+- item.style: "card"（トレンド TOP3。rank / name_en / name_ja / spoken_new を持つ）
+  または "entry"（見出し付きの1項目）
+- item.id: 前回との比較に使う識別子（トレンド名・ヘッドライン等）
+- field.kind: "meta"（「ラベル: 値」の短い行）、"body"（折り返す本文）、
+  "note"（→ 付きの示唆）
+- spoken: 音声原稿用の文。None や空の項目は読み上げない
+"""
+
+LIFECYCLE_LEGEND = (
+    "※ステージ凡例:\n"
+    "■□□□□ 発生期 → ■■□□□ 成長初期\n"
+    "→ ■■■□□ 成長期 → ■■■■□ ピーク期\n"
+    "→ ■■■■■ 日本波及開始"
+)
+
+ASIA_REGIONS = [
+    ("china", "中国"), ("korea", "韓国"), ("taiwan", "台湾"), ("southeast_asia", "東南アジア"),
+]
+WEEKLY_REGIONS = [
+    ("china", "中国"), ("taiwan", "台湾"), ("korea", "韓国"), ("southeast_asia", "東南アジア"),
+]
+
+
+# ────────────────────────────────────────────
+# 部品
+# ────────────────────────────────────────────
+
+def _section(key: str, title: str, groups: list[dict] | None = None, *,
+             text: str = "", spoken: str = "", footnote: str = "") -> dict:
+    return {
+        "key": key, "title": title, "text": text, "spoken": spoken,
+        "footnote": footnote, "groups": groups or [],
+    }
+
+
+def _group(key: str, label: str, items: list[dict], spoken: str = "") -> dict:
+    return {"key": key, "label": label, "spoken": spoken, "items": items}
+
+
+def _field(key: str, label: str, text, kind: str = "meta") -> dict:
+    return {"key": key, "label": label, "text": text or "", "kind": kind}
+
+
+def _entry(item_id: str, title: str, fields: list[dict], *, bullet: str = "▸ ",
+           badge: str = "", references: list | None = None,
+           spoken: list[str] | None = None) -> dict:
+    return {
+        "id": item_id, "style": "entry", "bullet": bullet, "badge": badge, "title": title,
+        "fields": [f for f in fields if f["text"]],
+        "references": references or [], "spoken": [s for s in spoken or [] if s],
+    }
+
+
+def _spoken(template: str, value) -> str:
+    return template.format(value) if value else ""
+
+
+# ────────────────────────────────────────────
+# 日報
+# ────────────────────────────────────────────
+
+def _trend_card(t: dict) -> dict:
+    rank = t.get("rank", "?")
+    name_en = t.get("name_en", "Unknown")
+    name_ja = t.get("name_ja", "")
+    name_display = f"{name_en}（{name_ja}）" if name_ja else name_en
+    detected = ", ".join(t.get("detected_on", []))
+    stage = t.get("lifecycle_stage", "")
+    landing = t.get("japan_landing_estimate", "")
+
+    fields = [
+        _field("origin", "発祥", t.get("origin") or "不明"),
+        _field("detected_on", "検出", detected or "-"),
+        _field("metrics", "指標", t.get("metrics") or "N/A"),
+        _field("lifecycle", "ステージ", f"{t.get('lifecycle_bar', '□□□□□')} {stage or '不明'}"),
+        _field("japan_landing_estimate", "日本上陸予測", landing or "不明"),
+        _field("why_trending", "流行理由", t.get("why_trending"), "body"),
+        _field("japan_market_fit", "日本市場", t.get("japan_market_fit"), "body"),
+        _field("procurement_note", "調達可能性", t.get("procurement_note"), "body"),
+    ]
+    spoken = [
+        _spoken("指標としては{}となっています。", t.get("metrics")),
+        f"現在のステージは{stage}で、日本上陸は{landing}と予測されます。"
+        if stage and landing else "",
+        _spoken("流行の理由は、{}", t.get("why_trending")),
+        _spoken("日本市場との親和性について、{}", t.get("japan_market_fit")),
+        _spoken("調達面では、{}", t.get("procurement_note")),
+    ]
+    return {
+        "id": t.get("name_en", ""),
+        "style": "card",
+        "bullet": "",
+        "badge": "",
+        "title": f"【{rank}位】{name_display}",
+        "rank": rank,
+        "name_en": name_en,
+        "name_ja": name_ja,
+        "fields": [f for f in fields if f["text"]],
+        "references": t.get("references", []),
+        "spoken_new": [
+            f"発祥は{t.get('origin', '不明')}で、{detected}で検出されました。"
+        ],
+        "spoken": [s for s in spoken if s],
+    }
+
+
+def _news_entry(item: dict, note_label: str, spoken_note: str) -> dict:
+    headline = item.get("headline", "")
+    detail = item.get("detail", "")
+    impl = item.get("implication", "")
+    return _entry(
+        headline,
+        headline,
+        [_field("detail", "", detail, "body"), _field("implication", note_label, impl, "note")],
+        references=item.get("references", []),
+        spoken=[f"{headline}。{detail}", _spoken(spoken_note, impl)],
+    )
+
+
+def build_daily(analysis: dict) -> dict:
+    """日報の分析結果をドキュメントに変換する."""
+    sections = []
+
+    summary = analysis.get("executive_summary", "")
+    if summary:
+        sections.append(_section(
+            "executive_summary", "エグゼクティブサマリー",
+            text=summary, spoken="まず、今日の要点です。",
+        ))
+
+    top_trends = analysis.get("top_trends", [])
+    if top_trends:
+        sections.append(_section(
+            "top_trends", "注目トレンド商品 TOP3",
+            [_group("top_trends", "", [_trend_card(t) for t in top_trends])],
+            spoken="注目トレンド商品についてです。",
+            footnote=LIFECYCLE_LEGEND,
+        ))
+
+    asia = analysis.get("asia_trends", {})
+    if asia:
+        groups = [
+            _group(key, label, [
+                _news_entry(item, "", "マルイ物産への示唆として、{}")
+                for item in asia.get(key, [])
+            ], spoken=f"{label}からは、")
+            for key, label in ASIA_REGIONS
+        ]
+        sections.append(_section(
+            "asia_trends", "アジア市場トレンド", groups,
+            spoken="次に、アジア市場の新しい動きです。",
+        ))
+
+    news = analysis.get("industry_news", {})
+    if news:
+        groups = [
+            _group(key, label, [
+                _news_entry(item, "マルイ物産への示唆", "マルイ物産への示唆は、{}")
+                for item in news.get(key, [])
+            ], spoken=f"{spoken}の新しい動きとして、")
+            for key, label, spoken in [("western", "米国・欧州", "欧米"), ("asian", "アジア", "アジア")]
+        ]
+        sections.append(_section(
+            "industry_news", "外食産業ニュース", groups,
+            spoken="外食産業ニュースに移ります。",
+        ))
+
+    foodtech = analysis.get("foodtech", [])
+    if foodtech:
+        items = []
+        for item in foodtech:
+            headline = item.get("headline", "")
+            detail = item.get("detail", "")
+            items.append(_entry(
+                headline,
+                headline,
+                [_field("detail", "", detail, "body"), _field("impact", "影響", item.get("impact"))],
+                references=item.get("references", []),
+                spoken=[f"{headline}。{detail}",
+                        _spoken("外食産業への影響として、{}", item.get("impact"))],
+            ))
+        sections.append(_section(
+            "foodtech", "フードテック・イノベーション", [_group("foodtech", "", items)],
+            spoken="フードテック・イノベーション関連です。",
+        ))
+
+    reg = analysis.get("regulation", {})
+    if reg:
+        items = []
+        for item in reg.get("risks", []):
+            headline = item.get("headline", "")
+            items.append(_entry(
+                headline,
+                headline,
+                [_field("detail", "", item.get("detail"), "body"),
+                 _field("impact", "影響", item.get("impact"))],
+                badge="⚠ リスク",
+                references=item.get("references", []),
+                spoken=[f"リスクとして、{headline}。{item.get('detail', '')}"],
+            ))
+        for item in reg.get("opportunities", []):
+            headline = item.get("headline", "")
+            items.append(_entry(
+                headline,
+                headline,
+                [_field("detail", "", item.get("detail"), "body"),
+                 _field("opportunity", "チャンス", item.get("opportunity"), "note")],
+                badge="チャンス（規制緩和・撤廃）",
+                references=item.get("references", []),
+                spoken=[f"チャンスとして、{headline}。{item.get('detail', '')}"],
+            ))
+        sections.append(_section(
+            "regulation", "規制・政策ウォッチ", [_group("regulation", "", items)],
+            spoken="規制・政策の新しい動きについてです。",
+        ))
+
+    actions = analysis.get("action_items", [])
+    if actions:
+        items = []
+        for item in actions:
+            priority = item.get("priority", "中")
+            action = item.get("action", "")
+            items.append(_entry(
+                action,
+                f"[{priority}] {action}",
+                [_field("reason", "理由", item.get("reason"))],
+                bullet="",
+                spoken=[f"優先度{priority}：{action}",
+                        _spoken("その理由は、{}", item.get("reason"))],
+            ))
+        sections.append(_section(
+            "action_items", "マルイ物産へのアクション示唆", [_group("action_items", "", items)],
+            spoken="最後に、マルイ物産への新たなアクション示唆です。",
+        ))
+
+    return {"kind": "daily", "sections": sections}
+
+
+# ────────────────────────────────────────────
+# 週報
+# ────────────────────────────────────────────
+
+def build_weekly(analysis: dict) -> dict:
+    """週報の分析結果をドキュメントに変換する."""
+    sections = []
+
+    highlight = analysis.get("highlight", "")
+    if highlight:
+        sections.append(_section(
+            "highlight", "今週のハイライト", text=highlight, spoken="今週のハイライトです。",
+        ))
+
+    ts = analysis.get("trend_summary", {})
+    if ts:
+        accel = [
+            _entry(
+                item.get("name", ""),
+                item.get("name", ""),
+                [_field("change", "", f"先週: {item.get('last_week', '')} → 今週: {item.get('this_week', '')}"),
+                 _field("stage_change", "ステージ", item.get("stage_change"))],
+                bullet="・",
+                references=item.get("references", []),
+                spoken=[f"{item.get('name', '')}は、先週{item.get('last_week', '')}から"
+                        f"今週{item.get('this_week', '')}に成長しました。"
+                        f"ステージは{item.get('stage_change', '')}。"],
+            )
+            for item in ts.get("accelerating", [])
+        ]
+        new_items = [
+            _entry(
+                item.get("name", ""),
+                item.get("name", ""),
+                [_field("description", "", item.get("description"), "body"),
+                 _field("stage", "ステージ", item.get("stage"))],
+                bullet="・",
+                references=item.get("references", []),
+                spoken=[f"{item.get('name', '')}。{item.get('description', '')}"],
+            )
+            for item in ts.get("new_detected", [])
+        ]
+        decel = [
+            _entry(
+                item.get("name", ""),
+                item.get("name", ""),
+                [_field("change", "", item.get("change"), "body")],
+                bullet="・",
+                references=item.get("references", []),
+                spoken=[f"{item.get('name', '')}。{item.get('change', '')}"],
+            )
+            for item in ts.get("decelerating", [])
+        ]
+        sections.append(_section(
+            "trend_summary", "今週のトレンド商品まとめ",
+            [
+                _group("accelerating", "トレンド加速 ↑↑", accel, "まず、加速しているトレンドです。"),
+                _group("new_detected", "新規検出", new_items, "今週新たに検出されたトレンドです。"),
+                _group("decelerating", "トレンド減速 ↓", decel, "減速傾向にあるトレンドです。"),
+            ],
+            spoken="トレンド商品のまとめです。",
+        ))
+
+    asia = analysis.get("asia_weekly", {})
+    if asia:
+        groups = []
+        for key, label in WEEKLY_REGIONS:
+            region = asia.get(key, {})
+            if not region:
+                continue
+            rating = region.get("rating", 0)
+            stars = "★" * rating + "☆" * (5 - rating)
+            groups.append(_group(key, f"{label}（今週の注目度: {stars}）", [_entry(
+                key,
+                "",
+                [_field("summary", "", region.get("summary"), "body")],
+                bullet="",
+                references=region.get("references", []),
+                spoken=[region.get("summary", "")],
+            )], spoken=f"{label}の今週の注目度は5段階中{rating}です。"))
+        sections.append(_section(
+            "asia_weekly", "今週のアジア市場サマリー", groups,
+            spoken="アジア市場の今週のサマリーです。",
+        ))
+
+    industry = analysis.get("industry_weekly", {})
+    if industry:
+        groups = []
+        for key, label, spoken in [
+            ("important", "重要度高", "重要ニュース"),
+            ("technology", "テクノロジー", "テクノロジー"),
+            ("regulation", "規制・政策", "規制・政策"),
+        ]:
+            items = []
+            for item in industry.get(key, []):
+                headline = item.get("headline", "")
+                emoji = item.get("emoji", "")
+                items.append(_entry(
+                    headline,
+                    f"{headline} {emoji}" if emoji else headline,
+                    [],
+                    bullet="・",
+                    references=item.get("references", []),
+                    spoken=[f"{headline}。"],
+                ))
+            groups.append(_group(key, label, items, f"{spoken}として、"))
+        sections.append(_section(
+            "industry_weekly", "今週の業界動向まとめ", groups,
+            spoken="業界動向のまとめです。",
+        ))
+
+    outlook = analysis.get("next_week_outlook", [])
+    if outlook:
+        items = [
+            _entry(
+                item.get("point", ""),
+                item.get("point", ""),
+                [_field("detail", "", item.get("detail"), "body")],
+                spoken=[f"{item.get('point', '')}。{item.get('detail', '')}"],
+            )
+            for item in outlook
+        ]
+        sections.append(_section(
+            "next_week_outlook", "来週の注目ポイント", [_group("next_week_outlook", "", items)],
+            spoken="来週の注目ポイントです。",
+        ))
+
+    return {"kind": "weekly", "sections": sections}
+
+
+def build_document(analysis: dict, report_type: str = "daily") -> dict:
+    """分析結果をドキュメントに変換する（report_type: "daily" or "weekly"）."""
+    if report_type == "weekly":
+        return build_weekly(analysis)
+    return build_daily(analysis)
+
+
+def iter_items(document: dict):
+    """(section, group, item) を文書順に列挙する."""
+    for section in document["sections"]:
+        for group in section["groups"]:
+            for item in group["items"]:
+                yield section, group, item
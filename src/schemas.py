@@ -0,0 +1,247 @@
+"""日報・週報の出力スキーマと、コンパイル済みバリデーター.
+
+スキーマは Gemini の response_schema にそのまま渡せる OpenAPI サブセット形式。
+同じスキーマから import 時に検証・補正関数を1度だけ組み立て、
+応答を1パスで「型チェック + 欠損フィールドの既定値補完」する。
+
+補正ルール:
+- STRING: None は ""、その他の型は str() で文字列化
+- INTEGER: 数字文字列・小数は int に変換、変換できなければ 0
+- ARRAY: None は []、単一値は [値] に包む
+- OBJECT: 欠損した required プロパティは既定値で補完し、任意プロパティは欠損のまま
+  （レンダラーの「空なら出さない」判定を保つため）。未知のキーはそのまま残す。
+  "text" プロパティを持つオブジェクトに文字列が来た場合は {"text": 値} とみなす
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ────────────────────────────────────────────
+# スキーマ部品
+# ────────────────────────────────────────────
+
+def _obj(properties: dict, required: list[str] | None = None) -> dict:
+    schema = {"type": "OBJECT", "properties": properties}
+    if required:
+        schema["required"] = required
+    return schema
+
+
+def _arr(items: dict) -> dict:
+    return {"type": "ARRAY", "items": items}
+
+
+STRING = {"type": "STRING"}
+INTEGER = {"type": "INTEGER"}
+
+REFERENCE = _obj({"text": STRING, "url": STRING}, ["text", "url"])
+REFERENCES = _arr(REFERENCE)
+
+TREND = _obj(
+    {
+        "rank": INTEGER,
+        "name_en": STRING,
+        "name_ja": STRING,
+        "origin": STRING,
+        "detected_on": _arr(STRING),
+        "metrics": STRING,
+        "lifecycle_stage": STRING,
+        "lifecycle_bar": STRING,
+        "japan_landing_estimate": STRING,
+        "why_trending": STRING,
+        "japan_market_fit": STRING,
+        "procurement_note": STRING,
+        "references": REFERENCES,
+    },
+    ["rank", "name_en", "name_ja", "lifecycle_stage", "references"],
+)
+
+NEWS_ITEM = _obj(
+    {"headline": STRING, "detail": STRING, "implication": STRING, "references": REFERENCES},
+    ["headline", "detail"],
+)
+FOODTECH_ITEM = _obj(
+    {"headline": STRING, "detail": STRING, "impact": STRING, "references": REFERENCES},
+    ["headline", "detail"],
+)
+RISK_ITEM = FOODTECH_ITEM
+OPPORTUNITY_ITEM = _obj(
+    {"headline": STRING, "detail": STRING, "opportunity": STRING, "references": REFERENCES},
+    ["headline", "detail"],
+)
+ACTION_ITEM = _obj(
+    {"priority": STRING, "action": STRING, "reason": STRING},
+    ["priority", "action"],
+)
+
+ASIA_TRENDS = _obj({
+    "china": _arr(NEWS_ITEM),
+    "korea": _arr(NEWS_ITEM),
+    "taiwan": _arr(NEWS_ITEM),
+    "southeast_asia": _arr(NEWS_ITEM),
+})
+INDUSTRY_NEWS = _obj({"western": _arr(NEWS_ITEM), "asian": _arr(NEWS_ITEM)})
+REGULATION = _obj({"risks": _arr(RISK_ITEM), "opportunities": _arr(OPPORTUNITY_ITEM)})
+
+
+# ────────────────────────────────────────────
+# 日報・週報スキーマ
+# ────────────────────────────────────────────
+
+DAILY_SCHEMA = _obj(
+    {
+        "executive_summary": STRING,
+        "top_trends": _arr(TREND),
+        "asia_trends": ASIA_TRENDS,
+        "industry_news": INDUSTRY_NEWS,
+        "foodtech": _arr(FOODTECH_ITEM),
+        "regulation": REGULATION,
+        "action_items": _arr(ACTION_ITEM),
+    },
+    ["executive_summary", "top_trends", "asia_trends", "industry_news",
+     "foodtech", "regulation", "action_items"],
+)
+
+_WEEKLY_REGION = _obj(
+    {"rating": INTEGER, "summary": STRING, "references": _arr(STRING)},
+    ["rating", "summary"],
+)
+_WEEKLY_HEADLINE = _obj({"headline": STRING, "references": REFERENCES}, ["headline"])
+
+WEEKLY_SCHEMA = _obj(
+    {
+        "highlight": STRING,
+        "trend_summary": _obj({
+            "accelerating": _arr(_obj({
+                "name": STRING,
+                "last_week": STRING,
+                "this_week": STRING,
+                "stage_change": STRING,
+                "references": REFERENCES,
+            }, ["name"])),
+            "new_detected": _arr(_obj({
+                "name": STRING,
+                "description": STRING,
+                "stage": STRING,
+                "references": REFERENCES,
+            }, ["name"])),
+            "decelerating": _arr(_obj({
+                "name": STRING,
+                "change": STRING,
+                "references": REFERENCES,
+            }, ["name"])),
+        }),
+        "asia_weekly": _obj({
+            "china": _WEEKLY_REGION,
+            "taiwan": _WEEKLY_REGION,
+            "korea": _WEEKLY_REGION,
+            "southeast_asia": _WEEKLY_REGION,
+        }),
+        "industry_weekly": _obj({
+            "important": _arr(_WEEKLY_HEADLINE),
+            "technology": _arr(_WEEKLY_HEADLINE),
+            "regulation": _arr(_obj(
+                {"headline": STRING, "emoji": STRING, "references": REFERENCES},
+                ["headline"],
+            )),
+        }),
+        "next_week_outlook": _arr(_obj({"point": STRING, "detail": STRING}, ["point"])),
+    },
+    ["highlight", "trend_summary", "asia_weekly", "industry_weekly", "next_week_outlook"],
+)
+
+# マップリデュースの reduce 出力
+REDUCE_SCHEMA = _obj(
+    {
+        "executive_summary": STRING,
+        "top_trends": _arr(_obj({"id": INTEGER, "rank": INTEGER}, ["id", "rank"])),
+        "action_items": _arr(ACTION_ITEM),
+    },
+    ["executive_summary", "top_trends", "action_items"],
+)
+
+
+def slice_schema(sections: dict) -> dict:
+    """マップリデュースのスライス出力スキーマを組み立てる.
+
+    Args:
+        sections: 日報スキーマのトップレベルキー → 含めるサブキーのリスト（None なら全体）
+    """
+    properties = {}
+    for key, subkeys in sections.items():
+        schema = DAILY_SCHEMA["properties"][key]
+        if subkeys is not None:
+            schema = _obj({k: schema["properties"][k] for k in subkeys})
+        properties[key] = schema
+    properties["trend_candidates"] = _arr(TREND)
+    return _obj(properties, list(sections))
+
+
+# ────────────────────────────────────────────
+# バリデーター
+# ────────────────────────────────────────────
+
+def compile_validator(schema: dict):
+    """スキーマから検証・補正関数を組み立てる（呼び出しは1パス）."""
+    kind = schema.get("type")
+
+    if kind == "STRING":
+        def check_string(value):
+            if isinstance(value, str):
+                return value
+            return "" if value is None else str(value)
+        return check_string
+
+    if kind == "INTEGER":
+        def check_integer(value):
+            if isinstance(value, bool):
+                return int(value)
+            if isinstance(value, int):
+                return value
+            try:
+                return int(float(value))
+            except (TypeError, ValueError):
+                return 0
+        return check_integer
+
+    if kind == "ARRAY":
+        check_item = compile_validator(schema["items"])
+
+        def check_array(value):
+            if value is None:
+                return []
+            if not isinstance(value, list):
+                value = [value]
+            return [check_item(v) for v in value]
+        return check_array
+
+    if kind == "OBJECT":
+        required = set(schema.get("required", []))
+        fields = [
+            (k, compile_validator(s), k in required)
+            for k, s in schema.get("properties", {}).items()
+        ]
+        text_field = "text" in schema.get("properties", {})
+
+        def check_object(value):
+            if isinstance(value, str) and text_field:
+                value = {"text": value}
+            elif not isinstance(value, dict):
+                value = {}
+            result = dict(value)
+            for key, check, is_required in fields:
+                if key in value or is_required:
+                    result[key] = check(value.get(key))
+            return result
+        return check_object
+
+    return lambda value: value
+
+
+validate_daily = compile_validator(DAILY_SCHEMA)
+validate_weekly = compile_validator(WEEKLY_SCHEMA)
+validate_reduce = compile_validator(REDUCE_SCHEMA)
+# ストリーミング中に確定した top_trends セクション単体の検証用
+validate_top_trends = compile_validator(DAILY_SCHEMA["properties"]["top_trends"])
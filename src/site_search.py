@@ -0,0 +1,189 @@
+"""ポッドキャスト画像ページ（docs/podcast）のクライアントサイド検索索引.
+
+各ページのトレンド名（英語・日本語）・ヘッドライン・地域を語に分け、
+語 → ページID（日付）の転置索引を docs/podcast/search/ に書き出す。
+索引は語の先頭文字ごとのシャード（<先頭文字のコードポイント16進>.json）に分け、
+インデックスページの検索スクリプトは入力された語のシャードだけを取得する。
+ブラウザが読むのはシャードと pages.json（ページID → タイトル）だけで、
+ページごとの語の一覧はビルド時だけ使う別ファイル（公開ディレクトリの外）に置く。
+
+語の切り出し（Python と SEARCH_SCRIPT で同じ規則）:
+- NFKC 正規化 → 小文字化 → ひらがなをカタカナに統一
+- 英数字の連続は1語（前方一致で検索）
+- それ以外の文字（漢字・かな・ハングル等）の連続は2文字ずつの bigram
+
+ページを追加・再生成したときは、そのページの旧語を語の一覧ファイルから引いて
+該当シャードだけを書き換える（全ページの再走査はしない）。
+"""
+
+import json
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_TERM_PATTERN = re.compile(r"[0-9a-z]+|[^\W\d_a-z]+")
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    return "".join(chr(ord(ch) + 0x60) if "ぁ" <= ch <= "ゖ" else ch for ch in text)
+
+
+def extract_terms(texts: list[str]) -> list[str]:
+    """検索語を切り出す（重複なし・出現順）."""
+    terms = []
+    for text in texts:
+        for token in _TERM_PATTERN.findall(_normalize(text or "")):
+            if token.isascii():
+                if len(token) >= 2:
+                    terms.append(token)
+            elif len(token) == 1:
+                terms.append(token)
+            else:
+                terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return list(dict.fromkeys(terms))
+
+
+def _shard_name(term: str) -> str:
+    return f"{ord(term[0]):x}.json"
+
+
+def _load_json(path: Path, default):
+    if not path.exists():
+        return default
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning("検索索引の読み込み失敗 (%s): %s", path.name, e)
+        return default
+
+
+def _write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True),
+        encoding="utf-8",
+    )
+
+
+def _load_page_terms(search_dir: Path, terms_file: Path) -> dict[str, list[str]]:
+    """ページID → 語の一覧を読む（旧形式の pages.json に語が入っていればそこから移す）."""
+    if terms_file.exists():
+        return _load_json(terms_file, {})
+    legacy = _load_json(search_dir / "pages.json", {})
+    return {
+        page_id: entry.get("terms", [])
+        for page_id, entry in legacy.items() if isinstance(entry, dict)
+    }
+
+
+def indexed_pages(search_dir: Path, terms_file: Path) -> set[str]:
+    """検索索引に登録済みのページIDを返す."""
+    return set(_load_page_terms(search_dir, terms_file))
+
+
+def update_search_index(
+    search_dir: Path, terms_file: Path, page_id: str, title: str, texts: list[str],
+) -> None:
+    """1ページ分の語を検索索引に反映する（同じページの旧語は取り除く）.
+
+    Args:
+        search_dir: 索引の出力先（docs/podcast/search）
+        terms_file: ページごとの語の一覧（ビルド時だけ使う。公開しない）
+        page_id: ページID（日付。ページのファイル名は {page_id}.html）
+        title: 検索結果に表示するタイトル
+        texts: トレンド名・ヘッドライン・地域名等
+    """
+    search_dir.mkdir(parents=True, exist_ok=True)
+    pages_path = search_dir / "pages.json"
+    pages = {
+        pid: entry.get("title", "") if isinstance(entry, dict) else entry
+        for pid, entry in _load_json(pages_path, {}).items()
+    }
+    page_terms = _load_page_terms(search_dir, terms_file)
+
+    old_terms = set(page_terms.get(page_id, []))
+    new_terms = extract_terms(texts)
+
+    changes: dict[str, list[tuple[str, bool]]] = defaultdict(list)
+    for term in old_terms - set(new_terms):
+        changes[_shard_name(term)].append((term, False))
+    for term in new_terms:
+        if term not in old_terms:
+            changes[_shard_name(term)].append((term, True))
+
+    for shard, shard_changes in changes.items():
+        shard_path = search_dir / shard
+        index = _load_json(shard_path, {})
+        for term, add in shard_changes:
+            ids = [i for i in index.get(term, []) if i != page_id]
+            if add:
+                ids.append(page_id)
+                ids.sort(reverse=True)
+            if ids:
+                index[term] = ids
+            else:
+                index.pop(term, None)
+        if not index:
+            shard_path.unlink(missing_ok=True)
+            continue
+        _write_json(shard_path, index)
+
+    page_terms[page_id] = new_terms
+    _write_json(terms_file, page_terms)
+    pages[page_id] = title
+    _write_json(pages_path, pages)
+    logger.info("検索索引を更新: %s（%d 語、%d シャード）", page_id, len(new_terms), len(changes))
+
+
+# インデックスページに埋め込む検索スクリプト（語の切り出しは extract_terms と同じ規則）
+SEARCH_SCRIPT = """
+(() => {
+  const input = document.getElementById('search');
+  const out = document.getElementById('search-results');
+  const shards = {};
+  let pages = null;
+  const load = (name) => shards[name] || (shards[name] =
+    fetch('search/' + name + '.json').then(r => r.ok ? r.json() : {}).catch(() => ({})));
+  const norm = (s) => s.normalize('NFKC').toLowerCase()
+    .replace(/[\\u3041-\\u3096]/g, c => String.fromCharCode(c.charCodeAt(0) + 0x60));
+  const terms = (s) => {
+    const result = [];
+    for (const tok of norm(s).match(/[0-9a-z]+|[^\\P{L}a-z]+/gu) || []) {
+      if (/^[0-9a-z]+$/.test(tok)) { result.push([tok, true]); }
+      else if (tok.length === 1) { result.push([tok, true]); }
+      else { for (let i = 0; i < tok.length - 1; i++) result.push([tok.slice(i, i + 2), false]); }
+    }
+    return result;
+  };
+  const lookup = async ([term, prefix]) => {
+    const index = await load(term.codePointAt(0).toString(16));
+    const ids = new Set();
+    for (const [key, pageIds] of Object.entries(index)) {
+      if (prefix ? key.startsWith(term) : key === term) pageIds.forEach(id => ids.add(id));
+    }
+    return ids;
+  };
+  const escape = (s) => s.replace(/[&<>"']/g, c => '&#' + c.charCodeAt(0) + ';');
+  let seq = 0;
+  input.addEventListener('input', async () => {
+    const current = ++seq;
+    const query = terms(input.value);
+    if (!query.length) { out.innerHTML = ''; return; }
+    pages = pages || await fetch('search/pages.json').then(r => r.json()).catch(() => ({}));
+    let hits = null;
+    for (const ids of await Promise.all(query.map(lookup))) {
+      hits = hits === null ? ids : new Set([...hits].filter(id => ids.has(id)));
+    }
+    if (current !== seq) return;
+    const ids = [...hits].sort().reverse();
+    out.innerHTML = ids.length
+      ? ids.map(id => `<li><a href="${id}.html">${id} - ${escape(pages[id] || '')}</a></li>`).join('')
+      : '<li class="empty">該当するページはありません</li>';
+  });
+})();
+"""
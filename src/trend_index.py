@@ -0,0 +1,202 @@
+"""過去トレンド名のローカルあいまい検索インデックス.
+
+配信履歴の全トレンド名をそのままプロンプトに並べると、履歴が増えるほど
+プロンプトが長くなり、しかも表記ゆれ（「薬菓」と「ヤックァ」、Yakgwa と
+"Yakgwa" 等）は Gemini が見逃す。そこで名前を正規化した文字 n-gram の
+転置インデックスを手元に持ち、
+
+1. 収集データ中で既出トレンドに一致する項目だけにタグを付け、
+   プロンプトには一致した過去名だけを渡す（件数上限あり）
+2. 分析後の top_trends を再チェックして既出トレンドを除く
+
+という2段で重複配信を防ぐ。
+
+正規化: NFKC → casefold → ひらがなをカタカナに統一 → 繁体字・日本の新字体を
+簡体字に寄せる（食品でよく使う字のみ）→ 記号・空白を除去。
+n-gram: 英数字は3文字、漢字・かなは2文字。
+"""
+
+import logging
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# プロンプトに載せる過去トレンド名の上限（履歴が増えてもプロンプトを一定に保つ）
+MAX_PROMPT_NAMES = 40
+
+# 収集データの項目と過去名の一致判定: 過去名の n-gram の何割が項目テキストに含まれるか
+ITEM_CONTAINMENT = 0.8
+# トレンド名どうしの一致判定（Dice 係数 / 短い方の包含率）
+# 包含率は「Strawberry Matcha Latte」と「Matcha Latte」のように別商品の一部を
+# 拾いやすいため、短い方が長い方の NAME_LENGTH_RATIO 以上を占め、かつ
+# n-gram が MIN_CONTAINMENT_GRAMS 個以上ある（"Tea" 等の短い名前でない）ときだけ使う
+NAME_DICE = 0.75
+NAME_CONTAINMENT = 0.85
+NAME_LENGTH_RATIO = 0.75
+MIN_CONTAINMENT_GRAMS = 5
+
+# 項目テキストとして見るフィールド（description 等の長文は対象外）
+ITEM_TEXT_FIELDS = ("title", "keyword", "hashtag", "name", "trend", "text")
+
+# 食品でよく使う漢字の異体字 → 簡体字
+_HANZI_VARIANTS = str.maketrans({
+    "鹽": "盐", "塩": "盐", "麵": "面", "麺": "面", "雞": "鸡", "鶏": "鸡",
+    "燒": "烧", "焼": "烧", "餅": "饼", "湯": "汤", "鮮": "鲜", "蝦": "虾",
+    "魚": "鱼", "豬": "猪", "飯": "饭", "麥": "麦", "黃": "黄", "綠": "绿",
+    "緑": "绿", "醬": "酱", "鳳": "凤", "檸": "柠", "蘋": "苹", "點": "点",
+    "鬆": "松", "糰": "团", "團": "团", "東": "东",
+    "濃": "浓", "條": "条", "絲": "丝", "醤": "酱", "蔥": "葱", "薑": "姜",
+    "齋": "斋", "菓": "果", "們": "们", "爐": "炉", "鍋": "锅", "釀": "酿",
+})
+
+_TOKEN_PATTERN = re.compile(r"[0-9a-z]+|[^\W0-9a-z_]+")
+
+
+def normalize(text: str) -> str:
+    """比較用にトレンド名を正規化する."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(
+        chr(ord(ch) + 0x60) if "ぁ" <= ch <= "ゖ" else ch for ch in text
+    )
+    text = text.translate(_HANZI_VARIANTS)
+    return " ".join(_TOKEN_PATTERN.findall(text))
+
+
+def name_key(name: str) -> str:
+    """完全一致用のキー（正規化後に空白も除く。"Tang Hulu" と "Tanghulu" を同一視）."""
+    return normalize(name).replace(" ", "")
+
+
+def is_name_match(shared: int, size_a: int, size_b: int) -> bool:
+    """n-gram 数 size_a / size_b の2つの名前が shared 個を共有するとき同じトレンドとみなすか."""
+    if 2 * shared / (size_a + size_b) >= NAME_DICE:
+        return True
+    short, long = min(size_a, size_b), max(size_a, size_b)
+    return (
+        short >= MIN_CONTAINMENT_GRAMS
+        and short / long >= NAME_LENGTH_RATIO
+        and shared / short >= NAME_CONTAINMENT
+    )
+
+
+def ngrams(text: str) -> set[str]:
+    """正規化済みテキストの文字 n-gram を返す."""
+    grams = set()
+    for token in text.split():
+        if token.isascii():
+            padded = f" {token} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        elif len(token) == 1:
+            grams.add(token)
+        else:
+            grams.update(token[i:i + 2] for i in range(len(token) - 1))
+    return grams
+
+
+class PastTrendIndex:
+    """過去トレンド名の n-gram 転置インデックス."""
+
+    def __init__(self, names: list[str] | None = None):
+        self._names: list[str] = []
+        self._grams: list[set[str]] = []
+        self._postings: dict[str, set[int]] = defaultdict(set)
+        self._seen: dict[str, int] = {}
+        for name in names or []:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, name: str) -> None:
+        """過去トレンド名を登録する（正規化後に重複するものは無視）."""
+        key = name_key(name)
+        grams = ngrams(normalize(name))
+        if not grams or key in self._seen:
+            return
+        idx = len(self._names)
+        self._seen[key] = idx
+        self._names.append(name)
+        self._grams.append(grams)
+        for g in grams:
+            self._postings[g].add(idx)
+
+    def _shared_counts(self, grams: set[str]) -> Counter:
+        counts: Counter = Counter()
+        for g in grams:
+            for idx in self._postings.get(g, ()):
+                counts[idx] += 1
+        return counts
+
+    def find_in_text(self, text: str) -> list[str]:
+        """テキスト中に含まれる過去トレンド名を返す."""
+        grams = ngrams(normalize(text))
+        return [
+            self._names[idx]
+            for idx, shared in self._shared_counts(grams).items()
+            if shared / len(self._grams[idx]) >= ITEM_CONTAINMENT
+        ]
+
+    def match_name(self, name: str) -> str | None:
+        """表記ゆれを許して一致する過去トレンド名を返す。なければ None."""
+        grams = ngrams(normalize(name))
+        if not grams:
+            return None
+        exact = self._seen.get(name_key(name))
+        if exact is not None:
+            return self._names[exact]
+        best, best_score = None, 0.0
+        for idx, shared in self._shared_counts(grams).items():
+            past = self._grams[idx]
+            if is_name_match(shared, len(grams), len(past)):
+                score = 2 * shared / (len(grams) + len(past))
+                if score > best_score:
+                    best, best_score = self._names[idx], score
+        return best
+
+    def tag_collected(self, collected: dict) -> list[str]:
+        """既出トレンドに一致する収集項目に already_sent を付け、一致した過去名を返す.
+
+        返り値は一致回数の多い順で MAX_PROMPT_NAMES 件まで。
+        """
+        hits: Counter = Counter()
+        for items in collected.values():
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                text = " ".join(
+                    str(item[f]) for f in ITEM_TEXT_FIELDS if item.get(f)
+                )
+                if not text:
+                    continue
+                matched = self.find_in_text(text)
+                if matched:
+                    item["already_sent"] = matched[0]
+                    hits.update(matched)
+        names = [name for name, _ in hits.most_common(MAX_PROMPT_NAMES)]
+        logger.info(
+            "過去トレンド照合: 履歴 %d 件中 %d 件が今日の収集データに出現",
+            len(self), len(hits),
+        )
+        return names
+
+    def drop_repeats(self, trends: list[dict]) -> list[dict]:
+        """既出トレンドを top_trends から除き、順位を振り直す.
+
+        全件が既出の場合は空の日報を避けるためそのまま返す。
+        """
+        fresh = []
+        for t in trends:
+            past = self.match_name(t.get("name_en", "")) or self.match_name(t.get("name_ja", ""))
+            if past:
+                logger.warning("既出トレンドを除外: %s（過去: %s）", t.get("name_en", ""), past)
+            else:
+                fresh.append(t)
+
+        if not fresh:
+            logger.warning("top_trends が全て既出のため除外せずに配信します")
+            return trends
+        for rank, t in enumerate(fresh, 1):
+            t["rank"] = rank
+        return fresh
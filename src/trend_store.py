@@ -0,0 +1,233 @@
+"""トレンドごとの時系列ストア.
+
+日報の top_trends を正規化したトレンド単位にまとめ、日ごとの順位・
+ライフサイクルステージ・指標（数値化したもの）・検出ソースを蓄積する。
+日報 JSON は cleanup_old_reports で消えるが、こちらは消さない。
+
+保存先は SQLite の data/trends.db。
+- trends: トレンド1件につき1行（初検出日・最終検出日・出現回数）
+- trend_points: トレンド×日付ごとの観測値
+
+表記ゆれは trend_index のあいまい一致で既存トレンドに寄せる。
+"""
+
+import json
+import logging
+import re
+import sqlite3
+from pathlib import Path
+
+from trend_index import PastTrendIndex, normalize
+
+logger = logging.getLogger(__name__)
+
+TRENDS_DB = Path(__file__).resolve().parent.parent / "data" / "trends.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trends (
+    trend_id    INTEGER PRIMARY KEY,
+    name_en     TEXT NOT NULL,
+    name_ja     TEXT NOT NULL DEFAULT '',
+    name_norm   TEXT NOT NULL UNIQUE,
+    first_seen  TEXT NOT NULL,
+    last_seen   TEXT NOT NULL,
+    appearances INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS trend_points (
+    trend_id        INTEGER NOT NULL REFERENCES trends (trend_id),
+    date            TEXT NOT NULL,
+    rank            INTEGER,
+    lifecycle_stage TEXT NOT NULL DEFAULT '',
+    metrics_raw     TEXT NOT NULL DEFAULT '',
+    metrics         TEXT NOT NULL DEFAULT '[]',
+    sources         TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (trend_id, date)
+);
+CREATE INDEX IF NOT EXISTS idx_trend_points_date ON trend_points (date);
+"""
+
+# 「12万」「8.3億」「1.2M」等の数値表現
+_NUMBER_PATTERN = re.compile(r"([\d][\d,]*(?:\.\d+)?)\s*(万|億|亿|千|[kKmMbB](?![a-zA-Z])|%)?")
+_MULTIPLIERS = {
+    "千": 1e3, "万": 1e4, "億": 1e8, "亿": 1e8,
+    "k": 1e3, "K": 1e3, "m": 1e6, "M": 1e6, "b": 1e9, "B": 1e9,
+}
+
+
+def parse_metrics(text: str) -> list[dict]:
+    """指標文字列を数値化する.
+
+    例: "小红书12万投稿/週, 抖音8.3億再生"
+      → [{"label": "小红书投稿/週", "value": 120000.0, "unit": ""},
+         {"label": "抖音再生", "value": 830000000.0, "unit": ""}]
+    """
+    results = []
+    for segment in re.split(r"[,、，;；]\s*", text or ""):
+        match = _NUMBER_PATTERN.search(segment)
+        if not match:
+            continue
+        number = float(match.group(1).replace(",", ""))
+        suffix = match.group(2) or ""
+        unit = "%" if suffix == "%" else ""
+        value = number * _MULTIPLIERS.get(suffix, 1)
+        label = (segment[:match.start()] + segment[match.end():]).strip(" 　:：")
+        results.append({"label": label, "value": value, "unit": unit})
+    return results
+
+
+class TrendStore:
+    """トレンド時系列の SQLite ストア."""
+
+    def __init__(self, path: Path = TRENDS_DB):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._index: PastTrendIndex | None = None
+        self._ids_by_name: dict[str, int] = {}
+
+    def close(self) -> None:
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── 書き込み ──
+
+    def record_day(self, date: str, top_trends: list[dict]) -> None:
+        """1日分の top_trends を時系列に追加する（同日の再実行はその日の観測値を置き換える）."""
+        with self._conn:
+            affected = {
+                row[0] for row in self._conn.execute(
+                    "SELECT trend_id FROM trend_points WHERE date = ?", (date,)
+                )
+            }
+            self._conn.execute("DELETE FROM trend_points WHERE date = ?", (date,))
+            for t in top_trends:
+                name_en = t.get("name_en", "")
+                if not name_en:
+                    continue
+                trend_id = self._resolve(name_en, t.get("name_ja", ""), date)
+                affected.add(trend_id)
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO trend_points
+                        (trend_id, date, rank, lifecycle_stage, metrics_raw, metrics, sources)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        trend_id,
+                        date,
+                        t.get("rank") if isinstance(t.get("rank"), int) else None,
+                        t.get("lifecycle_stage", ""),
+                        t.get("metrics", ""),
+                        json.dumps(parse_metrics(t.get("metrics", "")), ensure_ascii=False),
+                        json.dumps(t.get("detected_on", []), ensure_ascii=False),
+                    ),
+                )
+            # 前回の同日実行にだけ出ていたトレンドも含めて集計し直す
+            for trend_id in affected:
+                self._conn.execute(
+                    """
+                    UPDATE trends SET
+                        first_seen = COALESCE(
+                            (SELECT MIN(date) FROM trend_points WHERE trend_id = ?), first_seen),
+                        last_seen = COALESCE(
+                            (SELECT MAX(date) FROM trend_points WHERE trend_id = ?), last_seen),
+                        appearances = (SELECT COUNT(*) FROM trend_points WHERE trend_id = ?)
+                    WHERE trend_id = ?
+                    """,
+                    (trend_id, trend_id, trend_id, trend_id),
+                )
+            orphaned = self._conn.execute(
+                "DELETE FROM trends WHERE appearances = 0 AND trend_id IN (%s)"
+                % ",".join("?" * len(affected)),
+                list(affected),
+            ).rowcount if affected else 0
+        if orphaned:
+            # 消えたトレンドの名前をあいまい一致の候補から外す
+            self._index = None
+            self._ids_by_name.clear()
+        logger.info("トレンド時系列を更新: %s（%d 件）", date, len(top_trends))
+
+    def _resolve(self, name_en: str, name_ja: str, date: str) -> int:
+        """トレンド名を既存の trend_id に寄せる。なければ新規登録."""
+        index = self._load_index()
+        matched = index.match_name(name_en) or (index.match_name(name_ja) if name_ja else None)
+        if matched:
+            return self._ids_by_name[matched]
+
+        cur = self._conn.execute(
+            """
+            INSERT INTO trends (name_en, name_ja, name_norm, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (name_norm) DO UPDATE SET name_ja = excluded.name_ja
+            RETURNING trend_id
+            """,
+            (name_en, name_ja, normalize(name_en), date, date),
+        )
+        trend_id = cur.fetchone()[0]
+        for name in (name_en, name_ja):
+            if name:
+                index.add(name)
+                self._ids_by_name[name] = trend_id
+        return trend_id
+
+    def _load_index(self) -> PastTrendIndex:
+        if self._index is None:
+            self._index = PastTrendIndex()
+            for row in self._conn.execute("SELECT trend_id, name_en, name_ja FROM trends"):
+                for name in (row["name_en"], row["name_ja"]):
+                    if name:
+                        self._index.add(name)
+                        self._ids_by_name[name] = row["trend_id"]
+        return self._index
+
+    # ── 読み出し ──
+
+    def series(self, name: str, start: str | None = None, end: str | None = None) -> list[dict]:
+        """1トレンドの時系列を日付順に返す（名前は表記ゆれ可。start / end で期間を絞る）."""
+        matched = self._load_index().match_name(name)
+        if not matched:
+            return []
+        return self._points(["p.trend_id = ?"], [self._ids_by_name[matched]], start, end)
+
+    def between(self, start: str, end: str) -> dict[str, list[dict]]:
+        """期間内に出現した全トレンドの時系列を {name_en: [観測値...]} で返す."""
+        result: dict[str, list[dict]] = {}
+        for point in self._points([], [], start, end):
+            result.setdefault(point["name_en"], []).append(point)
+        return result
+
+    def _points(
+        self, conditions: list[str], params: list, start: str | None, end: str | None,
+    ) -> list[dict]:
+        if start:
+            conditions.append("p.date >= ?")
+            params.append(start)
+        if end:
+            conditions.append("p.date <= ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cur = self._conn.execute(
+            f"""
+            SELECT t.name_en, t.name_ja, t.first_seen, p.date, p.rank, p.lifecycle_stage,
+                   p.metrics_raw, p.metrics, p.sources
+            FROM trend_points p JOIN trends t USING (trend_id)
+            {where}
+            ORDER BY p.date, p.rank
+            """,
+            params,
+        )
+        points = []
+        for row in cur:
+            point = dict(row)
+            point["metrics"] = json.loads(point["metrics"])
+            point["sources"] = json.loads(point["sources"])
+            points.append(point)
+        return points
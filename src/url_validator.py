@@ -3,11 +3,24 @@
 新旧両形式に対応:
 - 旧: reference_urls フィールド（URLリスト）
 - 新: references フィールド（テキスト参照。URLを含むものだけ検証）
+
+確認結果は data/url_cache.json にキャッシュし、成功・失敗で別々の TTL を設ける。
+毎日同じ記事URLや検索URLを確認し直さないため、検証時間は新規リンク数に比例する。
+
+確認は asyncio で行い、1つの httpx.AsyncClient（コネクションプール）を共有する。
+同一ホストへの同時接続数は MAX_PER_HOST に制限し、HEAD が使えないサーバーには
+Range: bytes=0-0 のストリーミング GET で確認するため本文はダウンロードしない。
+全体の所要時間は VALIDATION_BUDGET 秒で打ち切り、確認できなかったURLは残す。
 """
 
+import asyncio
+import json
 import logging
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
 
 import httpx
 
@@ -20,20 +33,138 @@ HEADERS = {
 
 URL_PATTERN = re.compile(r'https?://[^\s<>"]+')
 
+# 同時接続数（全体・ホストごと）と、検証全体の時間上限（秒）
+MAX_CONNECTIONS = 20
+MAX_PER_HOST = 2
+VALIDATION_BUDGET = 30
+
+# HEAD を受け付けないサーバーが返すステータス → Range GET で再確認
+_HEAD_UNSUPPORTED = {403, 405, 501}
+
+# 到達確認キャッシュ
+URL_CACHE_FILE = Path(__file__).resolve().parent.parent / "data" / "url_cache.json"
+SUCCESS_TTL = 14 * 24 * 3600
+FAILURE_TTL = 24 * 3600
+MAX_CACHE_ENTRIES = 5000
+
+
+class UrlCache:
+    """URL → (到達可否, リダイレクト後URL, 確認日時) のディスクキャッシュ.
+
+    上限を超えたら最後に参照された日時が古いものから削除する（LRU）。
+    """
+
+    def __init__(self, path: Path = URL_CACHE_FILE):
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                if isinstance(data, dict):
+                    self._entries = data
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning("URLキャッシュ読み込み失敗: %s", e)
+
+    def get(self, url: str) -> dict | None:
+        """有効期限内のエントリーを返す。期限切れ・未登録なら None."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry:
+                return None
+            ttl = SUCCESS_TTL if entry["ok"] else FAILURE_TTL
+            now = time.time()
+            if now - entry["checked_at"] > ttl:
+                return None
+            entry["used_at"] = now
+            return entry
+
+    def put(self, url: str, ok: bool, final_url: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._entries[url] = {
+                "ok": ok, "final_url": final_url, "checked_at": now, "used_at": now,
+            }
+
+    def save(self) -> None:
+        """LRU で上限まで削ってから保存する."""
+        with self._lock:
+            if len(self._entries) > MAX_CACHE_ENTRIES:
+                keep = sorted(
+                    self._entries.items(), key=lambda kv: kv[1]["used_at"], reverse=True
+                )[:MAX_CACHE_ENTRIES]
+                self._entries = dict(keep)
+            data = json.dumps(self._entries, ensure_ascii=False, separators=(",", ":"))
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._path.write_text(data, encoding="utf-8")
+        except OSError as e:
+            logger.warning("URLキャッシュ保存失敗: %s", e)
 
-def is_reachable(url: str) -> bool:
-    """URLにアクセスできるか確認する."""
-    try:
-        with httpx.Client(headers=HEADERS, timeout=TIMEOUT, follow_redirects=True) as client:
-            resp = client.head(url)
+
+async def _check_one(
+    client: httpx.AsyncClient, url: str, host_limits: dict[str, asyncio.Semaphore]
+) -> tuple[bool, str]:
+    """1件のURLを確認し、(到達可否, リダイレクト後のURL) を返す."""
+    host = urlsplit(url).hostname or ""
+    sem = host_limits.setdefault(host, asyncio.Semaphore(MAX_PER_HOST))
+    async with sem:
+        try:
+            resp = await client.head(url)
             if resp.status_code < 400:
-                return True
-            if resp.status_code == 405:
-                resp = client.get(url)
-                return resp.status_code < 400
-        return False
-    except (httpx.HTTPError, Exception):
-        return False
+                return True, str(resp.url)
+            if resp.status_code not in _HEAD_UNSUPPORTED:
+                return False, url
+            # 本文は読まずにステータスだけ確認する
+            async with client.stream("GET", url, headers={"Range": "bytes=0-0"}) as resp:
+                return resp.status_code < 400, str(resp.url)
+        except Exception:
+            return False, url
+
+
+async def _check_all(urls: list[str]) -> dict[str, tuple[bool, str]]:
+    """URL群を並行して確認する。時間切れで終わらなかったURLは結果に含めない."""
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+    host_limits: dict[str, asyncio.Semaphore] = {}
+    async with httpx.AsyncClient(
+        headers=HEADERS, timeout=TIMEOUT, follow_redirects=True, limits=limits,
+    ) as client:
+        tasks = {asyncio.create_task(_check_one(client, url, host_limits)): url for url in urls}
+        done, pending = await asyncio.wait(tasks, timeout=VALIDATION_BUDGET)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("URL検証が時間切れ: %d 件は未確認のまま残します", len(pending))
+        return {tasks[task]: task.result() for task in done}
+
+
+def check_urls(urls: list[str]) -> dict[str, tuple[bool, str]]:
+    """URL群の到達可否を確認する（キャッシュ優先）.
+
+    Returns:
+        URL → (到達可否, リダイレクト後のURL)。時間切れで確認できなかったURLは含まない。
+    """
+    urls = list(dict.fromkeys(urls))
+    cache = UrlCache()
+    results: dict[str, tuple[bool, str]] = {}
+    unchecked = []
+    for url in urls:
+        entry = cache.get(url)
+        if entry:
+            results[url] = (entry["ok"], entry.get("final_url") or url)
+        else:
+            unchecked.append(url)
+    logger.info("URL検証: %d 件中 %d 件はキャッシュ済み", len(urls), len(urls) - len(unchecked))
+
+    if unchecked:
+        checked = asyncio.run(_check_all(unchecked))
+        for url, (ok, final_url) in checked.items():
+            cache.put(url, ok, final_url)
+            if ok and final_url != url:
+                cache.put(final_url, ok, final_url)
+        results.update(checked)
+        cache.save()
+    return results
 
 
 def _extract_url_from_ref(ref) -> str | None:
@@ -52,75 +183,96 @@ def _extract_url_from_ref(ref) -> str | None:
     return None
 
 
-def validate_trends(trends: list[dict]) -> list[dict]:
-    """各トレンドの参照URLを検証.
+def _iter_reference_holders(obj):
+    """references / reference_urls を持つ辞書を再帰的に列挙する."""
+    if isinstance(obj, dict):
+        if isinstance(obj.get("references"), list) or isinstance(obj.get("reference_urls"), list):
+            yield obj
+        for value in obj.values():
+            yield from _iter_reference_holders(value)
+    elif isinstance(obj, list):
+        for item in obj:
+            yield from _iter_reference_holders(item)
 
-    対応形式:
-    - dict形式: {"text": "...", "url": "https://..."} — url フィールドを検証
-    - str形式: テキスト内のURLを抽出して検証（後方互換）
-    - reference_urls（旧形式）: URLリストを検証
-    """
-    url_map: dict[str, bool] = {}
-    all_urls = []
 
-    for t in trends:
-        # 旧形式: reference_urls
-        for url in t.get("reference_urls", []):
-            if url and url.startswith("http") and url not in url_map:
-                all_urls.append(url)
-                url_map[url] = True
+def _resolved(url: str, final_url: str) -> str:
+    """同一ホスト内のリダイレクト（http→https、末尾スラッシュ等）だけ最終URLに置き換える.
 
-        # references（dict/str 両対応）
-        for ref in t.get("references", []):
-            url = _extract_url_from_ref(ref)
-            if url and url not in url_map:
-                all_urls.append(url)
-                url_map[url] = True
-
-    if not all_urls:
-        return trends
-
-    # 並列でURL検証
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(is_reachable, url): url for url in all_urls}
-        for future in as_completed(futures):
-            url = futures[future]
-            try:
-                url_map[url] = future.result()
-            except Exception:
-                url_map[url] = False
+    別ホストへのリダイレクトはログイン画面・同意画面であることが多いため元のURLを残す。
+    """
+    if urlsplit(url).hostname == urlsplit(final_url).hostname:
+        return final_url
+    return url
 
-    broken = [u for u, ok in url_map.items() if not ok]
-    if broken:
-        logger.warning("切れたリンクを除外: %s", broken)
-    else:
-        logger.info("全URLが到達可能（%d件）", len(url_map))
 
-    # 切れたURLを含む参照を除外
-    for t in trends:
+def _apply_results(holders: list[dict], results: dict[str, tuple[bool, str]]) -> None:
+    """確認結果を参照に反映する。未確認のURLは到達可能として扱う."""
+    for holder in holders:
         # 旧形式
-        if "reference_urls" in t:
-            t["reference_urls"] = [
-                url for url in t["reference_urls"]
-                if not url.startswith("http") or url_map.get(url, False)
+        if "reference_urls" in holder:
+            holder["reference_urls"] = [
+                _resolved(url, results[url][1]) if url in results else url
+                for url in holder["reference_urls"]
+                if not url.startswith("http") or results.get(url, (True, url))[0]
             ]
         # references（dict/str 両対応）
-        if "references" in t:
+        if "references" in holder:
             valid_refs = []
-            for ref in t["references"]:
+            for ref in holder["references"]:
                 url = _extract_url_from_ref(ref)
-                if url:
-                    # URLがある場合: 到達可能なら残す、不可なら URL を空にして残す
-                    if url_map.get(url, False):
-                        valid_refs.append(ref)
-                    else:
-                        # URLが切れていてもテキスト参照は残す（URLだけ除去）
-                        if isinstance(ref, dict):
-                            valid_refs.append({"text": ref.get("text", ""), "url": ""})
-                        # str形式は除去
-                else:
+                if not url:
                     # URLなしの参照はそのまま残す
                     valid_refs.append(ref)
-            t["references"] = valid_refs
+                    continue
+                ok, final_url = results.get(url, (True, url))
+                if ok:
+                    if isinstance(ref, dict) and ref.get("url") == url:
+                        ref = {**ref, "url": _resolved(url, final_url)}
+                    valid_refs.append(ref)
+                elif isinstance(ref, dict):
+                    # URLが切れていてもテキスト参照は残す（URLだけ除去）
+                    valid_refs.append({"text": ref.get("text", ""), "url": ""})
+                # str形式は除去
+            holder["references"] = valid_refs
+
+
+def validate_references(analysis, holders: list[dict] | None = None) -> dict | list:
+    """分析結果の全セクションの参照URLを検証し、切れたリンクを除外する.
+
+    対応形式:
+    - dict形式: {"text": "...", "url": "https://..."} — url フィールドを検証
+    - str形式: テキスト内のURLを抽出して検証（後方互換）
+    - reference_urls（旧形式）: URLリストを検証
+
+    Args:
+        holders: link_generator.normalize_references が返した参照を持つ辞書のリスト。
+            省略時は analysis を走査して集める。
+    """
+    if holders is None:
+        holders = list(_iter_reference_holders(analysis))
+    urls = []
+    for holder in holders:
+        for url in holder.get("reference_urls", []):
+            if isinstance(url, str) and url.startswith("http"):
+                urls.append(url)
+        for ref in holder.get("references", []):
+            url = _extract_url_from_ref(ref)
+            if url:
+                urls.append(url)
+    if not urls:
+        return analysis
+
+    results = check_urls(urls)
+    broken = [u for u, (ok, _) in results.items() if not ok]
+    if broken:
+        logger.warning("切れたリンクを除外: %s", broken)
+    else:
+        logger.info("全URLが到達可能（%d件）", len(results))
+
+    _apply_results(holders, results)
+    return analysis
+
 
-    return trends
+def validate_trends(trends: list[dict], holders: list[dict] | None = None) -> list[dict]:
+    """各トレンドの参照URLを検証する（validate_references の top_trends 版）."""
+    return validate_references(trends, holders)
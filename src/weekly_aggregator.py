@@ -2,6 +2,11 @@
 
 過去1週間分の日報データ（history.jsonに保存されたanalysis結果）を
 集約して、週報分析に渡すためのデータを構築する。
+
+日報保存時に ISO 週ごとのローリング集計（data/weekly_rollups/YYYY-Www.json）も
+更新する。地域別ヘッドライン・重複除去済みの参照だけを持ち、トレンドの出現回数・
+ステージ推移は TrendStore（data/trends.db）の時系列から組み立てるため、
+週報プロンプトは日報の分量によらず小さく収まる。
 """
 
 import json
@@ -9,10 +14,31 @@ import logging
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
+from report_archive import archive_report, load_archived_report
+from trend_store import TrendStore
+
 logger = logging.getLogger(__name__)
 
 JST = timezone(timedelta(hours=9))
 DAILY_REPORTS_DIR = Path(__file__).resolve().parent.parent / "data" / "daily_reports"
+ROLLUPS_DIR = Path(__file__).resolve().parent.parent / "data" / "weekly_rollups"
+
+# 週報プロンプトに渡す件数の上限
+ROLLUP_MAX_HEADLINES = 10
+ROLLUP_MAX_REFERENCES = 40
+
+# ロールアップのヘッドライン集計対象: ラベル → 日報内のパス
+ROLLUP_HEADLINE_SECTIONS = {
+    "china": ("asia_trends", "china"),
+    "korea": ("asia_trends", "korea"),
+    "taiwan": ("asia_trends", "taiwan"),
+    "southeast_asia": ("asia_trends", "southeast_asia"),
+    "news_western": ("industry_news", "western"),
+    "news_asian": ("industry_news", "asian"),
+    "foodtech": ("foodtech",),
+    "regulation_risks": ("regulation", "risks"),
+    "regulation_opportunities": ("regulation", "opportunities"),
+}
 
 
 def save_daily_analysis(analysis: dict) -> None:
@@ -25,28 +51,166 @@ def save_daily_analysis(analysis: dict) -> None:
         encoding="utf-8",
     )
     logger.info("日報データ保存: %s", filepath.name)
+    update_weekly_rollup(analysis, today)
+
+
+# ────────────────────────────────────────────
+# 週次ロールアップ
+# ────────────────────────────────────────────
+
+def _rollup_path(date_str: str) -> Path:
+    year, week, _ = datetime.strptime(date_str, "%Y-%m-%d").isocalendar()
+    return ROLLUPS_DIR / f"{year}-W{week:02d}.json"
+
+
+def _load_rollup(path: Path) -> dict:
+    if path.exists():
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning("週次ロールアップ読み込み失敗 (%s): %s", path.name, e)
+    return {"days": [], "headlines": {}, "references": {}}
+
+
+def _remove_day(rollup: dict, date_str: str) -> None:
+    """同日の前回実行で反映した分を取り除く."""
+    for label, headlines in rollup["headlines"].items():
+        rollup["headlines"][label] = {h: d for h, d in headlines.items() if d != date_str}
+    for key in list(rollup["references"]):
+        entry = rollup["references"][key]
+        entry["days"] = [d for d in entry["days"] if d != date_str]
+        if not entry["days"]:
+            del rollup["references"][key]
+
+
+def update_weekly_rollup(analysis: dict, date_str: str) -> None:
+    """日報1日分を週次ロールアップに反映する（同日の再実行は置き換え）.
+
+    トレンドの順位・ステージ・指標は TrendStore.record_day が保存するので、ここでは持たない。
+    """
+    path = _rollup_path(date_str)
+    rollup = _load_rollup(path)
+    # 旧形式（トレンドをロールアップに持っていた頃）の記録は捨てる
+    rollup.pop("trends", None)
+
+    _remove_day(rollup, date_str)
+    if date_str not in rollup["days"]:
+        rollup["days"].append(date_str)
+        rollup["days"].sort()
+
+    # ヘッドライン: ラベル別に初出日を記録（重複除去）
+    for label, path_keys in ROLLUP_HEADLINE_SECTIONS.items():
+        items = analysis
+        for key in path_keys:
+            items = items.get(key, {}) if isinstance(items, dict) else {}
+        headlines = rollup["headlines"].setdefault(label, {})
+        for item in items if isinstance(items, list) else []:
+            headline = item.get("headline", "") if isinstance(item, dict) else ""
+            if headline and headline not in headlines:
+                headlines[headline] = date_str
+
+    # 参照: テキスト（URLがあればURL）単位で出現日を記録
+    for ref in _iter_references(analysis):
+        key = ref.get("url") or ref.get("text", "")
+        if not key:
+            continue
+        entry = rollup["references"].setdefault(
+            key, {"text": ref.get("text", ""), "url": ref.get("url", ""), "days": []}
+        )
+        if date_str not in entry["days"]:
+            entry["days"].append(date_str)
+
+    ROLLUPS_DIR.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(rollup, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    logger.info("週次ロールアップ更新: %s（%d 日分）", path.name, len(rollup["days"]))
+
+
+def _iter_references(obj):
+    """分析結果中の全 references を dict 形式で列挙する."""
+    if isinstance(obj, dict):
+        for ref in obj.get("references", []) if isinstance(obj.get("references"), list) else []:
+            if isinstance(ref, dict):
+                yield ref
+            elif isinstance(ref, str):
+                yield {"text": ref, "url": ""}
+        for value in obj.values():
+            yield from _iter_references(value)
+    elif isinstance(obj, list):
+        for item in obj:
+            yield from _iter_references(item)
+
+
+def load_weekly_rollup() -> dict | None:
+    """今週のロールアップを週報プロンプト向けに要約して返す。なければ None."""
+    path = _rollup_path(datetime.now(JST).strftime("%Y-%m-%d"))
+    if not path.exists():
+        return None
+    rollup = _load_rollup(path)
+    if not rollup["days"]:
+        return None
+
+    with TrendStore() as store:
+        series = store.between(rollup["days"][0], rollup["days"][-1])
+    trends = []
+    for name_en, points in series.items():
+        stages = []
+        for p in points:
+            if p["lifecycle_stage"] and (not stages or stages[-1] != p["lifecycle_stage"]):
+                stages.append(p["lifecycle_stage"])
+        trends.append({
+            "name_en": name_en,
+            "name_ja": points[-1]["name_ja"],
+            "appearances": len(points),
+            "first_seen": points[0]["date"],
+            "stage_transition": " → ".join(stages),
+            "ranks": [p["rank"] for p in points],
+            "metrics_first": points[0]["metrics_raw"],
+            "metrics_last": points[-1]["metrics_raw"],
+        })
+    trends.sort(key=lambda t: (-t["appearances"], t["first_seen"]))
+
+    headlines = {
+        label: list(items)[-ROLLUP_MAX_HEADLINES:]
+        for label, items in rollup["headlines"].items() if items
+    }
+    references = sorted(rollup["references"].values(), key=lambda r: -len(r["days"]))
+    references = [
+        {"text": r["text"], "url": r["url"]} for r in references[:ROLLUP_MAX_REFERENCES]
+    ]
+
+    logger.info("週報用ロールアップ: %d 日分・トレンド %d 件", len(rollup["days"]), len(trends))
+    return {
+        "days": rollup["days"],
+        "trends": trends,
+        "headlines": headlines,
+        "references": references,
+    }
+
+
+def load_daily_report(date_str: str) -> dict | None:
+    """指定日の日報分析データを読み込む（保持期間外は月別アーカイブから）."""
+    filepath = DAILY_REPORTS_DIR / f"{date_str}.json"
+    if filepath.exists():
+        try:
+            return json.loads(filepath.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning("日報データ読み込み失敗 (%s): %s", date_str, e)
+            return None
+    return load_archived_report(date_str)
 
 
 def load_weekly_data() -> list[dict]:
     """過去7日分の日報分析データを読み込む."""
-    if not DAILY_REPORTS_DIR.exists():
-        logger.warning("日報データディレクトリが存在しません")
-        return []
-
     now = datetime.now(JST)
     weekly_data = []
 
     for i in range(7):
         date = now - timedelta(days=i)
         date_str = date.strftime("%Y-%m-%d")
-        filepath = DAILY_REPORTS_DIR / f"{date_str}.json"
-        if filepath.exists():
-            try:
-                data = json.loads(filepath.read_text(encoding="utf-8"))
-                data["_report_date"] = date_str
-                weekly_data.append(data)
-            except (json.JSONDecodeError, OSError) as e:
-                logger.warning("日報データ読み込み失敗 (%s): %s", date_str, e)
+        data = load_daily_report(date_str)
+        if data:
+            data["_report_date"] = date_str
+            weekly_data.append(data)
 
     logger.info("週報用データ: %d 日分を読み込み", len(weekly_data))
     return weekly_data
@@ -66,18 +230,20 @@ def get_week_info() -> tuple[int, str]:
 
 
 def cleanup_old_reports(keep_days: int = 30) -> None:
-    """古い日報データファイルを削除."""
+    """古い日報データファイルを月別の圧縮アーカイブに移す."""
     if not DAILY_REPORTS_DIR.exists():
         return
 
     cutoff = datetime.now(JST) - timedelta(days=keep_days)
 
-    for filepath in DAILY_REPORTS_DIR.glob("*.json"):
+    for filepath in sorted(DAILY_REPORTS_DIR.glob("*.json")):
         try:
             date_str = filepath.stem
             file_date = datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=JST)
             if file_date < cutoff:
+                data = json.loads(filepath.read_text(encoding="utf-8"))
+                archive_report(date_str, data)
                 filepath.unlink()
-                logger.info("古い日報データを削除: %s", filepath.name)
-        except (ValueError, OSError):
-            pass
+                logger.info("古い日報データをアーカイブ: %s", filepath.name)
+        except (ValueError, OSError, json.JSONDecodeError) as e:
+            logger.warning("日報データのアーカイブ失敗 (%s): %s", filepath.name, e)
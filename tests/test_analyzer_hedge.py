@@ -0,0 +1,90 @@
+"""ヘッジリクエストをローカルのスタブサーバー（GEMINI_BASE_URL）で確かめる."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import analyzer
+import gemini_cache
+
+PRIMARY, FALLBACK = analyzer.GEMINI_MODELS
+PRIMARY_DELAY = 1.5
+
+RESPONSES = {
+    PRIMARY: ['{"top_trends": [{"rank": 1, "name_en": "Slow Primary"}],', ' "note": "primary"}'],
+    FALLBACK: ['{"top_trends": [{"rank": 1, "name_en": "Fast Fallback"}],', ' "note": "fallback"}'],
+}
+
+
+class _GeminiStub(BaseHTTPRequestHandler):
+    """streamGenerateContent を SSE で返す。プライマリは最初のチャンクの後に遅れる."""
+
+    finished: dict[str, threading.Event] = {}
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        model = next(m for m in RESPONSES if f"models/{m}:" in self.path)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        try:
+            for i, text in enumerate(RESPONSES[model]):
+                if i and model == PRIMARY:
+                    time.sleep(PRIMARY_DELAY)
+                chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            self.finished[model].set()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(monkeypatch, tmp_path):
+    _GeminiStub.finished = {m: threading.Event() for m in RESPONSES}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GeminiStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("GEMINI_API_KEY", f"stub-{server.server_port}")
+    monkeypatch.setenv("GEMINI_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setenv("GEMINI_HEDGE", "on")
+    monkeypatch.setenv("GEMINI_HEDGE_AFTER", "0.2")
+    monkeypatch.setenv("GEMINI_STREAM", "on")
+    monkeypatch.setattr(gemini_cache, "CACHE_DIR", tmp_path / "gemini_cache")
+    monkeypatch.setattr(analyzer, "LATENCY_FILE", tmp_path / "gemini_latency.json")
+    monkeypatch.setattr(analyzer, "_latencies", None)
+    yield server
+    server.shutdown()
+
+
+def test_hedge_uses_only_the_winner(stub_server, tmp_path):
+    calls = []
+
+    def on_section(key, value):
+        calls.append((key, value, threading.current_thread() is threading.main_thread()))
+
+    started = time.monotonic()
+    result = analyzer._call_gemini("prompt", "日報", required_keys=("top_trends",), on_section=on_section)
+    elapsed = time.monotonic() - started
+
+    assert result["note"] == "fallback"
+    assert elapsed < PRIMARY_DELAY
+    # セクション通知は採用したモデルの分だけ、呼び出し元のスレッドで届く
+    assert [(k, v[0]["name_en"] if k == "top_trends" else v, main) for k, v, main in calls] == [
+        ("top_trends", "Fast Fallback", True), ("note", "fallback", True),
+    ]
+
+    # 負けたプライマリの応答はキャッシュにもレイテンシ実績にも残らない
+    assert _GeminiStub.finished[PRIMARY].wait(PRIMARY_DELAY + 2)
+    time.sleep(0.3)
+    cached = [json.loads(p.read_text())["model"] for p in (tmp_path / "gemini_cache").glob("*.json")]
+    assert cached == [FALLBACK]
+    latencies = json.loads((tmp_path / "gemini_latency.json").read_text())
+    assert list(latencies) == [FALLBACK]
+    assert len(calls) == 2
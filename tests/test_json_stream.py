@@ -0,0 +1,83 @@
+import json
+import random
+
+import pytest
+
+from json_stream import IncrementalJSONParser, repair_json
+
+# 実際の Gemini 応答を縮めたもの（見出し中の括弧・エスケープ・数値・真偽値を含む）
+RECORDED_RESPONSES = [
+    """{
+  "top_trends": [
+    {"rank": 1, "name_en": "Yakgwa", "name_ja": "薬菓", "lifecycle_stage": "emerging",
+     "metrics": "検索数 +240%（前週比）", "context": "韓国の伝統菓子 {薬菓} が \\"ヤックァ\\" として人気"},
+    {"rank": 2, "name_en": "Dubai Chocolate", "name_ja": "ドバイチョコ", "lifecycle_stage": "peak",
+     "metrics": "TikTok 1.2M views", "context": "ピスタチオ [カダイフ] 入り"}
+  ],
+  "asia_trends": {
+    "korea": [{"headline": "Seoul bakeries add yakgwa croissants, }{ shaped", "references": [
+      {"text": "Korea Herald", "url": "https://example.com/a?x=1&y=[2]"}]}],
+    "taiwan": []
+  },
+  "confidence": 0.82,
+  "verified": true,
+  "note": null
+}""",
+    """{"top_trends":[{"rank":1,"name_en":"Ube Latte","name_ja":"ウベラテ","metrics":"-3.5e2","context":"バックスラッシュ \\\\ と改行\\n"}],"foodtech":[{"headline":"精密発酵で乳たんぱく","references":["https://example.com/b"]}],"regulation":{"risks":[],"opportunities":[{"headline":"表示基準の緩和 (案)"}]}}""",
+    """```json
+{"summary": "市場概況: 甘味系が好調 :) , 塩味系は横ばい", "top_trends": [{"rank": 1, "name_en": "Salt Bread", "scores": [1, 2.5, -3, 4e1]}], "extra": {"a": {"b": {"c": [[], {}, [{}]]}}}}
+```""",
+]
+
+SEED = 20261019
+
+
+def _full(text: str) -> dict:
+    start = text.index("{")
+    end = text.rindex("}") + 1
+    return json.loads(text[start:end])
+
+
+@pytest.mark.parametrize("text", RECORDED_RESPONSES)
+def test_every_prefix_repairs_to_valid_json(text):
+    for cut in range(len(text) + 1):
+        repaired = repair_json(text[:cut])
+        if repaired is None:
+            continue
+        assert isinstance(json.loads(repaired), dict), cut
+
+
+@pytest.mark.parametrize("text", RECORDED_RESPONSES)
+def test_complete_response_is_returned_unchanged(text):
+    assert json.loads(repair_json(text)) == _full(text)
+
+
+@pytest.mark.parametrize("text", RECORDED_RESPONSES)
+def test_repair_keeps_completed_sections(text):
+    full = _full(text)
+    keys = list(full)
+    rng = random.Random(SEED)
+    for cut in sorted(rng.sample(range(len(text)), 60)):
+        repaired = json.loads(repair_json(text[:cut]) or "{}")
+        got = list(repaired)
+        # 残るセクションは元の順序の先頭部分で、最後の1つ以外は完全に一致する
+        assert got == keys[:len(got)], cut
+        for key in got[:-1]:
+            assert repaired[key] == full[key], (cut, key)
+
+
+@pytest.mark.parametrize("text", RECORDED_RESPONSES)
+def test_parser_emits_sections_for_random_chunking(text):
+    full = _full(text)
+    rng = random.Random(SEED)
+    for _ in range(20):
+        seen = {}
+        parser = IncrementalJSONParser(lambda key, value: seen.setdefault(key, value))
+        pos = 0
+        while pos < len(text):
+            size = rng.randint(1, 40)
+            parser.feed(text[pos:pos + size])
+            pos += size
+        assert parser.complete
+        assert seen == full
+        assert parser.sections == full
@@ -0,0 +1,72 @@
+import logging
+
+import pytest
+
+import gemini_cache
+import main
+import outbox
+from trend_store import TrendStore
+
+ANALYSIS = {
+    "top_trends": [{
+        "rank": 1, "name_en": "Yakgwa", "name_ja": "薬菓", "lifecycle_stage": "emerging",
+        "metrics": "検索数 +240%", "context": "韓国の伝統菓子",
+        "references": [{"text": "Korea Herald", "url": "https://example.com/a"}],
+    }],
+}
+
+
+class _History:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def daily_run(monkeypatch, tmp_path):
+    """run_daily の収集・分析・配信先をすべて手元の関数に差し替える."""
+    sent = {}
+    monkeypatch.setattr(outbox, "OUTBOX_DIR", tmp_path / "outbox")
+    monkeypatch.setattr(main, "collect_all", lambda: {"rss": [{"title": "Yakgwa"}]})
+    monkeypatch.setattr(main, "load_history", lambda: _History())
+    monkeypatch.setattr(main, "get_past_names", lambda history: [])
+    monkeypatch.setattr(main, "save_history", lambda history, trends: None)
+    monkeypatch.setattr(
+        main, "analyze_daily", lambda collected, **kwargs: {
+            "top_trends": [dict(t) for t in ANALYSIS["top_trends"]],
+        },
+    )
+    monkeypatch.setattr(main, "normalize_references", lambda analysis: [])
+    monkeypatch.setattr(main, "validate_references", lambda analysis, holders: analysis)
+    monkeypatch.setattr(main, "save_daily_analysis", lambda analysis: None)
+    monkeypatch.setattr(main, "TrendStore", lambda: TrendStore(tmp_path / "trends.db"))
+    monkeypatch.setattr(main, "save_podcast_source", lambda text, date_str: None)
+    monkeypatch.setattr(main, "cleanup_old_reports", lambda: None)
+    monkeypatch.setattr(main, "_notion_configured", lambda: True)
+    monkeypatch.setattr(main, "send", lambda text: sent.setdefault("line", text) is not None)
+    monkeypatch.setattr(
+        main, "save_to_notion", lambda *args: sent.setdefault("notion", "https://notion.so/x"),
+    )
+    monkeypatch.setattr(
+        main, "run_podcast_page", lambda *args: sent.setdefault("podcast_page", tmp_path / "p.html"),
+    )
+    monkeypatch.setattr(outbox, "BACKOFF_BASE", 0)
+    return sent
+
+
+def test_run_daily_delivers_every_sink_and_logs_metrics(daily_run, caplog):
+    with caplog.at_level(logging.INFO):
+        main.run_daily()
+
+    assert set(daily_run) == {"line", "notion", "podcast_page"}
+    assert "Yakgwa" in daily_run["line"]
+    assert "Geminiキャッシュ" in caplog.text
+    assert gemini_cache.stats().keys() >= {"hits", "misses"}
+
+
+def test_run_daily_exits_non_zero_when_line_fails(daily_run, monkeypatch):
+    monkeypatch.setattr(main, "send", lambda text: False)
+
+    with pytest.raises(SystemExit) as exc:
+        main.run_daily()
+    assert exc.value.code == 1
+    assert "notion" in daily_run
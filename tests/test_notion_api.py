@@ -0,0 +1,41 @@
+import httpx
+import pytest
+
+import notion_api
+from notion_api import NotionAPIError, NotionClient, TokenBucket
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """最初の1回だけ 502 を返す MockTransport につないだクライアント."""
+    monkeypatch.setattr(notion_api, "_backoff", lambda attempt: 0)
+    seen = []
+
+    def handler(request):
+        seen.append((request.method, request.url.path))
+        if len(seen) == 1:
+            return httpx.Response(502, json={"code": "bad_gateway", "message": "upstream"})
+        return httpx.Response(200, json={"results": [], "has_more": False, "id": "page"})
+
+    c = NotionClient("token", bucket=TokenBucket(1000, 1000))
+    c._http = httpx.Client(base_url="https://api.notion.test/v1/", transport=httpx.MockTransport(handler))
+    c.seen = seen
+    yield c
+    c.close()
+
+
+def test_database_query_is_retried_on_5xx(client):
+    assert client.query_database("a" * 32, {}) == {"results": [], "has_more": False, "id": "page"}
+    assert [m for m, _ in client.seen] == ["POST", "POST"]
+
+
+def test_block_children_read_is_retried_on_5xx(client):
+    assert client.list_children("block") == []
+    assert len(client.seen) == 2
+
+
+def test_page_creation_is_not_retried_on_5xx(client):
+    with pytest.raises(NotionAPIError) as exc:
+        client.create_page({"database_id": "db"}, {}, [])
+    assert exc.value.status == 502
+    assert len(client.seen) == 1
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+import podcast_page
+
+
+def _photos(*ids):
+    return [{"id": i, "url": f"https://images.test/{i}", "title": "", "source": "Pexels"} for i in ids]
+
+
+@pytest.fixture
+def image_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("PEXELS_API_KEY", "key")
+    monkeypatch.setattr(podcast_page, "IMAGE_CACHE_FILE", tmp_path / "image_cache.json")
+    monkeypatch.setattr(podcast_page, "PEXELS_MIN_INTERVAL", 0)
+    return tmp_path / "image_cache.json"
+
+
+def test_chosen_photos_survive_cache_expiry(image_cache, monkeypatch):
+    keywords = [{"name_en": "Yakgwa", "rank": 1}]
+    clock = [1_800_000_000.0]
+    monkeypatch.setattr(podcast_page.time, "time", lambda: clock[0])
+
+    monkeypatch.setattr(podcast_page, "_pexels_search", lambda *args: _photos(3, 1, 2, 4))
+    first = podcast_page.search_images(keywords, max_per_keyword=2)
+    assert [p["id"] for p in first[0]["images"]] == [3, 1]
+
+    # TTL を過ぎると検索結果は捨てるが、選んだ ID は残る
+    clock[0] += podcast_page.IMAGE_CACHE_TTL + 1
+    podcast_page._save_image_cache(json.loads(image_cache.read_text()))
+    assert json.loads(image_cache.read_text()) == {"Yakgwa food": {"chosen_ids": [3, 1]}}
+
+    # 検索し直して並びが変わっても、前回と同じ写真を使う
+    monkeypatch.setattr(podcast_page, "_pexels_search", lambda *args: _photos(9, 1, 8, 3))
+    second = podcast_page.search_images(keywords, max_per_keyword=2)
+    assert [p["id"] for p in second[0]["images"]] == [3, 1]
+
+
+def test_minified_and_compressed_page_is_smaller(monkeypatch, tmp_path):
+    monkeypatch.setattr(podcast_page, "DOCS_DIR", tmp_path)
+    image_results = [
+        {"rank": i, "name_en": f"Trend {i}", "name_ja": "トレンド", "context": "説明 " * 20,
+         "images": _photos(i * 10, i * 10 + 1)}
+        for i in (1, 2, 3)
+    ] + [{"rank": 0, "name_en": "Seoul bakeries add yakgwa croissants", "images": _photos(99)}]
+    html = podcast_page.generate_html("2026-10-19", "日報 2026-10-19", image_results)
+
+    path = podcast_page.save_page(html, "2026-10-19.html")
+    sizes = podcast_page._output_sizes(path, len(html.encode("utf-8")))
+
+    assert sizes["raw"] < sizes["source"]
+    assert sizes["gzip"] < sizes["source"] * 0.4
+    assert sizes["br"] <= sizes["gzip"]
+
+
+def test_size_regression_compares_only_with_the_same_page():
+    manifest = {"pages": {"2026-10-18": {"bytes": {"raw": 1000, "gzip": 400}}}}
+    # 新しいページは他の日のページと比べない
+    assert podcast_page.check_size_regression(manifest, "2026-10-19", {"raw": 5000, "gzip": 2000}) == []
+
+    manifest["pages"]["2026-10-19"] = {"bytes": {"raw": 1000, "gzip": 400}}
+    assert podcast_page.check_size_regression(manifest, "2026-10-19", {"raw": 1100, "gzip": 600}) == ["gzip"]
@@ -0,0 +1,38 @@
+import pytest
+
+from trend_index import PastTrendIndex
+
+
+@pytest.mark.parametrize("past, name", [
+    ("Matcha Latte", "Hojicha Latte"),
+    ("Matcha Latte", "Strawberry Matcha Latte"),
+    ("Tea", "Bubble Tea"),
+    ("Tea", "Ube Tea Latte"),
+    ("Ube", "Ube Cheesecake"),
+    ("Salt Bread", "Salt Bread Sandwich Bar"),
+])
+def test_near_miss_names_do_not_match(past, name):
+    assert PastTrendIndex([past]).match_name(name) is None
+
+
+@pytest.mark.parametrize("past, name", [
+    ("Yakgwa", "yakgwa"),
+    ("Tanghulu", "Tang Hulu"),
+    ("Dubai Chocolate", "Dubai Chocolate Bar"),
+    ("薬菓", "薬果"),
+    ("やくぁ", "ヤクァ"),
+    ("Ｙａｋｇｗａ", "Yakgwa"),
+])
+def test_spelling_variants_match(past, name):
+    assert PastTrendIndex([past]).match_name(name) == past
+
+
+def test_drop_repeats_keeps_new_trends():
+    index = PastTrendIndex(["Matcha Latte", "Tea"])
+    trends = [
+        {"rank": 1, "name_en": "Hojicha Latte"},
+        {"rank": 2, "name_en": "matcha latte"},
+        {"rank": 3, "name_en": "Bubble Tea"},
+    ]
+    fresh = index.drop_repeats(trends)
+    assert [(t["rank"], t["name_en"]) for t in fresh] == [(1, "Hojicha Latte"), (2, "Bubble Tea")]
@@ -0,0 +1,24 @@
+from trend_store import TrendStore
+
+
+def test_series_resolves_spelling_variants_and_date_range(tmp_path):
+    with TrendStore(tmp_path / "trends.db") as store:
+        store.record_day("2026-10-12", [{"name_en": "Tanghulu", "rank": 1, "lifecycle_stage": "emerging"}])
+        store.record_day("2026-10-13", [{"name_en": "Tang Hulu", "rank": 2, "lifecycle_stage": "peak"}])
+        store.record_day("2026-10-14", [{"name_en": "Yakgwa", "rank": 1}])
+
+        series = store.series("tanghulu")
+        assert [(p["date"], p["rank"], p["lifecycle_stage"]) for p in series] == [
+            ("2026-10-12", 1, "emerging"), ("2026-10-13", 2, "peak"),
+        ]
+        assert [p["date"] for p in store.series("Tanghulu", start="2026-10-13")] == ["2026-10-13"]
+        assert store.series("Hojicha Latte") == []
+
+
+def test_record_day_replaces_an_earlier_run_of_the_same_day(tmp_path):
+    with TrendStore(tmp_path / "trends.db") as store:
+        store.record_day("2026-10-13", [{"name_en": "Tanghulu", "rank": 1}, {"name_en": "Yakgwa", "rank": 2}])
+        store.record_day("2026-10-13", [{"name_en": "Ube Latte", "rank": 1}])
+
+        assert list(store.between("2026-10-12", "2026-10-18")) == ["Ube Latte"]
+        assert store.series("Yakgwa") == []